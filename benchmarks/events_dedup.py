@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+"""
+Benchmark of the device events de-duplication.
+
+Compares the previous de-duplication (``event not in events`` over the list
+of events) with the ``DeviceEvents`` index by event id.
+
+Usage: python -m benchmarks.events_dedup [--list-max 20000] [sizes ...]
+"""
+import argparse
+import time
+import uuid
+
+from kodaksmarthome.events import DeviceEvents
+
+
+def make_events(total):
+    return [
+        {
+            "id": str(uuid.UUID(int=i)),
+            "event_type": 1,
+            "created_date": f"2019-12-19T15:56:{i % 60:02d}.{i % 1000:03d}Z",
+            "snapshot": "http://snapshot_url",
+            "data": [],
+            "dv_data": None,
+        }
+        for i in range(total)
+    ]
+
+
+def dedup_list(events):
+    device_events = list()
+    for event in events:
+        if event not in device_events:
+            device_events.append(event)
+
+    return device_events
+
+
+def dedup_index(events):
+    return DeviceEvents("DEVICE", events).events
+
+
+def timeit(function, events):
+    start = time.perf_counter()
+    function(events)
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sizes", nargs="*", type=int, default=[10000, 100000])
+    parser.add_argument(
+        "--list-max",
+        type=int,
+        default=20000,
+        help="skip the list de-duplication above this size (it is O(n^2))",
+    )
+    args = parser.parse_args()
+
+    print(f"{'events':>10} {'list (s)':>12} {'index (s)':>12}")
+    for size in args.sizes:
+        events = make_events(size)
+        index_time = timeit(dedup_index, events)
+        if size <= args.list_max:
+            list_time = f"{timeit(dedup_list, events):12.4f}"
+
+        else:
+            list_time = f"{'skipped':>12}"
+
+        print(f"{size:>10} {list_time} {index_time:12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,3 @@
 from .api import KodakSmartHome
+from .async_api import AsyncKodakSmartHome
+from .fleet import KodakSmartHomeFleet
@@ -3,8 +3,31 @@
 #
 # Copyright 2019 Kairo de Araujo
 #
-import requests
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
+import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+
+from kodaksmarthome.cache import EventCache
+from kodaksmarthome.columns import EventColumns
+from kodaksmarthome.events import (
+    DeviceEvents,
+    add_timestamps,
+    created_timestamp,
+)
+from kodaksmarthome.models import (
+    MODEL_DICT,
+    MODELS,
+    load_devices,
+    load_events,
+)
+from kodaksmarthome.ratelimit import request_host
+from kodaksmarthome.retry import RETRY_STATUSES, request_endpoint
 from kodaksmarthome.constants import (
     HTTP_HEADERS_AUTH,
     HTTP_HEADERS_BASIC,
@@ -13,15 +36,23 @@ from kodaksmarthome.constants import (
     DEVICE_EVENT_BATTERY,
     DEVICE_EVENT_SOUND,
     DEVICE_EVENT_MOTION,
+    LOAD_ALL,
+    LOAD_DEVICES,
+    LOAD_LAZY,
+    LOADS,
     SUPPORTED_REGIONS,
+    TOKEN_RENEWAL_MARGIN,
     _URLS,
 )
 
 
-class KodakSmartHome:
-    """Kodak Smart Home API session.
+class _BaseKodakSmartHome:
+    """Kodak Smart Home API session state shared by the sync and async
+    clients.
 
-    Provides connection to Kodak Smart Home portal.
+    Holds the session data and the portal response handling. The HTTP
+    transport and the request flow (``connect``, ``update``, ...) are
+    implemented by ``KodakSmartHome`` and ``AsyncKodakSmartHome``.
 
     :param username: username registered in Kodak Smart Home Portal
     :type username: str
@@ -29,66 +60,201 @@ class KodakSmartHome:
     :type password: str
     :param region: Global Region Portal. Options: 'EU'. Default: 'EU'
     :type region: str
+    :param max_workers: number of devices to fetch events concurrently.
+        Default: None (one device at a time)
+    :type max_workers: int
+    :param max_page_workers: number of events pages to fetch concurrently
+        from a device once the total of pages is known.
+        Default: None (one page at a time)
+    :type max_page_workers: int
+    :param model: events and devices model. Options: 'dict' (portal
+        payload) or 'compact' (``kodaksmarthome.models`` objects with
+        ``__slots__``, compatible with ``dict``). Default: 'dict'
+    :type model: str
+    :param cache_path: SQLite database path to cache the devices and events
+        between sessions. ``connect`` loads them from the cache and fetches
+        only the newer events. Default: None (no cache)
+    :type cache_path: str
+    :param token_store: store of the portal credentials, reused or refreshed
+        by ``connect`` instead of a full login, e.g.
+        ``kodaksmarthome.tokens.FileTokenStore``. Default: None
+    :type token_store: ``kodaksmarthome.tokens.FileTokenStore`` or
+        ``kodaksmarthome.tokens.MemoryTokenStore``
+    :param retry_policy: retry policy of the portal requests.
+        Default: None (no retries)
+    :type retry_policy: ``kodaksmarthome.retry.RetryPolicy``
+    :param circuit_breaker: circuit breaker of the portal endpoints, it can
+        be shared by several sessions. Default: None
+    :type circuit_breaker: ``kodaksmarthome.retry.CircuitBreaker``
+    :param rate_limiter: rate limiter of the portal requests by host, it can
+        be shared by several sessions. Default: None (no limit)
+    :type rate_limiter: ``kodaksmarthome.ratelimit.RateLimiter``
     """
 
-    def __init__(self, username, password, region="EU"):
+    def __init__(
+        self,
+        username,
+        password,
+        region="EU",
+        max_workers=None,
+        max_page_workers=None,
+        model=MODEL_DICT,
+        cache_path=None,
+        token_store=None,
+        retry_policy=None,
+        circuit_breaker=None,
+        rate_limiter=None,
+    ):
 
         self.username = username
         self.password = password
-        self.http_session = requests.Session()
         self.token = None
+        self.token_info = None
+        self.token_store = token_store
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.cookie = None
+        self.user_id = None
         self.account_info = None
         self.web_urls = None
         self.devices = list()
         self.events = list()
         self.is_connected = False
+        self.max_workers = max_workers
+        self.max_page_workers = max_page_workers
+        self.model = model
+        self._events_index = dict()
+        self._indexed_events = None
+        self._event_columns = None
+        self._columns_events = None
+        self._new_events = dict()
+        self._event_callbacks = list()
+        self._device_callbacks = list()
+        self._lazy_devices = False
+        self._lazy_events = False
+        self._lazy_incremental = False
+        self.account = f"{region}/{username}"
+        self.cache = None
+        if model not in MODELS:
+            raise AttributeError(f"{model} model is not supported")
+
         if region not in SUPPORTED_REGIONS:
             raise AttributeError(f"{region} is not supported")
 
         else:
             self.region_url = _URLS(SUPPORTED_REGIONS[region])
             referer = self.region_url.URL.split("/web")[0]
-            HTTP_HEADERS_BASIC["Origin"] = self.region_url.URL
-            HTTP_HEADERS_BASIC["Referer"] = referer
-            self.basic_headers = HTTP_HEADERS_BASIC
+            # copied, the sessions of different regions and tokens run
+            # concurrently
+            self.basic_headers = {
+                **HTTP_HEADERS_BASIC,
+                "Origin": self.region_url.URL,
+                "Referer": referer,
+            }
+
+        if cache_path is not None:
+            self.cache = EventCache(cache_path)
+
+    def _before_request(self, endpoint):
+        """
+        Check the circuit breaker before a request to the endpoint
 
-    def _http_request(self, method, url, headers=None, data=None, params=None):
+        :param endpoint: endpoint, see ``kodaksmarthome.retry``
+        :type endpoint: str
+        :return: None
+        :exception: ``ConnectionError`` if the circuit is open
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request(endpoint)
 
-        try:
-            if method == "POST":
-                http_response = self.http_session.post(
-                    url, headers=headers, data=data, params=params
-                )
+    def _failed_status(self, status_code):
+        """
+        Check if the HTTP status code is a transient portal failure
 
-            elif method == "OPTIONS":
-                http_response = self.http_session.options(
-                    url, headers=headers, data=data, params=params
-                )
+        :param status_code: HTTP status code
+        :type status_code: int
+        :return: True if it is a transient failure
+        :rtype: bool
+        """
+        if self.retry_policy is not None:
+            return status_code in self.retry_policy.statuses
 
-            elif method == "GET":
-                http_response = self.http_session.get(
-                    url, headers=headers, data=data, params=params
-                )
+        return status_code in RETRY_STATUSES
 
-            else:
-                raise AttributeError(f"Invalid Method {method}")
+    def _request_failed(self, endpoint, attempt, response_headers=None):
+        """
+        Record a failed request to the endpoint
+
+        :param endpoint: endpoint, see ``kodaksmarthome.retry``
+        :type endpoint: str
+        :param attempt: number of retries already done
+        :type attempt: int
+        :param response_headers: failed response headers, with the optional
+            ``Retry-After``. Default: None (connection error)
+        :type response_headers: dict
+        :return: delay in seconds before retrying the request or None
+        :rtype: float
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_failure(endpoint)
 
-        except requests.exceptions.ConnectionError as err:
-            raise ConnectionError(str(err))
+        if self.retry_policy is None:
+            return None
 
-        status_code = http_response.status_code
-        content_type = None
-        response_json = None
-        response_text = http_response.text
+        retry_after = None
+        if response_headers is not None:
+            retry_after = response_headers.get("Retry-After")
+
+        return self.retry_policy.next_delay(attempt, retry_after=retry_after)
+
+    def _request_succeeded(self, endpoint):
+        """
+        Record a successful request to the endpoint
+
+        :param endpoint: endpoint, see ``kodaksmarthome.retry``
+        :type endpoint: str
+        :return: None
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_success(endpoint)
+
+    def _request_aborted(self, endpoint):
+        """
+        Record a request to the endpoint interrupted by an unexpected error,
+        which is raised without retrying. It fails a circuit breaker trial,
+        so the circuit is not left waiting for its result.
+
+        :param endpoint: endpoint, see ``kodaksmarthome.retry``
+        :type endpoint: str
+        :return: None
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_failure(endpoint)
+
+    def _handle_response(
+        self, method, status_code, content_type, response_json, response_text
+    ):
+        """
+        Handle the Kodak Smart Home portal response
+
+        :param method: HTTP method used in the request
+        :type method: str
+        :param status_code: HTTP status code
+        :type status_code: int
+        :param content_type: response Content-Type header or None
+        :type content_type: str
+        :param response_json: response body decoded from JSON or None
+        :type response_json: dict
+        :param response_text: response body
+        :type response_text: str
+        :return: response json, True or Raises ``ConnectionError``
+        :exception: ``ConnectionError``, ``TypeError``
+        """
         error = None
         error_description = None
 
-        if "Content-Type" in http_response.headers:
-            content_type = http_response.headers["Content-Type"]
-
         if content_type and "application/json" in content_type:
-            response_json = http_response.json()
-
             if "error" in response_json:
                 error = response_json["error"]
 
@@ -158,193 +324,448 @@ class KodakSmartHome:
                 "Unexpected HTTP CODE error " + response_text
             )
 
-    def _options(self):
+    def _token_payload(self):
         """
-        Verify the connection with Kodak Smart Home portal
+        Build the password grant payload used to get the portal token
 
-        :return: boolean result
-        :rtype: bool
+        :return: token request payload
+        :rtype: str
         """
-        options_response = self._http_request(
-            "OPTIONS", self.region_url.URL_TOKEN, headers=self.basic_headers
+        return (
+            "grant_type=password&"
+            + f"username={self.username}&"
+            + f"password={self.password}&"
+            + f"model={HTTP_CLIENT_MODEL}"
         )
 
-        return options_response
-
-    def _token(self):
+    def _set_token(self, token_response):
         """
-        Get Kodak Smart Home Portal Token
+        Store the token information from the portal token response
 
-        :return: True or Raises ``ConnectionError``
+        :param token_response: portal token response
+        :type token_response: dict
+        :return: True
         :rtype: bool
-        :exception: ``ConnectionError``
         """
+        previous_token_info = self.token_info or dict()
         self.token_info = {
             "access_token": None,
             "token_type": None,
             "refresh_token": None,
             "expires_in": None,
+            "expires_at": None,
             "scope": None,
         }
 
-        token_payload = (
-            "grant_type=password&"
-            + f"username={self.username}&"
-            + f"password={self.password}&"
-            + f"model={HTTP_CLIENT_MODEL}"
+        self.token_info["access_token"] = token_response["access_token"]
+        self.token_info["token_type"] = token_response["token_type"]
+        # the refresh_token grant response may not repeat the refresh token
+        # and the account data
+        self.token_info["refresh_token"] = token_response.get(
+            "refresh_token", previous_token_info.get("refresh_token")
         )
+        self.token_info["expires_in"] = token_response.get("expires_in")
+        try:
+            self.token_info["expires_at"] = time.time() + int(
+                self.token_info["expires_in"]
+            )
 
-        token_response = self._http_request(
-            "POST",
-            self.region_url.URL_TOKEN,
-            headers=HTTP_HEADERS_AUTH,
-            data=token_payload,
-        )
+        except (TypeError, ValueError):
+            pass
 
-        self.token_info["access_token"] = token_response["access_token"]
-        self.token_info["token_type"] = token_response["token_type"]
-        self.token_info["refresh_token"] = token_response["refresh_token"]
-        self.token_info["expires_in"] = token_response["expires_in"]
-        self.token_info["scope"] = token_response["scope"]
-        self.account_info = token_response["account_info"]
-        self.web_urls = token_response["web_urls"]
+        self.token_info["scope"] = token_response.get("scope")
+        self.account_info = token_response.get(
+            "account_info", self.account_info
+        )
+        self.web_urls = token_response.get("web_urls", self.web_urls)
         self.token_info["access_token"] = token_response["access_token"]
         self.token = self.token_info["access_token"]
 
         return True
 
-    def _authentication(self):
+    def _refresh_token_payload(self):
         """
-        Perform authentication to Kodak Smart Home Portal
+        Build the refresh token grant payload used to renew the portal token
 
-        :return: True or Raises ``ConnectionError``
+        :return: token request payload
+        :rtype: str
+        """
+        return (
+            "grant_type=refresh_token&"
+            + f"refresh_token={self.token_info['refresh_token']}&"
+            + f"model={HTTP_CLIENT_MODEL}"
+        )
+
+    def _token_expired(self, margin=0):
+        """
+        Check if the portal token is expired
+
+        :param margin: seconds before the expiration to consider the token
+            expired. Default: 0
+        :type margin: int
+        :return: True if the token is expired or its expiration is unknown
         :rtype: bool
         """
-        auth_payload = f"username=&password={self.token}&rememberme=false"
-        auth_response = self._http_request(
-            "POST",
-            self.region_url.URL_AUTH,
-            headers=HTTP_HEADERS_AUTH,
-            data=auth_payload,
+        if self.token_info is None or not self.token_info.get("expires_at"):
+            return True
+
+        return time.time() + margin >= self.token_info["expires_at"]
+
+    def _token_renewal_due(self):
+        """
+        Check if the portal token expires within ``TOKEN_RENEWAL_MARGIN``
+
+        :return: True if the token has a known expiration and must be renewed
+        :rtype: bool
+        """
+        if self.token_info is None or not self.token_info.get("expires_at"):
+            return False
+
+        return self._token_expired(margin=TOKEN_RENEWAL_MARGIN)
+
+    def _save_token(self):
+        """
+        Save the portal credentials in the token store, if it is enabled
+
+        :return: None
+        """
+        if self.token_store is None:
+            return
+
+        self.token_store.save(
+            self.account,
+            {
+                "token_info": self.token_info,
+                "account_info": self.account_info,
+                "web_urls": self.web_urls,
+                "cookie": self.cookie,
+                "user_id": self.user_id,
+            },
         )
 
-        self.cookie = self.http_session.cookies["JSESSIONID"]
-        self.user_id = auth_response["data"]["id"]
+    def _load_token(self):
+        """
+        Load the portal credentials from the token store, if it is enabled
+
+        :return: True if the credentials were loaded
+        :rtype: bool
+        """
+        if self.token_store is None:
+            return False
+
+        token = self.token_store.load(self.account)
+        if not token:
+            return False
+
+        self.token_info = token["token_info"]
+        self.account_info = token["account_info"]
+        self.web_urls = token["web_urls"]
+        self.cookie = token["cookie"]
+        self.user_id = token["user_id"]
+        self.token = self.token_info["access_token"]
 
         return True
 
-    def _get_devices(self):
+    def _discard_token(self):
         """
-        Get all devices available in Kodak Smart Home Portal
+        Remove the portal credentials from the token store, if it is enabled
 
-        :return: all devices
-        :rtype: list
+        :return: None
         """
+        if self.token_store is not None:
+            self.token_store.clear(self.account)
 
-        headers = self.basic_headers
-        headers["Authorization"] = f"Bearer {self.token}"
+    def _auth_payload(self):
+        """
+        Build the authentication payload
 
-        devices_response = self._http_request(
-            "GET",
-            self.region_url.URL_DEVICES,
-            headers=headers,
+        :return: authentication request payload
+        :rtype: str
+        """
+        return f"username=&password={self.token}&rememberme=false"
+
+    def _bearer_headers(self):
+        """
+        Headers with the portal token authorization
+
+        :return: HTTP headers
+        :rtype: dict
+        """
+        return {**self.basic_headers, "Authorization": f"Bearer {self.token}"}
+
+    def _events_url(self, device_id, page):
+        """
+        Device events page URL
+
+        :param device_id: device id
+        :type device_id: str
+        :param page: events page number
+        :type page: int
+        :return: URL
+        :rtype: str
+        """
+        return (
+            f"{self.region_url.URL}/user/device/event?"
+            + f"deviceId={device_id}&"
+            + f"page={page}"
         )
 
-        if self.is_connected is False:
-            self.connect()
+    def _session_lost(self, response):
+        """
+        Check if the portal session was lost in the request
 
-            return self.devices
+        :param response: ``_http_request`` response
+        :return: True if the session was lost
+        :rtype: bool
+        """
+        if response is True or self.is_connected is False:
+            self.is_connected = False
 
-        else:
-            self.devices = devices_response["data"]
+            return True
 
-        return self.devices
+        return False
 
-    def _get_events(self):
+    def _set_events(self, devices_events):
         """
-        Get all event for all available devices in Kodak Smart Home Portal
+        Set the events data from the devices events
 
-        :return: all events
+        :param devices_events: devices events
+        :type devices_events: list of ``DeviceEvents``
+        :return: None
+        """
+        self._events_index = {d.device_id: d for d in devices_events}
+        self.events = [
+            {"device_id": d.device_id, "events": d.events}
+            for d in devices_events
+        ]
+        self._indexed_events = self.events
+
+    def _select_devices(self, device_ids=None):
+        """
+        Known devices ids, in the device list order
+
+        :param device_ids: devices ids. Default: None (all devices)
+        :type device_ids: list
+        :return: devices ids
         :rtype: list
         """
+        all_device_ids = [device["device_id"] for device in self.devices]
+        if device_ids is None:
+            return all_device_ids
 
-        headers = self.basic_headers
-        headers["Authorization"] = f"Bearer {self.token}"
+        device_ids = set(device_ids)
 
-        self.events = list()
+        return [d for d in all_device_ids if d in device_ids]
+
+    def _apply_devices_events(
+        self, fetched_events, previous_events, incremental
+    ):
+        """
+        Set the events data from the fetched devices events, keeping the
+        events of the devices not fetched, and keep their new events. The
+        new events are saved in the cache by the caller.
+
+        :param fetched_events: devices events fetched by device id
+        :type fetched_events: dict
+        :param previous_events: events known before the fetch by device id,
+            see ``_index_events``
+        :type previous_events: dict
+        :param incremental: the fetched events are newer than the known
+            events and are merged
+        :type incremental: bool
+        :return: None
+        """
+        devices_events = list()
+        new_events = dict()
         for device in self.devices:
             device_id = device["device_id"]
-            device_events = {"device_id": device_id, "events": list()}
-            pages = 1
-            events_pages = 1
-            while pages <= events_pages:
-                url_events = (
-                    f"{self.region_url.URL}/user/device/event?"
-                    + f"deviceId={device_id}&"
-                    + f"page={pages}"
-                )
+            known_events = previous_events.get(device_id)
+            device_events = fetched_events.get(device_id)
+            if device_events is None:
+                if known_events is None:
+                    known_events = DeviceEvents(device_id)
 
-                events_response = self._http_request(
-                    "GET", url_events, headers=headers
+                devices_events.append(known_events)
+
+            elif incremental and known_events is not None:
+                new_events[device_id] = known_events.merge(
+                    device_events.events
                 )
+                devices_events.append(known_events)
 
-                if self.is_connected is False:
-                    self.connect()
-                    break
+            else:
+                new_events[device_id] = [
+                    event
+                    for event in device_events.events
+                    if known_events is None or event not in known_events
+                ]
+                devices_events.append(device_events)
 
-                events_pages = events_response["data"]["total_pages"]
-                if events_response["data"]["total_events"] == 0:
-                    continue
+        self._set_events(devices_events)
+        self._new_events = new_events
+
+    def _index_events(self):
+        """
+        Get the devices events indexed by device id
 
-                events = events_response["data"]["events"]
-                for event in events:
-                    if event not in device_events["events"]:
-                        device_events["events"].append(event)
+        The index is built again if ``events`` was replaced.
 
-                pages += 1
+        :return: devices events by device id
+        :rtype: dict of ``DeviceEvents``
+        """
+        if self._indexed_events is not self.events:
+            self._events_index = {
+                d["device_id"]: DeviceEvents(d["device_id"], d["events"])
+                for d in self.events
+            }
+            self._indexed_events = self.events
 
-            self.events.append(device_events)
+        return self._events_index
 
-        return self.events
+    def _load_cache(self):
+        """
+        Load the devices and events from the cache, if no events are known
 
-    def connect(self):
+        :return: True if devices were loaded from the cache
+        :rtype: bool
         """
-        Connect to Kodak Smart Home Portal and get all information needed.
+        if self.cache is None or self.events:
+            return False
+
+        devices = self.cache.load_devices(self.account)
+        if not devices:
+            return False
+
+        self.devices = load_devices(devices, self.model)
+        self._set_events(
+            [
+                DeviceEvents(
+                    device["device_id"],
+                    load_events(
+                        self.cache.load_events(
+                            self.account, device["device_id"]
+                        ),
+                        self.model,
+                    ),
+                )
+                for device in self.devices
+            ]
+        )
+
+        return True
+
+    def _save_devices_cache(self):
+        """
+        Save the devices in the cache, if it is enabled
 
         :return: None
-        :exception: ``ConnectionError``
         """
-        try:
-            self._options()
-            self._token()
-            self._authentication()
-            self._get_devices()
-            self._get_events()
+        if self.cache is not None and isinstance(self.devices, list):
+            self.cache.save_devices(self.account, self.devices)
 
-        except requests.exceptions.ConnectionError as err:
-            raise ConnectionError(str(err))
+    def _save_events_cache(self):
+        """
+        Save the new events from the last fetch in the cache, if it is
+        enabled
 
-    def update(self):
+        :return: None
         """
-        Update the device list and events data
+        if self.cache is None:
+            return
 
-        :return: True
-        :rtype: bool
-        :exception: ``ConnectionError``
+        for device_id, events in self._new_events.items():
+            if events:
+                self.cache.save_events(self.account, device_id, events)
+
+    def _lazy_load(self, events=True):
         """
-        self._get_devices()
-        self._get_events()
+        Load the devices and events not loaded by ``connect(load="lazy")``
 
-    def disconnect(self):
+        Only ``KodakSmartHome`` loads them on access, as the getters can not
+        await ``AsyncKodakSmartHome`` requests.
+
+        :param events: load the events too. Default: True
+        :type events: bool
+        :return: None
         """
-        Disconnect from Kodak Smart Portal
 
+    def on_event(self, event_type, callback):
+        """
+        Register a callback for the new events found by ``update``
+
+        The callback is called with the device id and the device new events
+        of the event type, for each device with new events.
+
+        :param event_type: Possible events ``kodaksmarthome.constants``:
+            DEVICE_EVENT_MOTION, DEVICE_EVENT_SOUND, DEVICE_EVENT_BATTERY or
+            None for all the events
+        :type event_type: int
+        :param callback: callable with ``device_id`` and ``events``
+            arguments, ``AsyncKodakSmartHome`` awaits coroutine functions
+        :type callback: callable
         :return: None
-        :exception: ``ConnectionError``
         """
-        self._http_request("GET", self.region_url.URL_LOGOUT)
-        self.http_session.close()
-        self.is_connected = False
+        self._event_callbacks.append((event_type, callback))
+
+    def on_device_change(self, callback):
+        """
+        Register a callback for the device list changes found by ``update``
+        and ``update_devices``
+
+        The callback is called with the added, changed and removed devices,
+        only if there is any change.
+
+        :param callback: callable with ``added``, ``changed`` and ``removed``
+            arguments, ``AsyncKodakSmartHome`` awaits coroutine functions
+        :type callback: callable
+        :return: None
+        """
+        self._device_callbacks.append(callback)
+
+    def _event_notifications(self):
+        """
+        Callbacks calls for the new events of the last events fetch
+
+        :return: callback and its arguments
+        :rtype: iterator
+        """
+        if not self._event_callbacks:
+            return
+
+        for device_id, events in self._new_events.items():
+            for event_type, callback in self._event_callbacks:
+                type_events = [
+                    event
+                    for event in events
+                    if event_type is None or event["event_type"] == event_type
+                ]
+                if type_events:
+                    yield callback, (device_id, type_events)
+
+    def _device_notifications(self, previous_devices):
+        """
+        Callbacks calls for the device list changes, by device id
+
+        :param previous_devices: devices before the device list fetch
+        :type previous_devices: list
+        :return: callback and its arguments
+        :rtype: iterator
+        """
+        if not self._device_callbacks:
+            return
+
+        previous = {device["device_id"]: device for device in previous_devices}
+        current = {device["device_id"]: device for device in self.devices}
+        added = [current[d] for d in current.keys() - previous.keys()]
+        removed = [previous[d] for d in previous.keys() - current.keys()]
+        changed = [
+            device
+            for device_id, device in current.items()
+            if device_id in previous and previous[device_id] != device
+        ]
+        if added or changed or removed:
+            for callback in self._device_callbacks:
+                yield callback, (added, changed, removed)
 
     @property
     def get_devices(self):
@@ -356,6 +777,8 @@ class KodakSmartHome:
         :rtype: list
         """
         if self.is_connected:
+            self._lazy_load(events=False)
+
             return self.devices
 
         else:
@@ -373,6 +796,8 @@ class KodakSmartHome:
         :rtype: list
         """
         if self.is_connected:
+            self._lazy_load()
+
             return self.events
 
         else:
@@ -380,68 +805,172 @@ class KodakSmartHome:
                 f"Kodak Smarthome API is {self.is_connected}"
             )
 
-    def get_events_device(self, device_id=None):
+    def get_event_columns(self):
         """
-        Get all device events
+        Get all devices events in a columnar layout for bulk analytics, e.g.
+        ``get_event_columns().count_by_hour(DEVICE_EVENT_MOTION)``.
+
+        The columns are built again when the events are updated.
+
+        :return: events columns
+        :exception: ``ConnectionError``
+        :rtype: ``kodaksmarthome.columns.EventColumns``
+        """
+        if self.is_connected:
+            self._lazy_load()
+            if self._columns_events is not self.events:
+                events_index = self._index_events()
+                self._event_columns = EventColumns.from_devices_events(
+                    [events_index[d["device_id"]] for d in self.events]
+                )
+                self._columns_events = self.events
+
+            return self._event_columns
+
+        else:
+            raise ConnectionError(
+                f"Kodak Smarthome API is {self.is_connected}"
+            )
+
+    def get_events_device(
+        self,
+        device_id=None,
+        since=None,
+        until=None,
+        limit=None,
+        newest_first=False,
+    ):
+        """
+        Get all device events sorted by creation date
+
+        The dates range and limit use binary search over the device events
+        sorted by creation date. Without ``device_id``, they apply to each
+        device events.
 
         :param device_id: device id available in the device information
-            ``KodakSmartHome.get_devices``
+            ``KodakSmartHome.get_devices``. Default: None (all devices
+            events)
         :type device_id: str
-        :return: list events
+        :param since: events created since this date (inclusive)
+        :type since: ``datetime``, str or number (epoch milliseconds)
+        :param until: events created until this date (inclusive)
+        :type until: ``datetime``, str or number (epoch milliseconds)
+        :param limit: maximum of events, the newest ones
+        :type limit: int
+        :param newest_first: newest events first. Default: False
+        :type newest_first: bool
+        :return: list events or, without ``device_id``, the devices events
+            as ``dict`` with ``device_id`` and ``events``
         :rtype: list
         """
+        self._lazy_load()
         if device_id is None:
-            return self.events
+            filters = (since, until, limit, newest_first)
+            if filters == (None, None, None, False):
+                return self.events
+
+            events_index = self._index_events()
+
+            return [
+                {
+                    "device_id": device["device_id"],
+                    "events": events_index[device["device_id"]].get(
+                        since=since,
+                        until=until,
+                        limit=limit,
+                        newest_first=newest_first,
+                    ),
+                }
+                for device in self.events
+            ]
 
         else:
             if device_id in [d["device_id"] for d in self.devices]:
-                device_events = list(
-                    filter(lambda d: d["device_id"] == device_id, self.events)
+                device_events = self._index_events().get(
+                    device_id, DeviceEvents(device_id)
                 )
 
-                events = device_events[0]["events"]
-                return sorted(events, key=lambda e: e["created_date"])
+                return device_events.get(
+                    since=since,
+                    until=until,
+                    limit=limit,
+                    newest_first=newest_first,
+                )
 
             else:
 
                 return None
 
     def _filter_event_type(
-        self, device_id=None, event_type=DEVICE_EVENT_MOTION
+        self,
+        device_id=None,
+        event_type=DEVICE_EVENT_MOTION,
+        since=None,
+        until=None,
+        limit=None,
+        newest_first=False,
     ):
         """
-        Filter events from device by event type.
+        Filter events from device by event type, using the devices events
+        indexed by event type and sorted by creation date.
 
         :param device_id: device id available in the device information
             ``KodakSmartHome.get_devices``
         :param event_type: Possible events``kodaksmarthome.constants``:
             DEVICE_EVENT_MOTION, DEVICE_EVENT_SOUND, DEVICE_EVENT_BATTERY.
             Default: DEVICE_EVENT_MOTION
+        :param since: events created since this date (inclusive)
+        :type since: ``datetime``, str or number (epoch milliseconds)
+        :param until: events created until this date (inclusive)
+        :type until: ``datetime``, str or number (epoch milliseconds)
+        :param limit: maximum of events, the newest ones
+        :type limit: int
+        :param newest_first: newest events first. Default: False
+        :type newest_first: bool
         :return: events type from specified device
         :rtype: list
         """
         if self.is_connected:
-            device_events = self.get_events_device(device_id=device_id)
-
-            if device_events is None:
-                return None
+            self._lazy_load()
+            events_index = self._index_events()
 
             if device_id is None:
-                motion_events = list()
-                for device in device_events:
-                    motion_events += list(
-                        filter(
-                            lambda e: e["event_type"] == event_type,
-                            device["events"],
-                        )
-                    )
-
-            else:
+                # merge the devices events newest first to apply the limit
                 motion_events = list(
-                    filter(
-                        lambda e: e["event_type"] == event_type, device_events
+                    itertools.islice(
+                        heapq.merge(
+                            *[
+                                events_index[device["device_id"]].get(
+                                    event_type,
+                                    since=since,
+                                    until=until,
+                                    limit=limit,
+                                    newest_first=True,
+                                )
+                                for device in self.events
+                            ],
+                            key=created_timestamp,
+                            reverse=True,
+                        ),
+                        limit,
                     )
                 )
+                if not newest_first:
+                    motion_events.reverse()
+
+            elif device_id in [d["device_id"] for d in self.devices]:
+                motion_events = events_index.get(
+                    device_id, DeviceEvents(device_id)
+                ).get(
+                    event_type,
+                    since=since,
+                    until=until,
+                    limit=limit,
+                    newest_first=newest_first,
+                )
+
+            else:
+                return None
 
             return motion_events
 
@@ -450,77 +979,973 @@ class KodakSmartHome:
                 f"Kodak Smarthome API is {self.is_connected}"
             )
 
-    def get_motion_events(self, device_id=None):
+    def get_motion_events(
+        self,
+        device_id=None,
+        since=None,
+        until=None,
+        limit=None,
+        newest_first=False,
+    ):
         """
         List all motion devices events from specific device sorted by
         creation date.
 
+        :param since: events created since this date (inclusive)
+        :type since: ``datetime``, str or number (epoch milliseconds)
+        :param until: events created until this date (inclusive)
+        :type until: ``datetime``, str or number (epoch milliseconds)
+        :param limit: maximum of events, the newest ones
+        :type limit: int
+        :param newest_first: newest events first. Default: False
+        :type newest_first: bool
         :return: list of motion devices events
         :exception: ``ConnectionError``
         :rtype: list
         """
         if self.is_connected:
             events = self._filter_event_type(
-                device_id=device_id, event_type=DEVICE_EVENT_MOTION
+                device_id=device_id,
+                event_type=DEVICE_EVENT_MOTION,
+                since=since,
+                until=until,
+                limit=limit,
+                newest_first=newest_first,
             )
 
             if events is None:
 
                 return list()
 
-            return sorted(events, key=lambda e: e["created_date"])
+            return events
 
         else:
             raise ConnectionError(
                 f"Kodak Smarthome API is {self.is_connected}"
             )
 
-    def get_battery_events(self, device_id=None):
+    def get_battery_events(
+        self,
+        device_id=None,
+        since=None,
+        until=None,
+        limit=None,
+        newest_first=False,
+    ):
         """
         List all battery devices events from specific device, sorted by
         creation date.
 
+        :param since: events created since this date (inclusive)
+        :type since: ``datetime``, str or number (epoch milliseconds)
+        :param until: events created until this date (inclusive)
+        :type until: ``datetime``, str or number (epoch milliseconds)
+        :param limit: maximum of events, the newest ones
+        :type limit: int
+        :param newest_first: newest events first. Default: False
+        :type newest_first: bool
         :return: list of battery devices events
         :exception: ``ConnectionError``
         :rtype: list
         """
         if self.is_connected:
             events = self._filter_event_type(
-                device_id=device_id, event_type=DEVICE_EVENT_BATTERY
+                device_id=device_id,
+                event_type=DEVICE_EVENT_BATTERY,
+                since=since,
+                until=until,
+                limit=limit,
+                newest_first=newest_first,
             )
 
             if events is None:
 
                 return list()
 
-            return sorted(events, key=lambda e: e["created_date"])
+            return events
 
         else:
             raise ConnectionError(
                 f"Kodak Smarthome API is {self.is_connected}"
             )
 
-    def get_sound_events(self, device_id=None):
+    def get_sound_events(
+        self,
+        device_id=None,
+        since=None,
+        until=None,
+        limit=None,
+        newest_first=False,
+    ):
         """
         List all sound devices events from specific device sorted by
         creation date.
 
+        :param since: events created since this date (inclusive)
+        :type since: ``datetime``, str or number (epoch milliseconds)
+        :param until: events created until this date (inclusive)
+        :type until: ``datetime``, str or number (epoch milliseconds)
+        :param limit: maximum of events, the newest ones
+        :type limit: int
+        :param newest_first: newest events first. Default: False
+        :type newest_first: bool
         :return: list of sound devices events
         :exception: ``ConnectionError``
         :rtype: list
         """
         if self.is_connected:
             events = self._filter_event_type(
-                device_id=device_id, event_type=DEVICE_EVENT_SOUND
+                device_id=device_id,
+                event_type=DEVICE_EVENT_SOUND,
+                since=since,
+                until=until,
+                limit=limit,
+                newest_first=newest_first,
             )
 
             if events is None:
 
                 return list()
 
-            return sorted(events, key=lambda e: e["created_date"])
+            return events
 
         else:
             raise ConnectionError(
                 f"Kodak Smarthome API is {self.is_connected}"
             )
+
+
+class KodakSmartHome(_BaseKodakSmartHome):
+    """Kodak Smart Home API session.
+
+    Provides connection to Kodak Smart Home portal.
+
+    :param username: username registered in Kodak Smart Home Portal
+    :type username: str
+    :param password: password registered in Kodak Smart Home Portal
+    :type password: str
+    :param region: Global Region Portal. Options: 'EU'. Default: 'EU'
+    :type region: str
+    :param max_workers: number of devices to fetch events concurrently
+        using the ``http_session`` connection pool.
+        Default: None (one device at a time)
+    :type max_workers: int
+    :param max_page_workers: number of events pages to fetch concurrently
+        from a device once the total of pages is known.
+        Default: None (one page at a time)
+    :type max_page_workers: int
+    :param model: events and devices model. Options: 'dict' (portal
+        payload) or 'compact' (``kodaksmarthome.models`` objects with
+        ``__slots__``, compatible with ``dict``). Default: 'dict'
+    :type model: str
+    :param cache_path: SQLite database path to cache the devices and events
+        between sessions. ``connect`` loads them from the cache and fetches
+        only the newer events. Default: None (no cache)
+    :type cache_path: str
+    :param token_store: store of the portal credentials, reused or refreshed
+        by ``connect`` instead of a full login, e.g.
+        ``kodaksmarthome.tokens.FileTokenStore``. Default: None
+    :type token_store: ``kodaksmarthome.tokens.FileTokenStore`` or
+        ``kodaksmarthome.tokens.MemoryTokenStore``
+    :param retry_policy: retry policy of the portal requests.
+        Default: None (no retries)
+    :type retry_policy: ``kodaksmarthome.retry.RetryPolicy``
+    :param circuit_breaker: circuit breaker of the portal endpoints, it can
+        be shared by several sessions. Default: None
+    :type circuit_breaker: ``kodaksmarthome.retry.CircuitBreaker``
+    :param rate_limiter: rate limiter of the portal requests by host, it can
+        be shared by several sessions. Default: None (no limit)
+    :type rate_limiter: ``kodaksmarthome.ratelimit.RateLimiter``
+    :param http_session: HTTP session used instead of a new one. It is not
+        closed by ``disconnect``. The session keeps the portal cookie, so
+        it must not be shared by different accounts. Default: None
+    :type http_session: ``requests.Session``
+    :param http_adapter: HTTP adapter mounted in the session, it can be
+        shared by several sessions to share its connection pool. It is not
+        closed by ``disconnect``. Default: None
+    :type http_adapter: ``requests.adapters.HTTPAdapter``
+    :param pool_connections: number of hosts kept in the connection pool,
+        not supported with ``http_session`` or ``http_adapter``.
+        Default: None (``requests`` default)
+    :type pool_connections: int
+    :param pool_maxsize: connections kept by host, not supported with
+        ``http_session`` or ``http_adapter``. Default: None (``requests``
+        default or, if greater, ``max_workers`` times ``max_page_workers``)
+    :type pool_maxsize: int
+    :param timeout: requests timeout in seconds, or a (connect, read)
+        tuple. Default: None (no timeout)
+    :type timeout: float or tuple
+    """
+
+    def __init__(
+        self,
+        username,
+        password,
+        region="EU",
+        max_workers=None,
+        max_page_workers=None,
+        model=MODEL_DICT,
+        cache_path=None,
+        token_store=None,
+        retry_policy=None,
+        circuit_breaker=None,
+        rate_limiter=None,
+        http_session=None,
+        http_adapter=None,
+        pool_connections=None,
+        pool_maxsize=None,
+        timeout=None,
+    ):
+
+        if (pool_connections or pool_maxsize) and (
+            http_session is not None or http_adapter is not None
+        ):
+            raise AttributeError(
+                "pool_connections and pool_maxsize are not supported with "
+                "http_session or http_adapter"
+            )
+
+        self.timeout = timeout
+        self._own_http_session = http_session is None
+        self._shared_http_adapter = http_adapter
+        if http_session is None:
+            http_session = requests.Session()
+
+        concurrency = (max_workers or 1) * (max_page_workers or 1)
+        if (
+            http_adapter is None
+            and self._own_http_session
+            and (
+                pool_connections
+                or pool_maxsize
+                or concurrency > DEFAULT_POOLSIZE
+            )
+        ):
+            http_adapter = HTTPAdapter(
+                pool_connections=(
+                    pool_connections or DEFAULT_POOLSIZE
+                ),
+                pool_maxsize=(
+                    pool_maxsize
+                    or max(concurrency, DEFAULT_POOLSIZE)
+                ),
+            )
+
+        if http_adapter is not None:
+            http_session.mount("https://", http_adapter)
+            http_session.mount("http://", http_adapter)
+
+        self.http_session = http_session
+        self._token_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        super().__init__(
+            username,
+            password,
+            region=region,
+            max_workers=max_workers,
+            max_page_workers=max_page_workers,
+            model=model,
+            cache_path=cache_path,
+            token_store=token_store,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            rate_limiter=rate_limiter,
+        )
+
+    def _http_request(self, method, url, headers=None, data=None, params=None):
+
+        endpoint = request_endpoint(url)
+        attempt = 0
+        while True:
+            self._before_request(endpoint)
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(request_host(url))
+
+                if method == "POST":
+                    http_response = self.http_session.post(
+                        url,
+                        headers=headers,
+                        data=data,
+                        params=params,
+                        timeout=self.timeout,
+                    )
+
+                elif method == "OPTIONS":
+                    http_response = self.http_session.options(
+                        url,
+                        headers=headers,
+                        data=data,
+                        params=params,
+                        timeout=self.timeout,
+                    )
+
+                elif method == "GET":
+                    http_response = self.http_session.get(
+                        url,
+                        headers=headers,
+                        data=data,
+                        params=params,
+                        timeout=self.timeout,
+                    )
+
+                else:
+                    raise AttributeError(f"Invalid Method {method}")
+
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as err:
+                delay = self._request_failed(endpoint, attempt)
+                if delay is None:
+                    raise ConnectionError(str(err))
+
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            except BaseException:
+                self._request_aborted(endpoint)
+                raise
+
+            if not self._failed_status(http_response.status_code):
+                self._request_succeeded(endpoint)
+                break
+
+            delay = self._request_failed(
+                endpoint, attempt, response_headers=http_response.headers
+            )
+            if delay is None:
+                break
+
+            time.sleep(delay)
+            attempt += 1
+
+        content_type = None
+        response_json = None
+
+        if "Content-Type" in http_response.headers:
+            content_type = http_response.headers["Content-Type"]
+
+        if content_type and "application/json" in content_type:
+            response_json = http_response.json()
+
+        return self._handle_response(
+            method,
+            http_response.status_code,
+            content_type,
+            response_json,
+            http_response.text,
+        )
+
+    def _options(self):
+        """
+        Verify the connection with Kodak Smart Home portal
+
+        :return: boolean result
+        :rtype: bool
+        """
+        options_response = self._http_request(
+            "OPTIONS", self.region_url.URL_TOKEN, headers=self.basic_headers
+        )
+
+        return options_response
+
+    def _token(self):
+        """
+        Get Kodak Smart Home Portal Token
+
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        token_response = self._http_request(
+            "POST",
+            self.region_url.URL_TOKEN,
+            headers=HTTP_HEADERS_AUTH,
+            data=self._token_payload(),
+        )
+
+        return self._set_token(token_response)
+
+    def _refresh_token(self):
+        """
+        Renew the Kodak Smart Home Portal Token using the refresh token
+
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        token_response = self._http_request(
+            "POST",
+            self.region_url.URL_TOKEN,
+            headers=HTTP_HEADERS_AUTH,
+            data=self._refresh_token_payload(),
+        )
+
+        return self._set_token(token_response)
+
+    def _authentication(self):
+        """
+        Perform authentication to Kodak Smart Home Portal
+
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        """
+        auth_response = self._http_request(
+            "POST",
+            self.region_url.URL_AUTH,
+            headers=HTTP_HEADERS_AUTH,
+            data=self._auth_payload(),
+        )
+
+        self.cookie = self.http_session.cookies["JSESSIONID"]
+        self.user_id = auth_response["data"]["id"]
+
+        return True
+
+    def _set_cookie(self):
+        """
+        Restore the portal session cookie from ``cookie``
+
+        :return: None
+        """
+        self.http_session.cookies.set(
+            "JSESSIONID",
+            self.cookie,
+            domain=urlsplit(self.region_url.URL_AUTH).hostname,
+        )
+
+    def _get_devices(self):
+        """
+        Get all devices available in Kodak Smart Home Portal
+
+        :return: all devices
+        :rtype: list
+        """
+
+        self._ensure_token()
+        devices_response = self._http_request(
+            "GET",
+            self.region_url.URL_DEVICES,
+            headers=self._bearer_headers(),
+        )
+
+        if self.is_connected is False:
+            self._relogin()
+            devices_response = self._http_request(
+                "GET",
+                self.region_url.URL_DEVICES,
+                headers=self._bearer_headers(),
+            )
+            if self._session_lost(devices_response):
+                raise ConnectionError("Kodak Smarthome session lost")
+
+        self.devices = load_devices(devices_response["data"], self.model)
+        self._save_devices_cache()
+
+        return self.devices
+
+    def _get_device_events(self, device_id, headers, known_events=None):
+        """
+        Get all events from a device in Kodak Smart Home Portal
+
+        It stops if the portal session is lost in one of its requests.
+        If the ``known_events`` are given, only events newer than its
+        high-water mark are fetched, stopping at the first page with known
+        events.
+
+        :param device_id: device id
+        :type device_id: str
+        :param headers: HTTP headers with the portal token authorization
+        :type headers: dict
+        :param known_events: events already known from the device
+        :type known_events: ``DeviceEvents``
+        :return: device events or None if the portal session was lost
+            before all its events were fetched
+        :rtype: ``DeviceEvents``
+        """
+        device_events = DeviceEvents(device_id)
+        pages = 1
+        events_pages = 1
+        while pages <= events_pages:
+            events_response = self._http_request(
+                "GET", self._events_url(device_id, pages), headers=headers
+            )
+
+            if self._session_lost(events_response):
+                return None
+
+            events_pages = events_response["data"]["total_pages"]
+            if events_response["data"]["total_events"] == 0:
+                continue
+
+            events = load_events(events_response["data"]["events"], self.model)
+            page_events = len(events)
+            if known_events is not None:
+                events = [e for e in events if known_events.is_new(e)]
+
+            device_events.add(events)
+            # the pages are newest first, the pages after a page with known
+            # events are known
+            if len(events) < page_events:
+                break
+
+            pages += 1
+
+            if (
+                known_events is None
+                and self.max_page_workers
+                and self.max_page_workers > 1
+                and pages <= events_pages
+            ):
+                events_responses = self._get_events_pages(
+                    device_id, headers, range(pages, events_pages + 1)
+                )
+                if events_responses is None:
+                    return None
+
+                for events_response in events_responses:
+                    if self._session_lost(events_response):
+                        return None
+
+                    device_events.add(
+                        load_events(
+                            events_response["data"]["events"], self.model
+                        )
+                    )
+
+                break
+
+        return device_events
+
+    def _get_events_pages(self, device_id, headers, pages):
+        """
+        Get device events pages concurrently, limited by
+        ``max_page_workers``.
+
+        :param device_id: device id
+        :type device_id: str
+        :param headers: HTTP headers with the portal token authorization
+        :type headers: dict
+        :param pages: events pages numbers
+        :type pages: range
+        :return: events pages responses in the pages order or None if
+            a concurrent request lost the portal session
+        :rtype: list
+        """
+        with ThreadPoolExecutor(
+            max_workers=self.max_page_workers
+        ) as executor:
+            try:
+                return list(
+                    executor.map(
+                        lambda page: self._http_request(
+                            "GET",
+                            self._events_url(device_id, page),
+                            headers=headers,
+                        ),
+                        pages,
+                    )
+                )
+
+            except ConnectionError:
+                # a concurrent request already lost the portal session
+                if self.is_connected:
+                    raise
+
+                return None
+
+    def _get_events(self, incremental=False, device_ids=None):
+        """
+        Get all event for all available devices in Kodak Smart Home Portal
+
+        The devices are fetched concurrently when ``max_workers`` is greater
+        than 1. If the portal session is lost, it logs in again and fetches
+        the devices left, and the events data is set only once all the
+        devices are fetched.
+
+        :param incremental: fetch only the events newer than the events
+            already known and merge them. Default: False
+        :type incremental: bool
+        :param device_ids: devices ids to fetch, the other devices keep
+            their events. Default: None (all devices)
+        :type device_ids: list
+        :return: all events
+        :rtype: list
+        :exception: ``ConnectionError``
+        """
+
+        self._ensure_token()
+        previous_events = self._index_events()
+        device_ids = self._select_devices(device_ids)
+        fetched_events = dict()
+        relogged = False
+        while True:
+            fetched_events.update(
+                self._fetch_devices_events(
+                    [d for d in device_ids if d not in fetched_events],
+                    self._bearer_headers(),
+                    previous_events if incremental else dict(),
+                )
+            )
+            if len(fetched_events) == len(device_ids):
+                break
+
+            if relogged:
+                raise ConnectionError("Kodak Smarthome session lost")
+
+            # fetch the devices left, keeping the devices already fetched
+            # for the new events
+            self._relogin()
+            relogged = True
+
+        self._apply_devices_events(
+            fetched_events, previous_events, incremental
+        )
+        self._save_events_cache()
+
+        return self.events
+
+    def _fetch_devices_events(self, device_ids, headers, known_events):
+        """
+        Fetch the devices events, concurrently when ``max_workers`` is
+        greater than 1
+
+        The devices not fetched completely because the portal session was
+        lost are left out.
+
+        :param device_ids: devices ids
+        :type device_ids: list
+        :param headers: HTTP headers with the portal token authorization
+        :type headers: dict
+        :param known_events: known events by device id, only the newer
+            events are fetched
+        :type known_events: dict
+        :return: devices events fetched by device id
+        :rtype: dict
+        """
+        fetched_events = dict()
+        if self.max_workers and self.max_workers > 1 and len(device_ids) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    device_id: executor.submit(
+                        self._get_device_events,
+                        device_id,
+                        headers,
+                        known_events=known_events.get(device_id),
+                    )
+                    for device_id in device_ids
+                }
+                for device_id, future in futures.items():
+                    try:
+                        device_events = future.result()
+
+                    except ConnectionError:
+                        # a concurrent request already lost the portal
+                        # session
+                        if self.is_connected:
+                            raise
+
+                        continue
+
+                    if device_events is not None:
+                        fetched_events[device_id] = device_events
+
+        else:
+            for device_id in device_ids:
+                device_events = self._get_device_events(
+                    device_id,
+                    headers,
+                    known_events=known_events.get(device_id),
+                )
+                if device_events is None:
+                    break
+
+                fetched_events[device_id] = device_events
+
+        return fetched_events
+
+    def _renew_token(self):
+        """
+        Renew the portal token without loading the devices and events again
+
+        The token is refreshed with the refresh token or, if it fails, with a
+        new password grant and authentication.
+
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        try:
+            self._refresh_token()
+
+        except ConnectionError:
+            self._token()
+            self._authentication()
+
+        self._save_token()
+
+        return True
+
+    def _ensure_token(self):
+        """
+        Renew the portal token if it expires within ``TOKEN_RENEWAL_MARGIN``
+
+        Concurrent callers share a single renewal.
+
+        :return: True if the token was renewed
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        if not self._token_renewal_due():
+            return False
+
+        with self._token_lock:
+            # a concurrent caller may have renewed it while waiting
+            if not self._token_renewal_due():
+                return False
+
+            self._renew_token()
+
+        return True
+
+    def _login(self, preflight=True):
+        """
+        Log in Kodak Smart Home Portal
+
+        The credentials from the token store are reused, or refreshed if the
+        token is expired, before falling back to a full login.
+
+        :param preflight: verify the connection with an OPTIONS request
+            before the full login. Default: True
+        :type preflight: bool
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        if self._load_token():
+            if self._token_expired(margin=TOKEN_RENEWAL_MARGIN):
+                try:
+                    self._refresh_token()
+
+                except ConnectionError:
+                    self._discard_token()
+
+                    return self._login(preflight=preflight)
+
+                self._save_token()
+
+            self._set_cookie()
+            self.is_connected = True
+
+            return True
+
+        if preflight:
+            self._options()
+
+        self._token()
+        self._authentication()
+        self._save_token()
+
+        return True
+
+    def _lazy_load(self, events=True):
+        """
+        Load the devices and events not loaded by ``connect(load="lazy")``
+
+        :param events: load the events too. Default: True
+        :type events: bool
+        :return: None
+        :exception: ``ConnectionError``
+        """
+        if not (self._lazy_devices or (events and self._lazy_events)):
+            return
+
+        with self._load_lock:
+            if self._lazy_devices:
+                self._get_devices()
+                self._lazy_devices = False
+
+            if events and self._lazy_events:
+                self._get_events(incremental=self._lazy_incremental)
+                self._lazy_events = False
+
+    def _relogin(self):
+        """
+        Log in again once the portal session is lost, discarding the stored
+        credentials and keeping the devices and events data
+
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        self._discard_token()
+
+        return self._login()
+
+    def iter_events(self, device_id=None, event_type=None):
+        """
+        Iterate the devices events page by page, as they are received from
+        the portal (newest first)
+
+        The events are not kept in ``events``, so the memory used does not
+        grow with the events history and the iteration can stop early.
+
+        :param device_id: device id available in the device information
+            ``KodakSmartHome.get_devices``. Default: None (all devices)
+        :type device_id: str
+        :param event_type: event type, e.g. ``DEVICE_EVENT_MOTION``.
+            Default: None (all events)
+        :type event_type: int
+        :return: events generator
+        :exception: ``ConnectionError``
+        """
+        self._lazy_load(events=False)
+        if device_id is None:
+            device_ids = [device["device_id"] for device in self.devices]
+
+        else:
+            device_ids = [device_id]
+
+        for device_id in device_ids:
+            page = 1
+            pages = 1
+            relogged = False
+            while page <= pages:
+                self._ensure_token()
+                events_response = self._http_request(
+                    "GET",
+                    self._events_url(device_id, page),
+                    headers=self._bearer_headers(),
+                )
+
+                if self._session_lost(events_response):
+                    if relogged:
+                        raise ConnectionError("Kodak Smarthome session lost")
+
+                    # log in again and retry the page, keeping the events
+                    # data as it is
+                    self._relogin()
+                    relogged = True
+                    continue
+
+                relogged = False
+                pages = events_response["data"]["total_pages"]
+                if events_response["data"]["total_events"] == 0:
+                    break
+
+                for event in load_events(
+                    events_response["data"]["events"], self.model
+                ):
+                    add_timestamps(event)
+                    if event_type is None or event["event_type"] == event_type:
+                        yield event
+
+                page += 1
+
+    def connect(self, load=LOAD_ALL, preflight=True):
+        """
+        Connect to Kodak Smart Home Portal and get all information needed.
+
+        If the cache is enabled, the devices and events are loaded from it
+        and only the newer events are fetched.
+
+        :param load: data loaded after the login. Options: 'all' (devices
+            and events), 'devices', 'none' or 'lazy' (devices and events
+            loaded on the first access by the getters). Default: 'all'
+        :type load: str
+        :param preflight: verify the connection with an OPTIONS request
+            before the login. Default: True
+        :type preflight: bool
+        :return: None
+        :exception: ``ConnectionError``, ``AttributeError``
+        """
+        if load not in LOADS:
+            raise AttributeError(f"{load} load is not supported")
+
+        try:
+            incremental = self._load_cache()
+            self._login(preflight=preflight)
+            self._lazy_devices = load == LOAD_LAZY
+            self._lazy_events = load == LOAD_LAZY
+            self._lazy_incremental = incremental
+            if load in [LOAD_ALL, LOAD_DEVICES]:
+                self._get_devices()
+
+            if load == LOAD_ALL:
+                self._get_events(incremental=incremental)
+
+        except requests.exceptions.ConnectionError as err:
+            raise ConnectionError(str(err))
+
+    def update(self, full=False, device_ids=None):
+        """
+        Update the device list and events data
+
+        Only the events newer than the newest known event of each device are
+        fetched and merged into the events data.
+
+        :param full: fetch all the events again. Default: False
+        :type full: bool
+        :param device_ids: update only the events of these devices, without
+            the device list. Default: None (device list and all devices)
+        :type device_ids: list
+        :return: True
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        if device_ids is not None:
+            self._lazy_load(events=False)
+            self._get_events(incremental=not full, device_ids=device_ids)
+
+        else:
+            self._lazy_events = False
+            self.update_devices()
+            self._get_events(incremental=not full)
+
+        for callback, args in self._event_notifications():
+            callback(*args)
+
+    def update_devices(self):
+        """
+        Update the device list, without the events
+
+        :return: all devices
+        :rtype: list
+        :exception: ``ConnectionError``
+        """
+        previous_devices = self.devices if not self._lazy_devices else list()
+        self._lazy_devices = False
+        devices = self._get_devices()
+        for callback, args in self._device_notifications(previous_devices):
+            callback(*args)
+
+        return devices
+
+    def disconnect(self):
+        """
+        Disconnect from Kodak Smart Portal and close the cache
+
+        :return: None
+        :exception: ``ConnectionError``
+        """
+        self._http_request("GET", self.region_url.URL_LOGOUT)
+        if self.cache is not None:
+            self.cache.close()
+
+        if self._own_http_session:
+            # a shared adapter keeps its connections for the other sessions
+            shared_adapters = {
+                prefix: adapter
+                for prefix, adapter in self.http_session.adapters.items()
+                if adapter is self._shared_http_adapter
+            }
+            for prefix in shared_adapters:
+                del self.http_session.adapters[prefix]
+
+            self.http_session.close()
+            for prefix, adapter in shared_adapters.items():
+                self.http_session.mount(prefix, adapter)
+
+        self.is_connected = False
@@ -0,0 +1,835 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import asyncio
+import inspect
+
+try:
+    import aiohttp
+    from yarl import URL
+
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from kodaksmarthome.api import _BaseKodakSmartHome
+from kodaksmarthome.constants import (
+    HTTP_HEADERS_AUTH,
+    LOAD_ALL,
+    LOAD_DEVICES,
+    LOAD_LAZY,
+    LOADS,
+    TOKEN_RENEWAL_MARGIN,
+)
+from kodaksmarthome.events import DeviceEvents, add_timestamps
+from kodaksmarthome.models import MODEL_DICT, load_devices, load_events
+from kodaksmarthome.ratelimit import request_host
+from kodaksmarthome.retry import request_endpoint
+
+
+class AsyncKodakSmartHome(_BaseKodakSmartHome):
+    """Kodak Smart Home API asyncio session.
+
+    Provides connection to Kodak Smart Home portal using ``aiohttp``. It has
+    the same interface of ``KodakSmartHome``, but the methods that access the
+    portal (``connect``, ``update`` and ``disconnect``) are coroutines.
+
+    Requires ``aiohttp``: ``pip install python-kodaksmarthome[async]``
+
+    :param username: username registered in Kodak Smart Home Portal
+    :type username: str
+    :param password: password registered in Kodak Smart Home Portal
+    :type password: str
+    :param region: Global Region Portal. Options: 'EU'. Default: 'EU'
+    :type region: str
+    :param max_workers: number of devices to fetch events concurrently.
+        Default: None (one device at a time)
+    :type max_workers: int
+    :param max_page_workers: number of events pages to fetch concurrently
+        from a device once the total of pages is known.
+        Default: None (one page at a time)
+    :type max_page_workers: int
+    :param model: events and devices model. Options: 'dict' (portal
+        payload) or 'compact' (``kodaksmarthome.models`` objects with
+        ``__slots__``, compatible with ``dict``). Default: 'dict'
+    :type model: str
+    :param cache_path: SQLite database path to cache the devices and events
+        between sessions. ``connect`` loads them from the cache and fetches
+        only the newer events. Default: None (no cache)
+    :type cache_path: str
+    :param token_store: store of the portal credentials, reused or refreshed
+        by ``connect`` instead of a full login, e.g.
+        ``kodaksmarthome.tokens.FileTokenStore``. Default: None
+    :type token_store: ``kodaksmarthome.tokens.FileTokenStore`` or
+        ``kodaksmarthome.tokens.MemoryTokenStore``
+    :param retry_policy: retry policy of the portal requests.
+        Default: None (no retries)
+    :type retry_policy: ``kodaksmarthome.retry.RetryPolicy``
+    :param circuit_breaker: circuit breaker of the portal endpoints, it can
+        be shared by several sessions. Default: None
+    :type circuit_breaker: ``kodaksmarthome.retry.CircuitBreaker``
+    :param rate_limiter: rate limiter of the portal requests by host, it can
+        be shared by several sessions. Default: None (no limit)
+    :type rate_limiter: ``kodaksmarthome.ratelimit.RateLimiter``
+    :param http_session: HTTP session used instead of a new one. It is not
+        closed by ``disconnect``. The session keeps the portal cookie, so
+        it must not be shared by different accounts. Default: None
+    :type http_session: ``aiohttp.ClientSession``
+    :param connector: HTTP connector of the session, it can be shared by
+        several sessions to share its connection pool. It is not closed by
+        ``disconnect``. Default: None
+    :type connector: ``aiohttp.TCPConnector``
+    :param pool_maxsize: connections by host. Default: None (no limit)
+    :type pool_maxsize: int
+    :param timeout: requests timeout in seconds, or a (connect, read)
+        tuple. Default: None (``aiohttp`` default)
+    :type timeout: float or tuple
+    """
+
+    def __init__(
+        self,
+        username,
+        password,
+        region="EU",
+        max_workers=None,
+        max_page_workers=None,
+        model=MODEL_DICT,
+        cache_path=None,
+        token_store=None,
+        retry_policy=None,
+        circuit_breaker=None,
+        rate_limiter=None,
+        http_session=None,
+        connector=None,
+        pool_maxsize=None,
+        timeout=None,
+    ):
+
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncKodakSmartHome requires aiohttp. "
+                + "Use: pip install python-kodaksmarthome[async]"
+            )
+
+        # the aiohttp.ClientSession is created inside the running event loop
+        self.http_session = http_session
+        self._own_http_session = http_session is None
+        self.connector = connector
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self._token_lock = None
+        super().__init__(
+            username,
+            password,
+            region=region,
+            max_workers=max_workers,
+            max_page_workers=max_page_workers,
+            model=model,
+            cache_path=cache_path,
+            token_store=token_store,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            rate_limiter=rate_limiter,
+        )
+
+    def _get_http_session(self):
+        """
+        Get the aiohttp session, create it if needed.
+
+        :return: HTTP session
+        :rtype: ``aiohttp.ClientSession``
+        """
+        if not self._own_http_session:
+            return self.http_session
+
+        if self.http_session is None or self.http_session.closed:
+            connector = self.connector
+            if connector is None and self.pool_maxsize:
+                connector = aiohttp.TCPConnector(
+                    limit_per_host=self.pool_maxsize
+                )
+
+            session_options = dict()
+            if self.timeout is not None:
+                connect_timeout, read_timeout = (
+                    self.timeout
+                    if isinstance(self.timeout, tuple)
+                    else (self.timeout, self.timeout)
+                )
+                session_options["timeout"] = aiohttp.ClientTimeout(
+                    sock_connect=connect_timeout, sock_read=read_timeout
+                )
+
+            self.http_session = aiohttp.ClientSession(
+                connector=connector,
+                connector_owner=self.connector is None,
+                **session_options,
+            )
+
+        return self.http_session
+
+    async def _http_request(
+        self, method, url, headers=None, data=None, params=None
+    ):
+
+        if method not in ["POST", "OPTIONS", "GET"]:
+            raise AttributeError(f"Invalid Method {method}")
+
+        http_session = self._get_http_session()
+        endpoint = request_endpoint(url)
+        attempt = 0
+        while True:
+            self._before_request(endpoint)
+            content_type = None
+            response_json = None
+            try:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire_async(request_host(url))
+
+                async with http_session.request(
+                    method, url, headers=headers, data=data, params=params
+                ) as http_response:
+                    status_code = http_response.status
+                    response_headers = http_response.headers
+                    response_text = await http_response.text()
+
+                    if "Content-Type" in http_response.headers:
+                        content_type = http_response.headers["Content-Type"]
+
+                    if content_type and "application/json" in content_type:
+                        response_json = await http_response.json(
+                            content_type=None
+                        )
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                delay = self._request_failed(endpoint, attempt)
+                if delay is None:
+                    raise ConnectionError(str(err))
+
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            except BaseException:
+                self._request_aborted(endpoint)
+                raise
+
+            if not self._failed_status(status_code):
+                self._request_succeeded(endpoint)
+                break
+
+            delay = self._request_failed(
+                endpoint, attempt, response_headers=response_headers
+            )
+            if delay is None:
+                break
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        return self._handle_response(
+            method, status_code, content_type, response_json, response_text
+        )
+
+    async def _run_cache(self, function):
+        """
+        Run a cache function in the default executor, so the SQLite queries
+        do not block the event loop
+
+        :param function: cache function, e.g. ``_save_events_cache``
+        :type function: callable
+        :return: function result
+        """
+        if self.cache is None:
+            return function()
+
+        return await asyncio.get_running_loop().run_in_executor(
+            None, function
+        )
+
+    async def _options(self):
+        """
+        Verify the connection with Kodak Smart Home portal
+
+        :return: boolean result
+        :rtype: bool
+        """
+        options_response = await self._http_request(
+            "OPTIONS", self.region_url.URL_TOKEN, headers=self.basic_headers
+        )
+
+        return options_response
+
+    async def _token(self):
+        """
+        Get Kodak Smart Home Portal Token
+
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        token_response = await self._http_request(
+            "POST",
+            self.region_url.URL_TOKEN,
+            headers=HTTP_HEADERS_AUTH,
+            data=self._token_payload(),
+        )
+
+        return self._set_token(token_response)
+
+    async def _refresh_token(self):
+        """
+        Renew the Kodak Smart Home Portal Token using the refresh token
+
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        token_response = await self._http_request(
+            "POST",
+            self.region_url.URL_TOKEN,
+            headers=HTTP_HEADERS_AUTH,
+            data=self._refresh_token_payload(),
+        )
+
+        return self._set_token(token_response)
+
+    async def _authentication(self):
+        """
+        Perform authentication to Kodak Smart Home Portal
+
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        """
+        auth_response = await self._http_request(
+            "POST",
+            self.region_url.URL_AUTH,
+            headers=HTTP_HEADERS_AUTH,
+            data=self._auth_payload(),
+        )
+
+        cookies = self.http_session.cookie_jar.filter_cookies(
+            URL(self.region_url.URL_AUTH)
+        )
+        self.cookie = cookies["JSESSIONID"].value
+        self.user_id = auth_response["data"]["id"]
+
+        return True
+
+    def _set_cookie(self):
+        """
+        Restore the portal session cookie from ``cookie``
+
+        :return: None
+        """
+        self._get_http_session().cookie_jar.update_cookies(
+            {"JSESSIONID": self.cookie}, URL(self.region_url.URL_AUTH)
+        )
+
+    async def _get_devices(self):
+        """
+        Get all devices available in Kodak Smart Home Portal
+
+        :return: all devices
+        :rtype: list
+        """
+
+        await self._ensure_token()
+        devices_response = await self._http_request(
+            "GET",
+            self.region_url.URL_DEVICES,
+            headers=self._bearer_headers(),
+        )
+
+        if self.is_connected is False:
+            await self._relogin()
+            devices_response = await self._http_request(
+                "GET",
+                self.region_url.URL_DEVICES,
+                headers=self._bearer_headers(),
+            )
+            if self._session_lost(devices_response):
+                raise ConnectionError("Kodak Smarthome session lost")
+
+        self.devices = load_devices(devices_response["data"], self.model)
+        await self._run_cache(self._save_devices_cache)
+
+        return self.devices
+
+    async def _get_device_events(self, device_id, headers, known_events=None):
+        """
+        Get all events from a device in Kodak Smart Home Portal
+
+        It stops if the portal session is lost in one of its requests.
+        If the ``known_events`` are given, only events newer than its
+        high-water mark are fetched, stopping at the first page with known
+        events.
+
+        :param device_id: device id
+        :type device_id: str
+        :param headers: HTTP headers with the portal token authorization
+        :type headers: dict
+        :param known_events: events already known from the device
+        :type known_events: ``DeviceEvents``
+        :return: device events or None if the portal session was lost
+            before all its events were fetched
+        :rtype: ``DeviceEvents``
+        """
+        device_events = DeviceEvents(device_id)
+        pages = 1
+        events_pages = 1
+        while pages <= events_pages:
+            events_response = await self._http_request(
+                "GET", self._events_url(device_id, pages), headers=headers
+            )
+
+            if self._session_lost(events_response):
+                return None
+
+            events_pages = events_response["data"]["total_pages"]
+            if events_response["data"]["total_events"] == 0:
+                continue
+
+            events = load_events(events_response["data"]["events"], self.model)
+            page_events = len(events)
+            if known_events is not None:
+                events = [e for e in events if known_events.is_new(e)]
+
+            device_events.add(events)
+            # the pages are newest first, the pages after a page with known
+            # events are known
+            if len(events) < page_events:
+                break
+
+            pages += 1
+
+            if (
+                known_events is None
+                and self.max_page_workers
+                and self.max_page_workers > 1
+                and pages <= events_pages
+            ):
+                events_responses = await self._get_events_pages(
+                    device_id, headers, range(pages, events_pages + 1)
+                )
+                for events_response in events_responses:
+                    if self._session_lost(events_response):
+                        return None
+
+                    device_events.add(
+                        load_events(
+                            events_response["data"]["events"], self.model
+                        )
+                    )
+
+                break
+
+        return device_events
+
+    async def _get_events_pages(self, device_id, headers, pages):
+        """
+        Get device events pages concurrently, limited by
+        ``max_page_workers``.
+
+        :param device_id: device id
+        :type device_id: str
+        :param headers: HTTP headers with the portal token authorization
+        :type headers: dict
+        :param pages: events pages numbers
+        :type pages: range
+        :return: events pages responses in the pages order, True for the
+            pages requested after a concurrent request lost the portal
+            session
+        :rtype: list
+        """
+        semaphore = asyncio.Semaphore(self.max_page_workers)
+
+        async def get_events_page(page):
+            async with semaphore:
+                try:
+                    return await self._http_request(
+                        "GET",
+                        self._events_url(device_id, page),
+                        headers=headers,
+                    )
+
+                except ConnectionError:
+                    # a concurrent request already lost the portal session
+                    if self.is_connected:
+                        raise
+
+                    return True
+
+        # all the pages requests are done before returning, so none of them
+        # updates the session while it logs in again
+        events_responses = await asyncio.gather(
+            *[get_events_page(p) for p in pages], return_exceptions=True
+        )
+        for events_response in events_responses:
+            if isinstance(events_response, BaseException):
+                raise events_response
+
+        return events_responses
+
+    async def _get_events(self, incremental=False, device_ids=None):
+        """
+        Get all event for all available devices in Kodak Smart Home Portal
+
+        The devices are fetched concurrently when ``max_workers`` is greater
+        than 1. If the portal session is lost, it logs in again and fetches
+        the devices left, and the events data is set only once all the
+        devices are fetched.
+
+        :param incremental: fetch only the events newer than the events
+            already known and merge them. Default: False
+        :type incremental: bool
+        :param device_ids: devices ids to fetch, the other devices keep
+            their events. Default: None (all devices)
+        :type device_ids: list
+        :return: all events
+        :rtype: list
+        :exception: ``ConnectionError``
+        """
+
+        await self._ensure_token()
+        previous_events = self._index_events()
+        device_ids = self._select_devices(device_ids)
+        fetched_events = dict()
+        relogged = False
+        while True:
+            fetched_events.update(
+                await self._fetch_devices_events(
+                    [d for d in device_ids if d not in fetched_events],
+                    self._bearer_headers(),
+                    previous_events if incremental else dict(),
+                )
+            )
+            if len(fetched_events) == len(device_ids):
+                break
+
+            if relogged:
+                raise ConnectionError("Kodak Smarthome session lost")
+
+            # fetch the devices left, keeping the devices already fetched
+            # for the new events
+            await self._relogin()
+            relogged = True
+
+        self._apply_devices_events(
+            fetched_events, previous_events, incremental
+        )
+        await self._run_cache(self._save_events_cache)
+
+        return self.events
+
+    async def _fetch_devices_events(self, device_ids, headers, known_events):
+        """
+        Fetch the devices events, concurrently when ``max_workers`` is
+        greater than 1
+
+        The devices not fetched completely because the portal session was
+        lost are left out.
+
+        :param device_ids: devices ids
+        :type device_ids: list
+        :param headers: HTTP headers with the portal token authorization
+        :type headers: dict
+        :param known_events: known events by device id, only the newer
+            events are fetched
+        :type known_events: dict
+        :return: devices events fetched by device id
+        :rtype: dict
+        """
+        fetched_events = dict()
+        if self.max_workers and self.max_workers > 1 and len(device_ids) > 1:
+            semaphore = asyncio.Semaphore(self.max_workers)
+
+            async def get_device_events(device_id):
+                async with semaphore:
+                    return await self._get_device_events(
+                        device_id,
+                        headers,
+                        known_events=known_events.get(device_id),
+                    )
+
+            results = await asyncio.gather(
+                *[get_device_events(d) for d in device_ids],
+                return_exceptions=True,
+            )
+            for device_id, device_events in zip(device_ids, results):
+                if isinstance(device_events, BaseException):
+                    # a concurrent request already lost the portal session
+                    if self.is_connected or not isinstance(
+                        device_events, ConnectionError
+                    ):
+                        raise device_events
+
+                    continue
+
+                if device_events is not None:
+                    fetched_events[device_id] = device_events
+
+        else:
+            for device_id in device_ids:
+                device_events = await self._get_device_events(
+                    device_id,
+                    headers,
+                    known_events=known_events.get(device_id),
+                )
+                if device_events is None:
+                    break
+
+                fetched_events[device_id] = device_events
+
+        return fetched_events
+
+    async def _renew_token(self):
+        """
+        Renew the portal token without loading the devices and events again
+
+        The token is refreshed with the refresh token or, if it fails, with a
+        new password grant and authentication.
+
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        try:
+            await self._refresh_token()
+
+        except ConnectionError:
+            await self._token()
+            await self._authentication()
+
+        self._save_token()
+
+        return True
+
+    async def _ensure_token(self):
+        """
+        Renew the portal token if it expires within ``TOKEN_RENEWAL_MARGIN``
+
+        Concurrent callers share a single renewal.
+
+        :return: True if the token was renewed
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        if not self._token_renewal_due():
+            return False
+
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+
+        async with self._token_lock:
+            # a concurrent caller may have renewed it while waiting
+            if not self._token_renewal_due():
+                return False
+
+            await self._renew_token()
+
+        return True
+
+    async def _login(self, preflight=True):
+        """
+        Log in Kodak Smart Home Portal
+
+        The credentials from the token store are reused, or refreshed if the
+        token is expired, before falling back to a full login.
+
+        :param preflight: verify the connection with an OPTIONS request
+            before the full login. Default: True
+        :type preflight: bool
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        if self._load_token():
+            if self._token_expired(margin=TOKEN_RENEWAL_MARGIN):
+                try:
+                    await self._refresh_token()
+
+                except ConnectionError:
+                    self._discard_token()
+
+                    return await self._login(preflight=preflight)
+
+                self._save_token()
+
+            self._set_cookie()
+            self.is_connected = True
+
+            return True
+
+        if preflight:
+            await self._options()
+
+        await self._token()
+        await self._authentication()
+        self._save_token()
+
+        return True
+
+    async def _relogin(self):
+        """
+        Log in again once the portal session is lost, discarding the stored
+        credentials and keeping the devices and events data
+
+        :return: True or Raises ``ConnectionError``
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        self._discard_token()
+
+        return await self._login()
+
+    async def iter_events(self, device_id=None, event_type=None):
+        """
+        Iterate the devices events page by page, as they are received from
+        the portal (newest first)
+
+        The events are not kept in ``events``, so the memory used does not
+        grow with the events history and the iteration can stop early.
+
+        :param device_id: device id available in the device information
+            ``AsyncKodakSmartHome.get_devices``. Default: None (all devices)
+        :type device_id: str
+        :param event_type: event type, e.g. ``DEVICE_EVENT_MOTION``.
+            Default: None (all events)
+        :type event_type: int
+        :return: events generator
+        :exception: ``ConnectionError``
+        """
+        if device_id is None:
+            device_ids = [device["device_id"] for device in self.devices]
+
+        else:
+            device_ids = [device_id]
+
+        for device_id in device_ids:
+            page = 1
+            pages = 1
+            relogged = False
+            while page <= pages:
+                await self._ensure_token()
+                events_response = await self._http_request(
+                    "GET",
+                    self._events_url(device_id, page),
+                    headers=self._bearer_headers(),
+                )
+
+                if self._session_lost(events_response):
+                    if relogged:
+                        raise ConnectionError("Kodak Smarthome session lost")
+
+                    # log in again and retry the page, keeping the events
+                    # data as it is
+                    await self._relogin()
+                    relogged = True
+                    continue
+
+                relogged = False
+                pages = events_response["data"]["total_pages"]
+                if events_response["data"]["total_events"] == 0:
+                    break
+
+                for event in load_events(
+                    events_response["data"]["events"], self.model
+                ):
+                    add_timestamps(event)
+                    if event_type is None or event["event_type"] == event_type:
+                        yield event
+
+                page += 1
+
+    async def connect(self, load=LOAD_ALL, preflight=True):
+        """
+        Connect to Kodak Smart Home Portal and get all information needed.
+
+        If the cache is enabled, the devices and events are loaded from it
+        and only the newer events are fetched.
+
+        :param load: data loaded after the login. Options: 'all' (devices
+            and events), 'devices' or 'none' (use ``update`` to load them).
+            Default: 'all'
+        :type load: str
+        :param preflight: verify the connection with an OPTIONS request
+            before the login. Default: True
+        :type preflight: bool
+        :return: None
+        :exception: ``ConnectionError``, ``AttributeError``
+        """
+        if load not in LOADS or load == LOAD_LAZY:
+            raise AttributeError(f"{load} load is not supported")
+
+        incremental = await self._run_cache(self._load_cache)
+        await self._login(preflight=preflight)
+        if load in [LOAD_ALL, LOAD_DEVICES]:
+            await self._get_devices()
+
+        if load == LOAD_ALL:
+            await self._get_events(incremental=incremental)
+
+    async def update(self, full=False, device_ids=None):
+        """
+        Update the device list and events data
+
+        Only the events newer than the newest known event of each device are
+        fetched and merged into the events data.
+
+        :param full: fetch all the events again. Default: False
+        :type full: bool
+        :param device_ids: update only the events of these devices, without
+            the device list. Default: None (device list and all devices)
+        :type device_ids: list
+        :return: True
+        :rtype: bool
+        :exception: ``ConnectionError``
+        """
+        if device_ids is not None:
+            await self._get_events(
+                incremental=not full, device_ids=device_ids
+            )
+
+        else:
+            await self.update_devices()
+            await self._get_events(incremental=not full)
+
+        for callback, args in self._event_notifications():
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                await result
+
+    async def update_devices(self):
+        """
+        Update the device list, without the events
+
+        :return: all devices
+        :rtype: list
+        :exception: ``ConnectionError``
+        """
+        previous_devices = self.devices
+        devices = await self._get_devices()
+        for callback, args in self._device_notifications(previous_devices):
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                await result
+
+        return devices
+
+    async def disconnect(self):
+        """
+        Disconnect from Kodak Smart Portal and close the cache
+
+        :return: None
+        :exception: ``ConnectionError``
+        """
+        await self._http_request("GET", self.region_url.URL_LOGOUT)
+        if self.cache is not None:
+            await self._run_cache(self.cache.close)
+
+        if self._own_http_session:
+            await self.http_session.close()
+
+        self.is_connected = False
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import json
+import sqlite3
+import threading
+
+from kodaksmarthome.events import add_timestamps, event_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    account TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (account, device_id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    account TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    created_timestamp INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (account, device_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_created
+    ON events (account, device_id, created_timestamp);
+"""
+
+
+def _raw(payload):
+    """JSON encoder for ``kodaksmarthome.models`` objects"""
+    try:
+        return payload.raw
+
+    except AttributeError:
+        raise TypeError(f"{type(payload).__name__} is not JSON serializable")
+
+
+def _dumps(payload):
+    return json.dumps(payload, default=_raw)
+
+
+class EventCache:
+    """SQLite cache of devices and events.
+
+    Stores the devices and events by account and device, so a new session
+    loads them from disk and fetches only newer events from the portal. The
+    database is opened again if it is used after ``close``.
+
+    :param path: SQLite database path
+    :type path: str
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = None
+        with self._lock:
+            self._connect()
+
+    def _connect(self):
+        """
+        Open the cache database, if it is closed. Called with the lock held.
+
+        :return: database connection
+        :rtype: ``sqlite3.Connection``
+        """
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self.path, check_same_thread=False
+            )
+            with self._connection:
+                self._connection.executescript(_SCHEMA)
+
+        return self._connection
+
+    def close(self):
+        """
+        Close the cache database
+
+        :return: None
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def save_devices(self, account, devices):
+        """
+        Replace the account devices
+
+        :param account: account key
+        :type account: str
+        :param devices: devices
+        :type devices: list
+        :return: None
+        """
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "DELETE FROM devices WHERE account = ?", (account,)
+            )
+            connection.executemany(
+                "INSERT INTO devices VALUES (?, ?, ?, ?)",
+                [
+                    (account, device["device_id"], position, _dumps(device))
+                    for position, device in enumerate(devices)
+                ],
+            )
+
+    def load_devices(self, account):
+        """
+        Load the account devices
+
+        :param account: account key
+        :type account: str
+        :return: devices
+        :rtype: list
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT payload FROM devices WHERE account = ? "
+                + "ORDER BY position",
+                (account,),
+            ).fetchall()
+
+        return [json.loads(payload) for payload, in rows]
+
+    def save_events(self, account, device_id, events):
+        """
+        Add or replace device events
+
+        :param account: account key
+        :type account: str
+        :param device_id: device id
+        :type device_id: str
+        :param events: device events
+        :type events: list
+        :return: None
+        """
+        with self._lock, self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        account,
+                        device_id,
+                        event_key(event),
+                        add_timestamps(event),
+                        _dumps(event),
+                    )
+                    for event in events
+                ],
+            )
+
+    def load_events(self, account, device_id):
+        """
+        Load the device events, newest first as the portal
+
+        :param account: account key
+        :type account: str
+        :param device_id: device id
+        :type device_id: str
+        :return: device events
+        :rtype: list
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT payload FROM events "
+                + "WHERE account = ? AND device_id = ? "
+                + "ORDER BY created_timestamp DESC",
+                (account, device_id),
+            ).fetchall()
+
+        return [json.loads(payload) for payload, in rows]
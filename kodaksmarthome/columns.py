@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import itertools
+from array import array
+from collections import Counter
+
+try:
+    import numpy
+
+except ImportError:  # pragma: no cover
+    numpy = None
+
+HOUR = 3600 * 1000
+
+
+class EventColumns:
+    """Devices events in a columnar layout for bulk analytics.
+
+    Each event is a position in parallel arrays of device index, event
+    type, creation timestamp (epoch milliseconds), media files count and
+    media files total size. The aggregations use NumPy when it is
+    installed (``pip install python-kodaksmarthome[numpy]``) and the
+    ``array`` module otherwise.
+
+    :param device_ids: devices ids, the ``device`` column indexes
+    :type device_ids: list
+    """
+
+    def __init__(self, device_ids=None):
+
+        self.device_ids = list(device_ids or list())
+        self.device = array("I")
+        self.event_type = array("i")
+        self.timestamp = array("q")
+        self.media_count = array("I")
+        self.file_size = array("q")
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @classmethod
+    def from_devices_events(cls, devices_events):
+        """
+        Create the columns from the devices events
+
+        :param devices_events: devices events
+        :type devices_events: list of ``DeviceEvents``
+        :return: event columns
+        :rtype: ``EventColumns``
+        """
+        columns = cls([d.device_id for d in devices_events])
+        for index, device_events in enumerate(devices_events):
+            columns.extend(index, device_events.get())
+
+        return columns
+
+    def extend(self, device_index, events):
+        """
+        Add the events from a device
+
+        :param device_index: device index in ``device_ids``
+        :type device_index: int
+        :param events: device events with ``created_timestamp``
+        :type events: list
+        :return: None
+        """
+        self.device.extend(itertools.repeat(device_index, len(events)))
+        for event in events:
+            data = event.get("data") or list()
+            self.event_type.append(event["event_type"])
+            self.timestamp.append(event["created_timestamp"])
+            self.media_count.append(len(data))
+            self.file_size.append(sum(m.get("file_size") or 0 for m in data))
+
+    def _column(self, name, event_type=None):
+        """
+        Column values, filtered by event type
+
+        :param name: column name
+        :type name: str
+        :param event_type: event type. Default: None (all events)
+        :type event_type: int
+        :return: column values, ``numpy.ndarray`` if NumPy is available
+        """
+        column = getattr(self, name)
+        if numpy is not None:
+            values = numpy.frombuffer(column, dtype=column.typecode)
+            if event_type is not None:
+                types = numpy.frombuffer(self.event_type, dtype="i")
+                values = values[types == event_type]
+
+            return values
+
+        if event_type is not None:
+            return list(
+                itertools.compress(
+                    column, (t == event_type for t in self.event_type)
+                )
+            )
+
+        return column
+
+    @staticmethod
+    def _count(values):
+        """
+        Count the values
+
+        :param values: column values
+        :return: count by value
+        :rtype: dict
+        """
+        if numpy is not None:
+            keys, counts = numpy.unique(values, return_counts=True)
+
+            return dict(zip(keys.tolist(), counts.tolist()))
+
+        return dict(sorted(Counter(values).items()))
+
+    def count_by_type(self):
+        """
+        Events count by event type
+
+        :return: count by event type
+        :rtype: dict
+        """
+        return self._count(self._column("event_type"))
+
+    def count_by_hour(self, event_type=None):
+        """
+        Events count by hour
+
+        :param event_type: event type. Default: None (all events)
+        :type event_type: int
+        :return: count by hour, as the hour start epoch milliseconds
+        :rtype: dict
+        """
+        timestamps = self._column("timestamp", event_type=event_type)
+        if numpy is not None:
+            hours = timestamps // HOUR * HOUR
+
+        else:
+            hours = [t // HOUR * HOUR for t in timestamps]
+
+        return self._count(hours)
+
+    def count_by_device(self, event_type=None):
+        """
+        Events count by device
+
+        :param event_type: event type. Default: None (all events)
+        :type event_type: int
+        :return: count by device id
+        :rtype: dict
+        """
+        devices = self._column("device", event_type=event_type)
+        if numpy is not None:
+            counts = numpy.bincount(
+                devices, minlength=len(self.device_ids)
+            ).tolist()
+
+        else:
+            counter = Counter(devices)
+            counts = [counter[i] for i in range(len(self.device_ids))]
+
+        return dict(zip(self.device_ids, counts))
+
+    def file_size_by_device(self, event_type=None):
+        """
+        Media files total size by device
+
+        :param event_type: event type. Default: None (all events)
+        :type event_type: int
+        :return: bytes by device id
+        :rtype: dict
+        """
+        devices = self._column("device", event_type=event_type)
+        file_sizes = self._column("file_size", event_type=event_type)
+        sizes = [0] * len(self.device_ids)
+        if numpy is not None:
+            sizes = (
+                numpy.bincount(
+                    devices, weights=file_sizes, minlength=len(self.device_ids)
+                )
+                .astype("q")
+                .tolist()
+            )
+
+        else:
+            for device, file_size in zip(devices, file_sizes):
+                sizes[device] += file_size
+
+        return dict(zip(self.device_ids, sizes))
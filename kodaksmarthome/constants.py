@@ -10,6 +10,13 @@ DEVICE_EVENT_MOTION = 1
 DEVICE_EVENT_SOUND = 2
 DEVICE_EVENT_BATTERY = 7
 
+# CONNECT LOAD
+LOAD_ALL = "all"
+LOAD_DEVICES = "devices"
+LOAD_NONE = "none"
+LOAD_LAZY = "lazy"
+LOADS = [LOAD_ALL, LOAD_DEVICES, LOAD_NONE, LOAD_LAZY]
+
 # REGION_URLS
 SUPPORTED_REGIONS = {
     "EU": {
@@ -51,6 +58,10 @@ class _URLS(object):
 # HTTP General
 HTTP_CODE = codes
 
+# TOKEN
+# seconds before the portal token expiration to renew it
+TOKEN_RENEWAL_MARGIN = 300
+
 # HTTP_CLIENT
 HTTP_CLIENT_MODEL = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_14_6) AppleWebKit/537.36 "
@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import bisect
+import hashlib
+import heapq
+import json
+import numbers
+from datetime import datetime, timedelta, timezone
+
+
+def _without_timestamp(payload):
+    """
+    Copy of an event or media file without its ``created_timestamp``
+
+    :param payload: event or media file
+    :type payload: dict
+    :return: payload copy
+    :rtype: dict
+    """
+    return {
+        key: value
+        for key, value in payload.items()
+        if key != "created_timestamp"
+    }
+
+
+def event_key(event):
+    """
+    Key that identifies an event
+
+    It is the event ``id`` or, for events without ``id``, a stable hash of
+    the event content, without the timestamps added by ``add_timestamps``.
+
+    :param event: device event
+    :type event: dict
+    :return: event key
+    :rtype: str
+    """
+    try:
+        return event["id"]
+
+    except KeyError:
+        content = _without_timestamp(event)
+        if content.get("data"):
+            content["data"] = [_without_timestamp(m) for m in content["data"]]
+
+        content = json.dumps(content, sort_keys=True, default=str)
+
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def parse_date(value):
+    """
+    Convert a date to epoch milliseconds
+
+    :param value: date as ``datetime`` (naive dates are UTC), as the portal
+        date format, e.g. ``2019-12-19T15:56:05.000Z``, or as epoch
+        milliseconds
+    :type value: ``datetime``, str, int or float
+    :return: epoch milliseconds
+    :rtype: int
+    :exception: ``TypeError``
+    """
+    if isinstance(value, numbers.Real):
+        return int(value)
+
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+    elif not isinstance(value, datetime):
+        raise TypeError(f"Unsupported date {value!r}")
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+def add_timestamps(event):
+    """
+    Add the ``created_timestamp``, the ``created_date`` as epoch
+    milliseconds, to the event and its media files (``data``)
+
+    :param event: device event
+    :type event: dict
+    :return: event creation timestamp
+    :rtype: int
+    """
+    for media in event.get("data") or list():
+        if "created_timestamp" not in media and "created_date" in media:
+            media["created_timestamp"] = parse_date(media["created_date"])
+
+    if "created_timestamp" not in event:
+        event["created_timestamp"] = parse_date(event["created_date"])
+
+    return event["created_timestamp"]
+
+
+def created_timestamp(event):
+    """
+    Event creation timestamp, the events sort key
+
+    :param event: device event with ``created_timestamp``
+    :type event: dict
+    :return: event creation epoch milliseconds
+    :rtype: int
+    """
+    return event["created_timestamp"]
+
+
+class SortedEvents:
+    """Events sorted by creation date.
+
+    Keeps the creation timestamps in a parallel list, used to find ranges of
+    events with binary search.
+    """
+
+    def __init__(self):
+
+        self.events = list()
+        self.keys = list()
+
+    def __len__(self):
+        return len(self.events)
+
+    def insert(self, new_events):
+        """
+        Insert the new events
+
+        The new events are appended or prepended when they do not overlap the
+        sorted events, otherwise both are merged.
+
+        :param new_events: new events sorted by creation date
+        :type new_events: list
+        :return: None
+        """
+        if not new_events:
+            return
+
+        new_keys = [created_timestamp(event) for event in new_events]
+        if not self.keys or new_keys[0] >= self.keys[-1]:
+            self.events.extend(new_events)
+            self.keys.extend(new_keys)
+
+        elif new_keys[-1] <= self.keys[0]:
+            self.events[0:0] = new_events
+            self.keys[0:0] = new_keys
+
+        else:
+            self.events = list(
+                heapq.merge(self.events, new_events, key=created_timestamp)
+            )
+            self.keys = [created_timestamp(event) for event in self.events]
+
+    def get(self, since=None, until=None, limit=None, newest_first=False):
+        """
+        Events created in a date range
+
+        :param since: events created since this epoch milliseconds
+            (inclusive)
+        :type since: int
+        :param until: events created until this epoch milliseconds
+            (inclusive)
+        :type until: int
+        :param limit: maximum of events, the newest ones
+        :type limit: int
+        :param newest_first: newest events first. Default: False
+        :type newest_first: bool
+        :return: events
+        :rtype: list
+        """
+        start = 0
+        end = len(self.keys)
+        if since is not None:
+            start = bisect.bisect_left(self.keys, since)
+
+        if until is not None:
+            end = bisect.bisect_right(self.keys, until)
+
+        if limit is not None:
+            start = max(start, end - limit)
+
+        events = self.events[start:end]
+        if newest_first:
+            events.reverse()
+
+        return events
+
+
+class DeviceEvents:
+    """Events of a device indexed by the event key and by the event type.
+
+    ``events`` keeps the events in the portal order (newest first) and the
+    index allows checking and merging events in constant time. The events
+    are also kept sorted by creation date, all together and bucketed by
+    ``event_type`` (``DEVICE_EVENT_MOTION``, ``DEVICE_EVENT_SOUND``,
+    ``DEVICE_EVENT_BATTERY``, ...), as they are added.
+
+    :param device_id: device id
+    :type device_id: str
+    :param events: device events
+    :type events: list
+    """
+
+    def __init__(self, device_id, events=None):
+
+        self.device_id = device_id
+        self.events = list()
+        self.high_water = None
+        self._index = dict()
+        self._sorted = SortedEvents()
+        self._types = dict()
+        if events:
+            self.add(events)
+
+    def __contains__(self, event):
+        return event_key(event) in self._index
+
+    def __len__(self):
+        return len(self.events)
+
+    def _index_event(self, event):
+        """
+        Add the event to the index if it is not known
+
+        :param event: device event
+        :type event: dict
+        :return: True if it is a new event
+        :rtype: bool
+        """
+        key = event_key(event)
+        if key in self._index:
+            return False
+
+        self._index[key] = event
+        timestamp = add_timestamps(event)
+        if (
+            self.high_water is None
+            or timestamp > self.high_water["created_timestamp"]
+        ):
+            self.high_water = event
+
+        return True
+
+    def is_new(self, event):
+        """
+        Check if the event is newer than the high-water mark, the newest
+        event known from the device.
+
+        :param event: device event
+        :type event: dict
+        :return: True if it is a new event
+        :rtype: bool
+        """
+        if self.high_water is None:
+            return True
+
+        timestamp = add_timestamps(event)
+        if timestamp == self.high_water["created_timestamp"]:
+            return event_key(event) not in self._index
+
+        return timestamp > self.high_water["created_timestamp"]
+
+    def add(self, events):
+        """
+        Add the events not known after the device events
+
+        :param events: device events
+        :type events: list
+        :return: new events
+        :rtype: list
+        """
+        new_events = [event for event in events if self._index_event(event)]
+        self.events.extend(new_events)
+        self._sort_events(new_events)
+
+        return new_events
+
+    def merge(self, events):
+        """
+        Merge the events not known before the device events
+
+        :param events: device events newer than the known events
+        :type events: list
+        :return: new events
+        :rtype: list
+        """
+        new_events = [event for event in events if self._index_event(event)]
+        self.events = new_events + self.events
+        self._sort_events(new_events)
+
+        return new_events
+
+    def _sort_events(self, new_events):
+        """
+        Insert the new events in the sorted events and event type buckets
+
+        :param new_events: new events
+        :type new_events: list
+        :return: None
+        """
+        new_events = sorted(new_events, key=created_timestamp)
+        self._sorted.insert(new_events)
+
+        new_types = dict()
+        for event in new_events:
+            new_types.setdefault(event["event_type"], list()).append(event)
+
+        for event_type, type_events in new_types.items():
+            if event_type not in self._types:
+                self._types[event_type] = SortedEvents()
+
+            self._types[event_type].insert(type_events)
+
+    def get(
+        self,
+        event_type=None,
+        since=None,
+        until=None,
+        limit=None,
+        newest_first=False,
+    ):
+        """
+        Events sorted by creation date
+
+        :param event_type: event type, e.g. ``DEVICE_EVENT_MOTION``.
+            Default: None (all events)
+        :type event_type: int
+        :param since: events created since this date (inclusive)
+        :type since: ``datetime``, str or number (epoch milliseconds)
+        :param until: events created until this date (inclusive)
+        :type until: ``datetime``, str or number (epoch milliseconds)
+        :param limit: maximum of events, the newest ones
+        :type limit: int
+        :param newest_first: newest events first. Default: False
+        :type newest_first: bool
+        :return: events
+        :rtype: list
+        """
+        if event_type is None:
+            events = self._sorted
+
+        elif event_type in self._types:
+            events = self._types[event_type]
+
+        else:
+            return list()
+
+        return events.get(
+            since=None if since is None else parse_date(since),
+            until=None if until is None else parse_date(until),
+            limit=limit,
+            newest_first=newest_first,
+        )
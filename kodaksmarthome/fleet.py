@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+
+from kodaksmarthome.api import KodakSmartHome
+from kodaksmarthome.ratelimit import RateLimiter
+
+
+class KodakSmartHomeFleet:
+    """Kodak Smart Home sessions of several accounts.
+
+    The sessions of a region share a connection pool (``HTTPAdapter``). If
+    ``rate`` is given, all the sessions share a rate limiter by portal host,
+    as the regions share the token host. ``connect_all``, ``update_all``
+    and ``disconnect_all`` run at most ``max_workers`` sessions at once and
+    collect the results and errors by account, so a failing account does
+    not stop the others.
+
+    :param accounts: accounts as ``dict`` with ``username``, ``password``
+        and, optionally, ``region`` and other ``KodakSmartHome`` options,
+        including ``max_workers``. Default: None
+    :type accounts: list
+    :param max_workers: sessions connected or updated at once. Default: 4
+    :type max_workers: int
+    :param rate: requests per second by portal host, shared by all the
+        sessions. Default: None (no limit)
+    :type rate: float
+    :param burst: requests allowed at once by portal host. Default: None
+    :type burst: int
+    :param pool_maxsize: connections kept by portal host, shared by the
+        region sessions. Default: requests default (10)
+    :type pool_maxsize: int
+    :param session_options: ``KodakSmartHome`` options of all the sessions,
+        e.g. ``max_page_workers`` or ``retry_policy``. The fleet
+        ``max_workers`` is not a session option, the sessions
+        ``max_workers`` is given by account in ``accounts``
+    """
+
+    def __init__(
+        self,
+        accounts=None,
+        max_workers=4,
+        rate=None,
+        burst=None,
+        pool_maxsize=DEFAULT_POOLSIZE,
+        **session_options,
+    ):
+
+        self.max_workers = max_workers
+        self.rate = rate
+        self.burst = burst
+        self.pool_maxsize = pool_maxsize
+        self.session_options = session_options
+        self.sessions = dict()
+        self._http_adapters = dict()
+        self.rate_limiter = None
+        if rate is not None:
+            self.rate_limiter = RateLimiter(rate, burst=burst)
+
+        self._lock = threading.Lock()
+        for account in accounts or list():
+            self.add(**account)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        return iter(list(self.sessions.values()))
+
+    def add(self, username, password, region="EU", **options):
+        """
+        Add an account session
+
+        :param username: username registered in Kodak Smart Home Portal
+        :type username: str
+        :param password: password registered in Kodak Smart Home Portal
+        :type password: str
+        :param region: Global Region Portal. Default: 'EU'
+        :type region: str
+        :param options: ``KodakSmartHome`` options of the session
+        :return: account session
+        :rtype: ``KodakSmartHome``
+        :exception: ``AttributeError``
+        """
+        with self._lock:
+            if region not in self._http_adapters:
+                self._http_adapters[region] = HTTPAdapter(
+                    pool_maxsize=self.pool_maxsize
+                )
+
+            session = KodakSmartHome(
+                username,
+                password,
+                region=region,
+                **{
+                    "http_adapter": self._http_adapters[region],
+                    "rate_limiter": self.rate_limiter,
+                    **self.session_options,
+                    **options,
+                },
+            )
+            self.sessions[session.account] = session
+
+        return session
+
+    def remove(self, account):
+        """
+        Remove an account session
+
+        :param account: account, ``KodakSmartHome.account``
+        :type account: str
+        :return: removed session or None
+        :rtype: ``KodakSmartHome``
+        """
+        with self._lock:
+            return self.sessions.pop(account, None)
+
+    def _run(self, call, accounts=None):
+        """
+        Run a call for the accounts sessions, ``max_workers`` at once
+
+        :param call: callable with the session as argument
+        :type call: callable
+        :param accounts: accounts. Default: None (all accounts)
+        :type accounts: list
+        :return: results and errors by account
+        :rtype: tuple
+        """
+        if accounts is None:
+            accounts = list(self.sessions)
+
+        results = dict()
+        errors = dict()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(call, self.sessions[account]): account
+                for account in accounts
+            }
+            for future in as_completed(futures):
+                account = futures[future]
+                try:
+                    results[account] = future.result()
+
+                except Exception as err:
+                    errors[account] = err
+
+        return results, errors
+
+    def connect_all(self, accounts=None, **connect_options):
+        """
+        Connect the accounts sessions
+
+        :param accounts: accounts. Default: None (all accounts)
+        :type accounts: list
+        :param connect_options: ``KodakSmartHome.connect`` options, e.g.
+            ``load="devices"``
+        :return: results and errors by account
+        :rtype: tuple
+        """
+        return self._run(
+            lambda session: session.connect(**connect_options), accounts
+        )
+
+    def update_all(self, accounts=None, full=False):
+        """
+        Update the accounts sessions devices and events
+
+        :param accounts: accounts. Default: None (all accounts)
+        :type accounts: list
+        :param full: fetch all the events again. Default: False
+        :type full: bool
+        :return: results and errors by account
+        :rtype: tuple
+        """
+        return self._run(lambda session: session.update(full=full), accounts)
+
+    def disconnect_all(self, accounts=None):
+        """
+        Disconnect the accounts sessions
+
+        :param accounts: accounts. Default: None (all accounts)
+        :type accounts: list
+        :return: results and errors by account
+        :rtype: tuple
+        """
+        return self._run(lambda session: session.disconnect(), accounts)
+
+    def run(self, interval, stop_event, callback=None):
+        """
+        Update the accounts sessions every ``interval`` seconds until the
+        ``stop_event`` is set
+
+        :param interval: seconds between the updates starts
+        :type interval: float
+        :param stop_event: event that stops the updates
+        :type stop_event: ``threading.Event``
+        :param callback: called with the results and errors of each update.
+            Default: None
+        :type callback: callable
+        :return: None
+        """
+        while not stop_event.is_set():
+            started = time.monotonic()
+            results, errors = self.update_all()
+            if callback is not None:
+                callback(results, errors)
+
+            stop_event.wait(max(interval - (time.monotonic() - started), 0))
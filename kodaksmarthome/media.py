@@ -0,0 +1,445 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+
+from kodaksmarthome.constants import HTTP_CODE
+
+# requested bytes by chunk
+CHUNK_SIZE = 64 * 1024
+# media cache size in bytes
+MEDIA_CACHE_SIZE = 512 * 1024 * 1024
+
+
+def event_media(event, snapshot=True, file_types=None):
+    """
+    Media files of an event
+
+    The snapshot id is the event id, as the snapshot has no id.
+
+    :param event: device event
+    :type event: dict
+    :param snapshot: include the event snapshot. Default: True
+    :type snapshot: bool
+    :param file_types: media ``file_type`` included. Default: None (all)
+    :type file_types: list
+    :return: media files as ``dict`` with ``id``, ``url``, ``file_type``
+        (None for the snapshot) and ``file_size`` (None if unknown)
+    :rtype: list
+    """
+    media = list()
+    if snapshot and event.get("snapshot"):
+        media.append(
+            {
+                "id": event["id"],
+                "url": event["snapshot"],
+                "file_type": None,
+                "file_size": None,
+            }
+        )
+
+    for data in event.get("data") or list():
+        if file_types is not None and data.get("file_type") not in file_types:
+            continue
+
+        media.append(
+            {
+                "id": data["id"],
+                "url": data["file"],
+                "file_type": data.get("file_type"),
+                "file_size": data.get("file_size"),
+            }
+        )
+
+    return media
+
+
+def media_file_name(media):
+    """
+    File name of a media file, its id and the URL extension
+
+    :param media: media file, see ``event_media``
+    :type media: dict
+    :return: file name
+    :rtype: str
+    """
+    return media["id"] + os.path.splitext(urlsplit(media["url"]).path)[1]
+
+
+class MediaDownloader:
+    """Concurrent download of the events snapshots and media files.
+
+    The files are streamed to disk by ``chunk_size`` chunks into a ``.part``
+    file, which is renamed when it is complete. An existing ``.part`` file
+    is resumed with an HTTP ``Range`` request, and the downloaded size is
+    checked against the media ``file_size``.
+
+    :param http_session: HTTP session used instead of a new one, e.g.
+        ``KodakSmartHome.http_session``. It is not closed by ``close``.
+        Default: None
+    :type http_session: ``requests.Session``
+    :param max_workers: files downloaded at once. Default: 4
+    :type max_workers: int
+    :param chunk_size: bytes written by chunk. Default: CHUNK_SIZE (64 KiB)
+    :type chunk_size: int
+    :param timeout: connect and read timeout in seconds. Default: None
+    :type timeout: float or tuple
+    """
+
+    def __init__(
+        self,
+        http_session=None,
+        max_workers=4,
+        chunk_size=CHUNK_SIZE,
+        timeout=None,
+    ):
+
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self._own_http_session = http_session is None
+        if http_session is None:
+            http_session = requests.Session()
+            if max_workers > DEFAULT_POOLSIZE:
+                http_adapter = HTTPAdapter(pool_maxsize=max_workers)
+                http_session.mount("https://", http_adapter)
+                http_session.mount("http://", http_adapter)
+
+        self.http_session = http_session
+
+    def download(self, url, path, file_size=None):
+        """
+        Download a file, resuming its ``.part`` file
+
+        :param url: file URL
+        :type url: str
+        :param path: file path
+        :type path: str
+        :param file_size: expected file size in bytes. Default: None
+        :type file_size: int
+        :return: file path
+        :rtype: str
+        :exception: ``ConnectionError``
+        """
+        if os.path.exists(path) and (
+            file_size is None or os.path.getsize(path) == file_size
+        ):
+            return path
+
+        part_path = f"{path}.part"
+        offset = 0
+        if os.path.exists(part_path):
+            offset = os.path.getsize(part_path)
+            if file_size is not None and offset > file_size:
+                offset = 0
+
+        headers = {"Range": f"bytes={offset}-"} if offset else dict()
+        with self.http_session.get(
+            url, headers=headers, stream=True, timeout=self.timeout
+        ) as response:
+            if response.status_code == HTTP_CODE.PARTIAL_CONTENT:
+                mode = "ab"
+
+            elif response.status_code == HTTP_CODE.OK:
+                mode = "wb"
+
+            elif (
+                response.status_code == HTTP_CODE.RANGE_NOT_SATISFIABLE
+                and offset
+            ):
+                # the part file is already complete
+                mode = None
+
+            else:
+                raise ConnectionError(
+                    f"Failed to download {url}: {response.status_code}"
+                )
+
+            if mode is not None:
+                with open(part_path, mode) as part_file:
+                    for chunk in response.iter_content(self.chunk_size):
+                        part_file.write(chunk)
+
+        size = os.path.getsize(part_path)
+        if file_size is not None and size != file_size:
+            if size > file_size:
+                os.remove(part_path)
+
+            raise ConnectionError(
+                f"Incomplete download of {url}: {size} of {file_size} bytes"
+            )
+
+        os.replace(part_path, path)
+
+        return path
+
+    def download_media(self, media, directory):
+        """
+        Download media files concurrently, ``max_workers`` at once
+
+        :param media: media files, see ``event_media``
+        :type media: list
+        :param directory: directory of the files
+        :type directory: str
+        :return: files paths and errors by media id
+        :rtype: tuple
+        """
+        os.makedirs(directory, exist_ok=True)
+        results = dict()
+        errors = dict()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self.download,
+                    item["url"],
+                    os.path.join(directory, media_file_name(item)),
+                    item["file_size"],
+                ): item["id"]
+                for item in media
+            }
+            for future in as_completed(futures):
+                media_id = futures[future]
+                try:
+                    results[media_id] = future.result()
+
+                except Exception as err:
+                    errors[media_id] = err
+
+        return results, errors
+
+    def download_events(
+        self, events, directory, snapshot=True, file_types=None
+    ):
+        """
+        Download the snapshots and media files of events concurrently
+
+        :param events: devices events
+        :type events: list
+        :param directory: directory of the files
+        :type directory: str
+        :param snapshot: download the events snapshots. Default: True
+        :type snapshot: bool
+        :param file_types: media ``file_type`` downloaded. Default: None
+            (all)
+        :type file_types: list
+        :return: files paths and errors by media id
+        :rtype: tuple
+        """
+        media = list()
+        for event in events:
+            media.extend(event_media(event, snapshot, file_types))
+
+        return self.download_media(media, directory)
+
+    def close(self):
+        """
+        Close the HTTP session, if it is not shared
+
+        :return: None
+        """
+        if self._own_http_session:
+            self.http_session.close()
+
+
+class MediaCache:
+    """Local cache of the events snapshots and media files.
+
+    The files are kept in ``directory`` by media id (the event id for the
+    snapshots, see ``event_media``), so a media file is downloaded once
+    and then served from disk. When the files exceed ``max_bytes`` the
+    least recently used ones are removed. The files are written by the
+    ``downloader`` to a ``.part`` file and renamed when complete, and the
+    cache is thread-safe: a media file is downloaded once for concurrent
+    readers.
+
+    :param directory: cache directory
+    :type directory: str
+    :param max_bytes: cache size in bytes. Default: MEDIA_CACHE_SIZE
+        (512 MiB)
+    :type max_bytes: int
+    :param downloader: media downloader. Default: None (a new
+        ``MediaDownloader``)
+    :type downloader: ``MediaDownloader``
+    """
+
+    def __init__(self, directory, max_bytes=MEDIA_CACHE_SIZE, downloader=None):
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.downloader = downloader or MediaDownloader()
+        self.size = 0
+        # media id: (path, size), least recently used first
+        self._files = OrderedDict()
+        self._downloads = dict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __contains__(self, media_id):
+        return media_id in self._files
+
+    def __len__(self):
+        return len(self._files)
+
+    def _load(self):
+        """
+        Index the cached files by their last use
+
+        :return: None
+        """
+        files = list()
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+
+        with self._lock:
+            for _, path, size in sorted(files):
+                media_id = os.path.splitext(os.path.basename(path))[0]
+                self._files[media_id] = (path, size)
+                self.size += size
+
+            self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used files over ``max_bytes``, keeping
+        the last one. Called with the lock held.
+
+        :return: None
+        """
+        while self.size > self.max_bytes and len(self._files) > 1:
+            _, (path, size) = self._files.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(path)
+
+            except FileNotFoundError:
+                pass
+
+    def _add(self, media_id, path):
+        """
+        Add a downloaded file as the most recently used, evicting the least
+        recently used files. Called with the lock held.
+
+        :param media_id: media id
+        :type media_id: str
+        :param path: file path
+        :type path: str
+        :return: None
+        """
+        if media_id in self._files:
+            self.size -= self._files.pop(media_id)[1]
+
+        size = os.path.getsize(path)
+        self._files[media_id] = (path, size)
+        self.size += size
+        self._evict()
+
+    def _use(self, media_id):
+        """
+        Mark a cached file as the most recently used. Called with the lock
+        held.
+
+        :param media_id: media id
+        :type media_id: str
+        :return: file path or None if it is not cached
+        :rtype: str
+        """
+        if media_id not in self._files:
+            return None
+
+        self._files.move_to_end(media_id)
+        path = self._files[media_id][0]
+        try:
+            # keep the use order for the next sessions
+            os.utime(path)
+
+        except FileNotFoundError:
+            self.size -= self._files.pop(media_id)[1]
+
+            return None
+
+        return path
+
+    def get(self, media):
+        """
+        Path of a cached media file
+
+        :param media: media file, see ``event_media``
+        :type media: dict
+        :return: file path or None if it is not cached
+        :rtype: str
+        """
+        with self._lock:
+            return self._use(media["id"])
+
+    def fetch(self, media):
+        """
+        Path of a media file, downloaded if it is not cached
+
+        :param media: media file, see ``event_media``
+        :type media: dict
+        :return: file path
+        :rtype: str
+        :exception: ``ConnectionError``
+        """
+        media_id = media["id"]
+        with self._lock:
+            path = self._use(media_id)
+            if path is not None:
+                return path
+
+            download_lock = self._downloads.setdefault(
+                media_id, threading.Lock()
+            )
+
+        with download_lock:
+            with self._lock:
+                path = self._use(media_id)
+                if path is not None:
+                    return path
+
+            path = None
+            try:
+                path = self.downloader.download(
+                    media["url"],
+                    os.path.join(self.directory, media_file_name(media)),
+                    media["file_size"],
+                )
+
+            finally:
+                with self._lock:
+                    self._downloads.pop(media_id, None)
+                    if path is not None:
+                        self._add(media_id, path)
+
+        return path
+
+    def open(self, media):
+        """
+        Open a media file, downloaded if it is not cached
+
+        The file is opened under the cache lock, so it stays readable if it
+        is evicted while it is read.
+
+        :param media: media file, see ``event_media``
+        :type media: dict
+        :return: binary file
+        :rtype: file object
+        :exception: ``ConnectionError``
+        """
+        while True:
+            path = self.fetch(media)
+            with self._lock:
+                if self._use(media["id"]) == path:
+                    return open(path, "rb")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+from collections.abc import Mapping
+from enum import IntEnum
+
+from kodaksmarthome.constants import (
+    DEVICE_EVENT_BATTERY,
+    DEVICE_EVENT_MOTION,
+    DEVICE_EVENT_SOUND,
+)
+from kodaksmarthome.events import parse_date
+
+MODEL_DICT = "dict"
+MODEL_COMPACT = "compact"
+MODELS = [MODEL_DICT, MODEL_COMPACT]
+
+
+class EventType(IntEnum):
+    """Device event types"""
+
+    MOTION = DEVICE_EVENT_MOTION
+    SOUND = DEVICE_EVENT_SOUND
+    BATTERY = DEVICE_EVENT_BATTERY
+
+
+def event_type(value):
+    """
+    Device event type as ``EventType`` or, if unknown, as ``int``
+
+    :param value: event type
+    :type value: int
+    :return: event type
+    :rtype: ``EventType`` or int
+    """
+    try:
+        return EventType(value)
+
+    except ValueError:
+        return value
+
+
+class _Model(Mapping):
+    """Compact model of a portal payload.
+
+    The payload fields are kept as ``__slots__`` attributes, and the fields
+    not modeled in ``_extra``. It is read-only compatible with ``dict``, so
+    ``event["created_date"]`` works as for the portal payload, and the
+    payload is only built on demand by ``raw``.
+    """
+
+    __slots__ = ("_extra",)
+    _fields = tuple()
+    _optional = tuple()
+
+    @classmethod
+    def from_dict(cls, payload):
+        """
+        Create the model from the portal payload
+
+        :param payload: portal payload
+        :type payload: dict
+        :return: model
+        """
+        if isinstance(payload, cls):
+            return payload
+
+        fields = dict(payload)
+        model = cls.__new__(cls)
+        for name in cls._fields:
+            setattr(model, name, fields.pop(name, None))
+
+        model._extra = fields or None
+        model._load()
+
+        return model
+
+    def _load(self):
+        """Convert the fields loaded from the portal payload"""
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            value = getattr(self, key)
+            if value is None and key in self._optional:
+                raise KeyError(key)
+
+            return value
+
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+
+        raise KeyError(key)
+
+    def __iter__(self):
+        for name in self._fields:
+            if name in self._optional and getattr(self, name) is None:
+                continue
+
+            yield name
+
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if isinstance(other, _Model):
+            return self.raw == other.raw
+
+        if isinstance(other, Mapping):
+            return self.raw == dict(other)
+
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    @property
+    def raw(self):
+        """
+        Portal payload
+
+        :return: payload
+        :rtype: dict
+        """
+        return {
+            key: [v.raw for v in value] if isinstance(value, tuple) else value
+            for key, value in self.items()
+        }
+
+
+class MediaFile(_Model):
+    """Event media file (snapshot or recording) from ``data``"""
+
+    __slots__ = (
+        "id",
+        "file",
+        "file_type",
+        "storage_id",
+        "file_size",
+        "created_date",
+        "created_timestamp",
+    )
+    _fields = __slots__
+    _optional = ("created_date", "created_timestamp")
+
+    def _load(self):
+        if self.created_timestamp is None and self.created_date is not None:
+            self.created_timestamp = parse_date(self.created_date)
+
+
+class Event(_Model):
+    """Device event"""
+
+    __slots__ = (
+        "id",
+        "event_type",
+        "created_date",
+        "created_timestamp",
+        "snapshot",
+        "data",
+        "dv_data",
+    )
+    _fields = __slots__
+    # without id, the event is known by its content, see ``event_key``
+    _optional = ("id", "snapshot")
+
+    def _load(self):
+        self.event_type = event_type(self.event_type)
+        self.data = tuple(MediaFile.from_dict(m) for m in self.data or ())
+        if self.created_timestamp is None:
+            self.created_timestamp = parse_date(self.created_date)
+
+
+class Device(_Model):
+    """Device registered in the portal"""
+
+    __slots__ = ("id", "device_id", "name", "model_name", "is_online")
+    _fields = __slots__
+    _optional = ("id", "name", "model_name", "is_online")
+
+
+def load_events(events, model=MODEL_DICT):
+    """
+    Load the portal events payload in the model
+
+    :param events: portal events
+    :type events: list
+    :param model: ``MODEL_DICT`` or ``MODEL_COMPACT``. Default: MODEL_DICT
+    :type model: str
+    :return: events
+    :rtype: list
+    """
+    if model == MODEL_COMPACT:
+        return [Event.from_dict(event) for event in events]
+
+    return events
+
+
+def load_devices(devices, model=MODEL_DICT):
+    """
+    Load the portal devices payload in the model
+
+    :param devices: portal devices
+    :type devices: list
+    :param model: ``MODEL_DICT`` or ``MODEL_COMPACT``. Default: MODEL_DICT
+    :type model: str
+    :return: devices
+    :rtype: list
+    """
+    if model == MODEL_COMPACT and isinstance(devices, list):
+        return [Device.from_dict(device) for device in devices]
+
+    return devices
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import heapq
+import threading
+import time
+
+
+class DevicePoller:
+    """Adaptive polling of the devices events of a session.
+
+    Each device has its own refresh interval: online devices with motion
+    in the last ``idle_after`` seconds are polled every ``active_interval``
+    seconds, idle devices every ``idle_interval`` seconds and offline
+    devices every ``offline_interval`` seconds. The next due time of the
+    devices is kept in a priority queue, and each ``poll`` updates only the
+    due devices with ``KodakSmartHome.update(device_ids=...)``. The device
+    list is updated every ``devices_interval`` seconds. A failed poll is
+    retried after ``retry_interval`` seconds.
+
+    :param session: connected session
+    :type session: ``KodakSmartHome``
+    :param active_interval: seconds between the polls of an active device.
+        Default: 30
+    :type active_interval: float
+    :param idle_interval: seconds between the polls of an idle device.
+        Default: 300
+    :type idle_interval: float
+    :param offline_interval: seconds between the polls of an offline
+        device. Default: 900
+    :type offline_interval: float
+    :param idle_after: seconds without motion for a device to be idle.
+        Default: 3600
+    :type idle_after: float
+    :param devices_interval: seconds between the device list updates.
+        Default: 300
+    :type devices_interval: float
+    :param retry_interval: seconds before retrying a failed poll.
+        Default: 30
+    :type retry_interval: float
+    """
+
+    def __init__(
+        self,
+        session,
+        active_interval=30,
+        idle_interval=300,
+        offline_interval=900,
+        idle_after=3600,
+        devices_interval=300,
+        retry_interval=30,
+    ):
+
+        self.session = session
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.offline_interval = offline_interval
+        self.idle_after = idle_after
+        self.devices_interval = devices_interval
+        self.retry_interval = retry_interval
+        # (due monotonic time, device id)
+        self._queue = list()
+        self._scheduled = set()
+        self._devices_due = None
+
+    def interval(self, device):
+        """
+        Refresh interval of a device
+
+        :param device: device information, see ``KodakSmartHome.get_devices``
+        :type device: dict
+        :return: seconds between the polls of the device
+        :rtype: float
+        """
+        if device.get("is_online") is False:
+            return self.offline_interval
+
+        since = int((time.time() - self.idle_after) * 1000)
+        if self.session.get_motion_events(
+            device_id=device["device_id"], since=since, limit=1
+        ):
+            return self.active_interval
+
+        return self.idle_interval
+
+    def _schedule(self, device_id, due):
+        heapq.heappush(self._queue, (due, device_id))
+        self._scheduled.add(device_id)
+
+    def next_due(self):
+        """
+        Monotonic time of the next poll
+
+        :return: next due time, see ``time.monotonic``
+        :rtype: float
+        """
+        if not self._queue:
+            return self._devices_due
+
+        if self._devices_due is None:
+            return self._queue[0][0]
+
+        return min(self._queue[0][0], self._devices_due)
+
+    def poll(self):
+        """
+        Update the due devices events and, when due, the device list
+
+        New devices are polled right away and removed devices are dropped
+        from the queue. If the poll fails, the devices polled are retried
+        after ``retry_interval`` seconds, and their ids are given in the
+        error ``device_ids``.
+
+        :return: polled devices ids
+        :rtype: list
+        :exception: ``ConnectionError``
+        """
+        now = time.monotonic()
+        if self._devices_due is None or self._devices_due <= now:
+            self._devices_due = now + self.retry_interval
+            self.session.update_devices()
+            self._devices_due = now + self.devices_interval
+
+        devices = {
+            device["device_id"]: device for device in self.session.devices
+        }
+        for device_id in devices:
+            if device_id not in self._scheduled:
+                self._schedule(device_id, now)
+
+        due = list()
+        while self._queue and self._queue[0][0] <= now:
+            _, device_id = heapq.heappop(self._queue)
+            self._scheduled.discard(device_id)
+            if device_id in devices:
+                due.append(device_id)
+
+        try:
+            if due:
+                self.session.update(device_ids=due)
+
+            for device_id in due:
+                self._schedule(
+                    device_id, now + self.interval(devices[device_id])
+                )
+
+        except Exception as err:
+            err.device_ids = due
+            raise
+
+        finally:
+            for device_id in due:
+                if device_id not in self._scheduled:
+                    self._schedule(device_id, now + self.retry_interval)
+
+        return due
+
+    def run(self, stop_event=None, callback=None):
+        """
+        Poll the devices until the ``stop_event`` is set
+
+        A failed poll does not stop the polling, its error is given to the
+        ``callback`` and the poll is retried after ``retry_interval``
+        seconds.
+
+        :param stop_event: event that stops the polling. Default: None
+        :type stop_event: ``threading.Event``
+        :param callback: called with the polled devices ids and the error
+            (None if the poll succeeded) of each poll. Default: None
+        :type callback: callable
+        :return: None
+        """
+        if stop_event is None:
+            stop_event = threading.Event()
+
+        while not stop_event.is_set():
+            try:
+                due, error = self.poll(), None
+
+            except Exception as err:
+                # no devices were polled if the device list update failed
+                due, error = getattr(err, "device_ids", list()), err
+
+            if callback is not None:
+                callback(due, error)
+
+            stop_event.wait(max(self.next_due() - time.monotonic(), 0))
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import threading
+from collections import deque
+
+from kodaksmarthome.constants import DEVICE_EVENT_MOTION
+from kodaksmarthome.media import event_media
+
+
+class SnapshotPrefetcher:
+    """Background download of the new motion events snapshots.
+
+    Once started, the snapshots (and, with ``clips``, the smallest media
+    file) of the new motion events found by ``update`` are queued and
+    downloaded into the ``media_cache`` by ``workers`` threads, so they are
+    on disk when the events are handled. The queue keeps ``max_queue``
+    media files: when it is full the oldest ones are dropped.
+
+    :param session: session, ``KodakSmartHome`` or ``AsyncKodakSmartHome``
+    :type session: ``KodakSmartHome``
+    :param media_cache: media cache of the downloads
+    :type media_cache: ``kodaksmarthome.media.MediaCache``
+    :param max_queue: media files waiting for download. Default: 100
+    :type max_queue: int
+    :param workers: download threads. Default: 2
+    :type workers: int
+    :param clips: prefetch the smallest media file of the events too.
+        Default: False
+    :type clips: bool
+    :param callback: called with the media file and its path after each
+        download. Its errors are counted in ``callback_errors`` and do not
+        stop the prefetch. Default: None
+    :type callback: callable
+    """
+
+    def __init__(
+        self,
+        session,
+        media_cache,
+        max_queue=100,
+        workers=2,
+        clips=False,
+        callback=None,
+    ):
+
+        self.session = session
+        self.media_cache = media_cache
+        self.workers = workers
+        self.clips = clips
+        self.callback = callback
+        self.dropped = 0
+        self.failed = 0
+        self.callback_errors = 0
+        self._queue = deque(maxlen=max_queue)
+        self._condition = threading.Condition()
+        self._threads = list()
+        self._running = False
+        self._registered = False
+
+    def __len__(self):
+        return len(self._queue)
+
+    def event_media(self, event):
+        """
+        Media files prefetched of a motion event
+
+        :param event: motion event
+        :type event: dict
+        :return: snapshot and, with ``clips``, the smallest media file
+        :rtype: list
+        """
+        media = event_media(event, snapshot=True, file_types=list())
+        if self.clips:
+            clips = [
+                item
+                for item in event_media(event, snapshot=False)
+                if item["file_size"] is not None
+            ]
+            if clips:
+                media.append(min(clips, key=lambda item: item["file_size"]))
+
+        return media
+
+    def put(self, media):
+        """
+        Queue media files, dropping the oldest ones if the queue is full
+
+        :param media: media files, see ``kodaksmarthome.media.event_media``
+        :type media: list
+        :return: None
+        """
+        with self._condition:
+            for item in media:
+                if len(self._queue) == self._queue.maxlen:
+                    self.dropped += 1
+
+                self._queue.append(item)
+
+            self._condition.notify(len(media))
+
+    def _on_motion(self, device_id, events):
+        if self._running:
+            media = list()
+            for event in events:
+                media.extend(self.event_media(event))
+
+            self.put(media)
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+
+                if not self._running:
+                    return
+
+                media = self._queue.popleft()
+
+            try:
+                path = self.media_cache.fetch(media)
+
+            except Exception:
+                with self._condition:
+                    self.failed += 1
+
+                continue
+
+            if self.callback is not None:
+                try:
+                    self.callback(media, path)
+
+                except Exception:
+                    with self._condition:
+                        self.callback_errors += 1
+
+    def start(self):
+        """
+        Start the download threads and the prefetch of the new motion
+        events
+
+        :return: None
+        """
+        if self._running:
+            return
+
+        self._running = True
+        if not self._registered:
+            self.session.on_event(DEVICE_EVENT_MOTION, self._on_motion)
+            self._registered = True
+
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the prefetch and the download threads, after their current
+        downloads. The media files still queued are kept for the next
+        ``start``.
+
+        :param timeout: seconds to wait for each thread. Default: None
+        :type timeout: float
+        :return: None
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        for thread in self._threads:
+            thread.join(timeout)
+
+        self._threads = list()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def request_host(url):
+    """
+    Host of a request URL, the rate limiter key
+
+    :param url: request URL
+    :type url: str
+    :return: host
+    :rtype: str
+    """
+    return urlsplit(url).netloc
+
+
+class RateLimiter:
+    """Token bucket rate limiter by host.
+
+    Each host has a bucket of ``burst`` tokens refilled at ``rate`` tokens
+    per second, and every request takes a token. A request without tokens
+    reserves the next one and waits for it, so concurrent callers are
+    spaced at ``rate`` instead of retrying. The limiter is thread-safe and
+    can be shared by several sessions, sync and async.
+
+    :param rate: requests per second by host
+    :type rate: float
+    :param burst: requests allowed at once by host. Default: None (``rate``,
+        at least 1)
+    :type burst: int
+    """
+
+    def __init__(self, rate, burst=None):
+
+        if rate <= 0:
+            raise AttributeError(f"{rate} rate must be positive")
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        # host: (tokens, updated at)
+        self._buckets = dict()
+        self._lock = threading.Lock()
+
+    def reserve(self, host):
+        """
+        Take a token from the host bucket
+
+        :param host: host, see ``request_host``
+        :type host: str
+        :return: seconds to wait before the request
+        :rtype: float
+        """
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            tokens -= 1
+            self._buckets[host] = (tokens, now)
+
+        if tokens >= 0:
+            return 0.0
+
+        return -tokens / self.rate
+
+    def acquire(self, host):
+        """
+        Wait for a token from the host bucket
+
+        :param host: host, see ``request_host``
+        :type host: str
+        :return: None
+        """
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, host):
+        """
+        Wait for a token from the host bucket without blocking the event
+        loop
+
+        :param host: host, see ``request_host``
+        :type host: str
+        :return: None
+        """
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
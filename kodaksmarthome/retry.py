@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# HTTP status codes of transient portal failures
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def request_endpoint(url):
+    """
+    Endpoint of a request URL, the URL without the query
+
+    :param url: request URL
+    :type url: str
+    :return: endpoint
+    :rtype: str
+    """
+    parts = urlsplit(url)
+
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def parse_retry_after(value):
+    """
+    Convert the ``Retry-After`` header to seconds
+
+    :param value: ``Retry-After`` header, as seconds or HTTP date
+    :type value: str
+    :return: seconds or None if it is missing or invalid
+    :rtype: float
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+
+    except ValueError:
+        pass
+
+    try:
+        retry_date = parsedate_to_datetime(value)
+
+    except (TypeError, ValueError):
+        return None
+
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=timezone.utc)
+
+    return max((retry_date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    """Retry policy for transient portal failures.
+
+    Connection errors and the ``statuses`` responses are retried with an
+    exponential backoff (``backoff * 2 ** attempt``), with full jitter, or
+    after the ``Retry-After`` response header, up to ``max_backoff``
+    seconds.
+
+    :param retries: maximum of retries of a request. Default: 3
+    :type retries: int
+    :param backoff: first retry delay in seconds. Default: 0.5
+    :type backoff: float
+    :param max_backoff: maximum retry delay in seconds. Default: 30
+    :type max_backoff: float
+    :param jitter: randomize the delay between 0 and the backoff.
+        Default: True
+    :type jitter: bool
+    :param statuses: HTTP status codes retried. Default: RETRY_STATUSES
+    :type statuses: tuple
+    """
+
+    def __init__(
+        self,
+        retries=3,
+        backoff=0.5,
+        max_backoff=30.0,
+        jitter=True,
+        statuses=RETRY_STATUSES,
+    ):
+
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = tuple(statuses)
+
+    def next_delay(self, attempt, retry_after=None):
+        """
+        Delay before retrying a failed request
+
+        :param attempt: number of retries already done
+        :type attempt: int
+        :param retry_after: ``Retry-After`` response header
+        :type retry_after: str
+        :return: delay in seconds or None if it is not retried
+        :rtype: float
+        """
+        if attempt >= self.retries:
+            return None
+
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.backoff * 2 ** attempt
+            if self.jitter:
+                delay = random.uniform(0, delay)
+
+        return min(delay, self.max_backoff)
+
+
+class CircuitBreaker:
+    """Circuit breaker by portal endpoint.
+
+    After ``failure_threshold`` consecutive failures of an endpoint its
+    requests fail fast with ``ConnectionError`` for ``reset_timeout``
+    seconds. Then a single trial request is allowed: a success closes the
+    circuit and a failure opens it again.
+
+    :param failure_threshold: consecutive failures to open the circuit.
+        Default: 5
+    :type failure_threshold: int
+    :param reset_timeout: seconds before the trial request. Default: 30
+    :type reset_timeout: float
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        # endpoint: (consecutive failures, opened at, trial in progress)
+        self._circuits = dict()
+        self._lock = threading.Lock()
+
+    def state(self, endpoint):
+        """
+        Circuit state of the endpoint
+
+        :param endpoint: endpoint, see ``request_endpoint``
+        :type endpoint: str
+        :return: ``CLOSED``, ``OPEN`` or ``HALF_OPEN``
+        :rtype: str
+        """
+        with self._lock:
+            _, opened_at, trial = self._circuits.get(
+                endpoint, (0, None, False)
+            )
+
+        if opened_at is None:
+            return self.CLOSED
+
+        if trial or time.monotonic() - opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+
+        return self.OPEN
+
+    def before_request(self, endpoint):
+        """
+        Check if a request to the endpoint is allowed
+
+        :param endpoint: endpoint, see ``request_endpoint``
+        :type endpoint: str
+        :return: None
+        :exception: ``ConnectionError`` if the circuit is open
+        """
+        with self._lock:
+            failures, opened_at, trial = self._circuits.get(
+                endpoint, (0, None, False)
+            )
+            if opened_at is None:
+                return
+
+            if not trial and (
+                time.monotonic() - opened_at >= self.reset_timeout
+            ):
+                self._circuits[endpoint] = (failures, opened_at, True)
+
+                return
+
+        raise ConnectionError(f"Circuit open for {endpoint}")
+
+    def record_success(self, endpoint):
+        """
+        Record a successful request, closing the circuit
+
+        :param endpoint: endpoint, see ``request_endpoint``
+        :type endpoint: str
+        :return: None
+        """
+        with self._lock:
+            self._circuits.pop(endpoint, None)
+
+    def record_failure(self, endpoint):
+        """
+        Record a failed request, opening the circuit after
+        ``failure_threshold`` consecutive failures or a failed trial
+
+        :param endpoint: endpoint, see ``request_endpoint``
+        :type endpoint: str
+        :return: None
+        """
+        with self._lock:
+            failures, opened_at, trial = self._circuits.get(
+                endpoint, (0, None, False)
+            )
+            failures += 1
+            if trial or failures >= self.failure_threshold:
+                opened_at = time.monotonic()
+
+            self._circuits[endpoint] = (failures, opened_at, False)
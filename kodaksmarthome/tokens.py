@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Kairo de Araujo
+#
+import json
+import os
+import threading
+
+
+class MemoryTokenStore:
+    """Token store kept in memory.
+
+    Shares the portal credentials between sessions of the same process. The
+    credentials are stored by account, so the sessions of several accounts
+    can share the store.
+    """
+
+    def __init__(self):
+
+        self._tokens = dict()
+        self._lock = threading.Lock()
+
+    def load(self, account):
+        """
+        Load the stored credentials of an account
+
+        :param account: account key, ``KodakSmartHome.account``
+        :type account: str
+        :return: credentials or None
+        :rtype: dict
+        """
+        with self._lock:
+            return self._tokens.get(account)
+
+    def save(self, account, token):
+        """
+        Store the credentials of an account
+
+        :param account: account key, ``KodakSmartHome.account``
+        :type account: str
+        :param token: credentials
+        :type token: dict
+        :return: None
+        """
+        with self._lock:
+            self._tokens[account] = token
+
+    def clear(self, account):
+        """
+        Remove the stored credentials of an account
+
+        :param account: account key, ``KodakSmartHome.account``
+        :type account: str
+        :return: None
+        """
+        with self._lock:
+            self._tokens.pop(account, None)
+
+
+class FileTokenStore:
+    """Token store kept in a JSON file.
+
+    Reuses the portal credentials between processes. The credentials are
+    stored by account, so the sessions of several accounts can share the
+    file. The file contains the portal tokens, keep it private.
+
+    :param path: JSON file path
+    :type path: str
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        """
+        Read the stored credentials by account. Called with the lock held.
+
+        :return: credentials by account
+        :rtype: dict
+        """
+        try:
+            with open(self.path) as token_file:
+                tokens = json.load(token_file)
+
+        except (OSError, ValueError):
+            return dict()
+
+        return tokens if isinstance(tokens, dict) else dict()
+
+    def _write(self, tokens):
+        """
+        Write the credentials by account, removing the file if there are
+        none. Called with the lock held.
+
+        The file is written to a temporary file and replaced, so a reader
+        never loads a partial file.
+
+        :param tokens: credentials by account
+        :type tokens: dict
+        :return: None
+        """
+        if not tokens:
+            try:
+                os.remove(self.path)
+
+            except FileNotFoundError:
+                pass
+
+            return
+
+        temporary_path = f"{self.path}.tmp"
+        descriptor = os.open(
+            temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+        )
+        with os.fdopen(descriptor, "w") as token_file:
+            json.dump(tokens, token_file)
+
+        os.replace(temporary_path, self.path)
+
+    def load(self, account):
+        """
+        Load the stored credentials of an account
+
+        :param account: account key, ``KodakSmartHome.account``
+        :type account: str
+        :return: credentials or None
+        :rtype: dict
+        """
+        with self._lock:
+            return self._read().get(account)
+
+    def save(self, account, token):
+        """
+        Store the credentials of an account
+
+        :param account: account key, ``KodakSmartHome.account``
+        :type account: str
+        :param token: credentials
+        :type token: dict
+        :return: None
+        """
+        with self._lock:
+            tokens = self._read()
+            tokens[account] = token
+            self._write(tokens)
+
+    def clear(self, account):
+        """
+        Remove the stored credentials of an account
+
+        :param account: account key, ``KodakSmartHome.account``
+        :type account: str
+        :return: None
+        """
+        with self._lock:
+            tokens = self._read()
+            if tokens.pop(account, None) is not None:
+                self._write(tokens)
@@ -90,7 +90,7 @@ setup(
     ],
     cmdclass={"test": PyTest},
     tests_require=test_requirements,
-    extras_require={},
+    extras_require={"async": ["aiohttp>=3.8"], "numpy": ["numpy"]},
     project_urls={
         'Documentation': 'https://python-kodaksmarthome.readthedocs.io',
         "Source": "https://github.com/kairoaraujo/python-kodaksmarthome"
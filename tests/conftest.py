@@ -50,3 +50,21 @@ def requests_session_mock_error():
             return_value=mock.PropertyMock(status_code=500)
         ),
     )
+
+
+class MockAiohttpResponse(MockRequestsResponse):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def json(self, content_type="application/json"):
+        return self.json_data
+
+    async def text(self):
+        return json.dumps(self.json_data)
+
+    @property
+    def status(self):
+        return self._status_code
@@ -3,12 +3,18 @@
 #
 # Copyright 2019, 2020 Kairo de Araujo
 #
+import threading
+
 import pytest
 import requests
 from unittest import mock
 
 from kodaksmarthome.api import KodakSmartHome
-from kodaksmarthome.constants import HTTP_CODE
+from kodaksmarthome.constants import (
+    DEVICE_EVENT_MOTION,
+    DEVICE_EVENT_SOUND,
+    HTTP_CODE,
+)
 from tests.conftest import MockRequestsResponse
 from tests.json_responses import (
     auth_response,
@@ -346,18 +352,36 @@ def test__get_devices(mock__http_request):
     assert test_devices == devices_response["data"]
 
 
+@mock.patch("kodaksmarthome.api.KodakSmartHome._login")
 @mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
-@mock.patch("kodaksmarthome.api.KodakSmartHome.connect")
-def test__get_devices_is_connected_false(mock__http_request, mock_connect):
+def test__get_devices_is_connected_false(mock__http_request, mock__login):
+
+    def login(preflight=True):
+        test_ksh.is_connected = True
 
-    mock__http_request.return_value = [devices_response, devices_response]
-    mock_connect.return_value = devices_response
+    mock__http_request.side_effect = [True, devices_response]
+    mock__login.side_effect = login
     test_ksh = KodakSmartHome("fake_user", "fake_pass")
     test_ksh.is_connected = False
 
     test_devices = test_ksh._get_devices()
 
-    assert test_devices == []
+    assert test_devices == devices_response["data"]
+    mock__login.assert_called_once()
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._login")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test__get_devices_session_lost(mock__http_request, mock__login):
+
+    mock__http_request.return_value = True
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.is_connected = False
+
+    with pytest.raises(ConnectionError):
+        test_ksh._get_devices()
+
+    assert test_ksh.devices == list()
 
 
 @mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
@@ -390,17 +414,252 @@ def test__get_events(mock__http_request):
 
 
 @mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
-@mock.patch("kodaksmarthome.api.KodakSmartHome.connect")
-def test__get_events_is_connected_false(mock__http_request, mock_connect):
+def test__get_events_max_workers(mock__http_request):
+    def events_by_device(method, url, headers=None):
+        device_id = url.split("deviceId=")[1].split("&")[0]
+        return {
+            "data": {
+                "total_events": 1,
+                "total_pages": 1,
+                "events": [
+                    {
+                        "id": device_id,
+                        "event_type": 1,
+                        "created_date": "2019-12-19T15:56:05.000Z",
+                    }
+                ],
+            }
+        }
+
+    mock__http_request.side_effect = events_by_device
+    test_ksh = KodakSmartHome("fake_user", "fake_pass", max_workers=4)
+    test_ksh.devices = [{"device_id": f"DEVICE{i}"} for i in range(12)]
+    test_ksh.is_connected = True
+    test_events = test_ksh._get_events()
+
+    assert [e["device_id"] for e in test_events] == [
+        f"DEVICE{i}" for i in range(12)
+    ]
+    assert [e["events"][0]["id"] for e in test_events] == [
+        f"DEVICE{i}" for i in range(12)
+    ]
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test__get_events_device_ids(mock__http_request):
+    def events_by_device(method, url, headers=None):
+        device_id = url.split("deviceId=")[1].split("&")[0]
+        return {
+            "data": {
+                "total_events": 1,
+                "total_pages": 1,
+                "events": [
+                    {
+                        "id": f"{device_id}_{mock__http_request.call_count}",
+                        "event_type": 1,
+                        "created_date": "2019-12-19T15:56:05.000Z",
+                    }
+                ],
+            }
+        }
+
+    mock__http_request.side_effect = events_by_device
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.devices = [{"device_id": f"DEVICE{i}"} for i in range(3)]
+    test_ksh.is_connected = True
+    test_ksh._get_events()
+    test_events = test_ksh._get_events(device_ids=["DEVICE1", "UNKNOWN"])
+
+    assert mock__http_request.call_count == 4
+    assert [e["device_id"] for e in test_events] == [
+        f"DEVICE{i}" for i in range(3)
+    ]
+    assert [e["events"][0]["id"] for e in test_events] == [
+        "DEVICE0_1",
+        "DEVICE1_4",
+        "DEVICE2_3",
+    ]
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test__get_events_max_workers_exception(mock__http_request):
+
+    mock__http_request.side_effect = ConnectionError
+    test_ksh = KodakSmartHome("fake_user", "fake_pass", max_workers=4)
+    test_ksh.devices = [{"device_id": f"DEVICE{i}"} for i in range(12)]
+    test_ksh.is_connected = True
+
+    with pytest.raises(ConnectionError):
+        test_ksh._get_events()
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test__get_events_max_page_workers(mock__http_request):
+    def events_by_page(method, url, headers=None):
+        page = int(url.split("page=")[1])
+        return {
+            "data": {
+                "total_events": 5,
+                "total_pages": 5,
+                "events": [
+                    {
+                        "id": f"EVENT{page}",
+                        "event_type": 1,
+                        "created_date": f"2019-12-{20 - page}T15:56:05.000Z",
+                    }
+                ],
+            }
+        }
+
+    mock__http_request.side_effect = events_by_page
+    test_ksh = KodakSmartHome("fake_user", "fake_pass", max_page_workers=3)
+    test_ksh.devices = devices_response["data"]["devices"]
+    test_ksh.is_connected = True
+    test_events = test_ksh._get_events()
+
+    assert mock__http_request.call_count == 5
+    assert [e["id"] for e in test_events[0]["events"]] == [
+        f"EVENT{page}" for page in range(1, 6)
+    ]
+
+
+def events_pages_responses(pages):
+    events = events_response["data"]["events"]
+
+    return [
+        {
+            "data": {
+                "total_events": len(events) * pages,
+                "total_pages": pages,
+                "events": events,
+            }
+        }
+        for _ in range(pages)
+    ]
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test_iter_events(mock__http_request):
+
+    mock__http_request.side_effect = events_pages_responses(2)
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.devices = devices_response["data"]["devices"]
+    test_ksh.is_connected = True
+    test_events = list(test_ksh.iter_events(event_type=DEVICE_EVENT_SOUND))
+
+    assert mock__http_request.call_count == 2
+    assert len(test_events) == 2
+    assert all(e["event_type"] == DEVICE_EVENT_SOUND for e in test_events)
+    assert all("created_timestamp" in e for e in test_events)
+    assert test_ksh.events == []
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test_iter_events_stop_early(mock__http_request):
+
+    mock__http_request.side_effect = events_pages_responses(3)
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.is_connected = True
+    test_events = test_ksh.iter_events(device_id="FAKEDEVICEID")
+
+    assert next(test_events) == events_response["data"]["events"][0]
+    mock__http_request.assert_called_once()
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._login")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test_iter_events_session_lost(mock__http_request, mock__login):
+
+    mock__http_request.side_effect = [True] + events_pages_responses(1)
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.is_connected = True
+    mock__login.side_effect = lambda: setattr(test_ksh, "is_connected", True)
+    test_events = list(test_ksh.iter_events(device_id="FAKEDEVICEID"))
+
+    assert len(test_events) == len(events_response["data"]["events"])
+    mock__login.assert_called_once()
+
+    mock__http_request.side_effect = [True, True]
+    with pytest.raises(ConnectionError):
+        list(test_ksh.iter_events(device_id="FAKEDEVICEID"))
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test__get_events_incremental(mock__http_request):
 
     mock__http_request.return_value = events_response
-    mock_connect.return_value = True
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.devices = devices_response["data"]["devices"]
+    test_ksh.is_connected = True
+    test_ksh._get_events()
+
+    assert test_ksh._events_index["FAKEDEVICEID"].high_water["event_type"] == 2
+
+    new_event = {
+        "id": "c9b5a3e0-2f3d-11ea-8790-3fdecad07f1c",
+        "event_type": 1,
+        "created_date": "2020-01-05T10:00:00.000Z",
+        "data": [],
+        "dv_data": None,
+    }
+    new_events_response = {
+        "data": {
+            "total_events": 13,
+            "total_pages": 3,
+            "events": [new_event] + events_response["data"]["events"],
+        }
+    }
+    mock__http_request.reset_mock()
+    mock__http_request.side_effect = [new_events_response]
+    test_events = test_ksh._get_events(incremental=True)
+
+    assert mock__http_request.call_count == 1
+    assert test_events[0]["events"] == (
+        [new_event] + events_response["data"]["events"]
+    )
+    assert test_ksh._events_index["FAKEDEVICEID"].high_water == new_event
+
+    mock__http_request.reset_mock()
+    mock__http_request.side_effect = [new_events_response]
+    test_events = test_ksh._get_events(incremental=True)
+
+    assert mock__http_request.call_count == 1
+    assert len(test_events[0]["events"]) == 7
+
+    newer_event = {**new_event, "id": "NEWER", "created_date": "2020-01-06"}
+    mock__http_request.reset_mock()
+    mock__http_request.side_effect = [
+        {
+            "data": {
+                "total_events": 14,
+                "total_pages": 3,
+                "events": [newer_event],
+            }
+        },
+        new_events_response,
+    ]
+    test_events = test_ksh._get_events(incremental=True)
+
+    # a page with only new events is followed by the next page
+    assert mock__http_request.call_count == 2
+    assert test_events[0]["events"][0]["id"] == "NEWER"
+    assert len(test_events[0]["events"]) == 8
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._login")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test__get_events_is_connected_false(mock__http_request, mock__login):
+
+    mock__http_request.return_value = True
     test_ksh = KodakSmartHome("fake_user", "fake_pass")
     test_ksh.devices = devices_response["data"]["devices"]
     test_ksh.is_connected = False
-    test_events = test_ksh._get_events()
 
-    assert test_events == [{"device_id": "FAKEDEVICEID", "events": []}]
+    with pytest.raises(ConnectionError):
+        test_ksh._get_events()
+
+    mock__login.assert_called_once()
+    assert test_ksh.events == list()
 
 
 @mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
@@ -465,6 +724,80 @@ def test_connect(
     assert test_ksh.connect() is None
 
 
+@mock.patch("kodaksmarthome.api.KodakSmartHome._options")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._token")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._authentication")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_devices")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_events")
+def test_connect_load_devices(
+    mock__get_events,
+    mock__get_devices,
+    mock__authentication,
+    mock__token,
+    mock__options,
+):
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.connect(load="devices", preflight=False)
+
+    mock__options.assert_not_called()
+    mock__token.assert_called_once()
+    mock__get_devices.assert_called_once()
+    mock__get_events.assert_not_called()
+
+    mock__get_devices.reset_mock()
+    test_ksh.connect(load="none")
+
+    mock__options.assert_called_once()
+    mock__get_devices.assert_not_called()
+    mock__get_events.assert_not_called()
+
+
+def test_connect_load_unsupported():
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+
+    with pytest.raises(AttributeError):
+        test_ksh.connect(load="everything")
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._login")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_devices")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_events")
+def test_connect_load_lazy(mock__get_events, mock__get_devices, mock__login):
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.connect(load="lazy")
+    test_ksh.is_connected = True
+
+    mock__get_devices.assert_not_called()
+    mock__get_events.assert_not_called()
+
+    test_ksh.get_devices
+
+    mock__get_devices.assert_called_once()
+    mock__get_events.assert_not_called()
+
+    test_ksh.get_events
+    test_ksh.get_motion_events()
+
+    mock__get_devices.assert_called_once()
+    mock__get_events.assert_called_once_with(incremental=False)
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._login")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_devices")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_events")
+def test_connect_load_lazy_update(
+    mock__get_events, mock__get_devices, mock__login
+):
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.connect(load="lazy")
+    test_ksh.is_connected = True
+    test_ksh.update()
+    test_ksh.get_events
+
+    mock__get_devices.assert_called_once()
+    mock__get_events.assert_called_once_with(incremental=True)
+
+
 @mock.patch("kodaksmarthome.api.KodakSmartHome._options")
 def test_connect_exception(mock__options,):
     mock__options.side_effect = requests.exceptions.ConnectionError
@@ -484,6 +817,99 @@ def test_disconnect(mock__http_request):
     assert test_ksh.is_connected is False
 
 
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test_disconnect_shared_http_session(mock__http_request):
+
+    http_session = mock.MagicMock()
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", http_session=http_session
+    )
+    test_ksh.disconnect()
+
+    assert test_ksh.http_session is http_session
+    http_session.close.assert_not_called()
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test_disconnect_shared_http_adapter(mock__http_request):
+
+    shared_adapter = mock.MagicMock(spec=requests.adapters.HTTPAdapter)
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", http_adapter=shared_adapter
+    )
+    test_ksh.disconnect()
+
+    shared_adapter.close.assert_not_called()
+    assert test_ksh.http_session.get_adapter("https://fake_url") is (
+        shared_adapter
+    )
+
+
+def test_http_adapter_pool_unsupported():
+
+    with pytest.raises(AttributeError):
+        KodakSmartHome(
+            "fake_user",
+            "fake_pass",
+            http_session=requests.Session(),
+            pool_maxsize=32,
+        )
+
+    with pytest.raises(AttributeError):
+        KodakSmartHome(
+            "fake_user",
+            "fake_pass",
+            http_adapter=requests.adapters.HTTPAdapter(),
+            pool_connections=4,
+        )
+
+
+def test_http_adapter_pool():
+    test_ksh = KodakSmartHome("fake_user", "fake_pass", pool_maxsize=32)
+    http_adapter = test_ksh.http_session.get_adapter("https://fake_url")
+
+    assert http_adapter._pool_maxsize == 32
+    assert test_ksh.http_session.get_adapter("http://fake_url") is (
+        http_adapter
+    )
+
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", max_workers=4, max_page_workers=8
+    )
+
+    assert test_ksh.http_session.get_adapter(
+        "https://fake_url"
+    )._pool_maxsize == 32
+
+    shared_adapter = requests.adapters.HTTPAdapter()
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", http_adapter=shared_adapter
+    )
+
+    assert test_ksh.http_session.get_adapter("https://fake_url") is (
+        shared_adapter
+    )
+
+
+@mock.patch("kodaksmarthome.api.requests")
+def test__http_request_timeout(mock_requests):
+
+    mock_requests.exceptions = requests.exceptions
+    mock_requests.Session.return_value = mock.MagicMock(
+        get=mock.MagicMock(
+            side_effect=requests.exceptions.ReadTimeout("timed out")
+        ),
+    )
+    test_ksh = KodakSmartHome("fake_user", "fake_pass", timeout=(3, 10))
+
+    with pytest.raises(ConnectionError):
+        test_ksh._http_request("GET", "http://fake=url")
+
+    assert mock_requests.Session.return_value.get.call_args[1][
+        "timeout"
+    ] == (3, 10)
+
+
 @mock.patch("kodaksmarthome.api.KodakSmartHome._get_devices")
 @mock.patch("kodaksmarthome.api.KodakSmartHome._get_events")
 def test_update(mock__get_devices, mock__get_events):
@@ -495,6 +921,200 @@ def test_update(mock__get_devices, mock__get_events):
     assert test_ksh.update() is None
 
 
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_devices")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_events")
+def test_update_incremental(mock__get_events, mock__get_devices):
+
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+
+    assert test_ksh.update() is None
+    mock__get_events.assert_called_once_with(incremental=True)
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_devices")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_events")
+def test_update_full(mock__get_events, mock__get_devices):
+
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+
+    assert test_ksh.update(full=True) is None
+    mock__get_events.assert_called_once_with(incremental=False)
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_devices")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_events")
+def test_update_device_ids(mock__get_events, mock__get_devices):
+
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+
+    assert test_ksh.update(device_ids=["DEVICE1"]) is None
+    mock__get_events.assert_called_once_with(
+        incremental=True, device_ids=["DEVICE1"]
+    )
+    mock__get_devices.assert_not_called()
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_devices")
+def test_update_devices(mock__get_devices):
+    mock__get_devices.return_value = devices_response["data"]["devices"]
+
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+
+    assert test_ksh.update_devices() == devices_response["data"]["devices"]
+
+
+def test_update_callbacks():
+    def get_devices():
+        test_ksh.devices = [
+            {"device_id": "DEVICE1", "is_online": False},
+            {"device_id": "DEVICE2"},
+        ]
+
+    def get_events(incremental=False):
+        test_ksh._new_events = {"DEVICE1": events_response["data"]["events"]}
+
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.devices = [
+        {"device_id": "DEVICE0"},
+        {"device_id": "DEVICE1", "is_online": True},
+    ]
+    test_ksh._get_devices = get_devices
+    test_ksh._get_events = get_events
+    motion_callback = mock.MagicMock()
+    sound_callback = mock.MagicMock()
+    device_callback = mock.MagicMock()
+    test_ksh.on_event(DEVICE_EVENT_MOTION, motion_callback)
+    test_ksh.on_event(DEVICE_EVENT_SOUND, sound_callback)
+    test_ksh.on_device_change(device_callback)
+    test_ksh.update()
+
+    motion_callback.assert_called_once_with(
+        "DEVICE1",
+        [e for e in events_response["data"]["events"] if e["event_type"] == 1],
+    )
+    sound_callback.assert_called_once_with(
+        "DEVICE1",
+        [e for e in events_response["data"]["events"] if e["event_type"] == 2],
+    )
+    device_callback.assert_called_once_with(
+        [{"device_id": "DEVICE2"}],
+        [{"device_id": "DEVICE1", "is_online": False}],
+        [{"device_id": "DEVICE0"}],
+    )
+
+    test_ksh._new_events = dict()
+    test_ksh.update_devices()
+
+    assert motion_callback.call_count == 1
+    assert sound_callback.call_count == 1
+    assert device_callback.call_count == 1
+
+
+def test_update_callbacks_session_lost():
+    def events_response_by_device(device_id, numbers):
+        return {
+            "data": {
+                "total_events": len(numbers),
+                "total_pages": 1,
+                "events": [
+                    {
+                        "id": f"{device_id}-{number}",
+                        "event_type": 1,
+                        "created_date": f"2019-12-{10 + number}T15:56:05Z",
+                    }
+                    for number in numbers
+                ],
+            }
+        }
+
+    for max_workers in (None, 3):
+        responses = {f"D{i}": [[2, 1, 0]] for i in range(3)}
+        test_ksh = KodakSmartHome(
+            "fake_user", "fake_pass", max_workers=max_workers
+        )
+
+        def http_request(method, url, headers=None):
+            device_id = url.split("deviceId=")[1].split("&")[0]
+            numbers = responses[device_id].pop(0)
+            if numbers is None:
+                # the portal session is lost (401)
+                return True
+
+            return events_response_by_device(device_id, numbers)
+
+        def login(preflight=True):
+            test_ksh.is_connected = True
+
+        test_ksh._http_request = http_request
+        test_ksh._login = login
+        test_ksh._get_devices = mock.MagicMock()
+        test_ksh.devices = [{"device_id": f"D{i}"} for i in range(3)]
+        test_ksh.is_connected = True
+        test_ksh._get_events()
+        callback = mock.MagicMock()
+        test_ksh.on_event(DEVICE_EVENT_MOTION, callback)
+        # with max_workers, D0 and D2 can be fetched again after the login
+        responses = {
+            "D0": [[10, 2, 1, 0], [10, 2, 1, 0]],
+            "D1": [None, [10, 2, 1, 0]],
+            "D2": [[10, 2, 1, 0], [10, 2, 1, 0]],
+        }
+        test_ksh.update()
+
+        assert sorted(
+            (c.args[0], [e["id"] for e in c.args[1]])
+            for c in callback.call_args_list
+        ) == [("D0", ["D0-10"]), ("D1", ["D1-10"]), ("D2", ["D2-10"])]
+        assert [len(e["events"]) for e in test_ksh.events] == [4, 4, 4]
+
+
+def test__get_events_session_lost_concurrent():
+    lost = threading.Event()
+
+    def http_request(method, url, headers=None):
+        device_id, page = url.split("deviceId=")[1].split("&page=")
+        lost_page = device_id == "A" and page == "2"
+        if lost_page and test_ksh._login.call_count == 0:
+            # the portal session is lost (401)
+            test_ksh.is_connected = False
+            lost.set()
+            return True
+
+        if device_id == "B":
+            # B gets a response after A lost the session
+            assert lost.wait(timeout=5)
+
+        test_ksh.is_connected = True
+        return {
+            "data": {
+                "total_events": 1,
+                "total_pages": 2 if device_id == "A" else 1,
+                "events": [
+                    {
+                        "id": f"{device_id}-{page}",
+                        "event_type": 1,
+                        "created_date": f"2019-12-1{page}T15:56:05Z",
+                    }
+                ],
+            }
+        }
+
+    def login(preflight=True):
+        test_ksh.is_connected = True
+
+    test_ksh = KodakSmartHome("fake_user", "fake_pass", max_workers=2)
+    test_ksh._http_request = http_request
+    test_ksh._login = mock.MagicMock(side_effect=login)
+    test_ksh.devices = [{"device_id": "B"}, {"device_id": "A"}]
+    test_ksh.is_connected = True
+    test_ksh._get_events()
+
+    test_ksh._login.assert_called_once_with()
+    assert [
+        [event["id"] for event in e["events"]] for e in test_ksh.events
+    ] == [["B-1"], ["A-1", "A-2"]]
+
+
 def test_get_devices():
     test_ksh = KodakSmartHome("fake_user", "fake_pass")
     test_ksh.is_connected = True
@@ -559,6 +1179,21 @@ def test__filter_event_type_none():
     assert len(test_result) == 2
 
 
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test__filter_event_type_indexed(mock__http_request):
+
+    mock__http_request.return_value = events_response
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.devices = devices_response["data"]["devices"]
+    test_ksh.is_connected = True
+    test_ksh._get_events()
+    events_index = test_ksh._events_index
+
+    assert len(test_ksh._filter_event_type(device_id="FAKEDEVICEID")) == 2
+    assert len(test_ksh._filter_event_type(event_type=DEVICE_EVENT_SOUND)) == 1
+    assert test_ksh._events_index is events_index
+
+
 def test__filter_event_type_disconnected():
     test_ksh = KodakSmartHome("fake_user", "fake_pass")
     test_ksh.is_connected = False
@@ -581,6 +1216,73 @@ def test_get_motion_events():
     assert len(test_ksh.get_motion_events(device_id="FAKEDEVICEID")) == 2
 
 
+def test_get_motion_events_newest_first():
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.is_connected = True
+    test_ksh.events = [
+        {
+            "device_id": devices_response["data"]["devices"][0]["device_id"],
+            "events": events_response["data"]["events"],
+        }
+    ]
+    test_ksh.devices = devices_response["data"]["devices"]
+
+    events = test_ksh.get_motion_events(newest_first=True)
+
+    assert [e["created_date"] for e in events] == [
+        "2019-12-19T15:56:05.000Z",
+        "2019-12-19T15:53:16.000Z",
+    ]
+    assert test_ksh.get_events_device(
+        device_id="FAKEDEVICEID", newest_first=True
+    )[0]["created_date"] == "2020-01-04T22:01:36.000Z"
+
+
+def test_get_events_range_all_devices():
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.is_connected = True
+    other_event = {
+        "id": "c9b5a3e0-2f3d-11ea-8790-3fdecad07f1c",
+        "event_type": 1,
+        "created_date": "2019-12-19T15:55:00.000Z",
+    }
+    test_ksh.events = [
+        {
+            "device_id": "FAKEDEVICEID",
+            "events": events_response["data"]["events"],
+        },
+        {"device_id": "OTHERDEVICEID", "events": [other_event]},
+    ]
+    test_ksh.devices = [
+        {"device_id": "FAKEDEVICEID"},
+        {"device_id": "OTHERDEVICEID"},
+    ]
+
+    events = test_ksh.get_motion_events(limit=2)
+
+    assert [e["created_date"] for e in events] == [
+        "2019-12-19T15:55:00.000Z",
+        "2019-12-19T15:56:05.000Z",
+    ]
+    assert test_ksh.get_motion_events(
+        since="2019-12-19T15:54:00.000Z",
+        until="2019-12-19T15:56:00.000Z",
+        newest_first=True,
+    ) == [other_event]
+    assert len(
+        test_ksh.get_events_device(
+            device_id="FAKEDEVICEID", since="2019-12-19T16:00:00.000Z"
+        )
+    ) == 3
+    assert test_ksh.get_events_device(limit=1) == [
+        {
+            "device_id": "FAKEDEVICEID",
+            "events": [events_response["data"]["events"][-1]],
+        },
+        {"device_id": "OTHERDEVICEID", "events": [other_event]},
+    ]
+
+
 def test_get_motion_events_invalid_device_id():
     test_ksh = KodakSmartHome("fake_user", "fake_pass")
     test_ksh.is_connected = True
@@ -0,0 +1,502 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import asyncio
+
+import aiohttp
+import pytest
+from unittest import mock
+
+from kodaksmarthome.async_api import AsyncKodakSmartHome
+from kodaksmarthome.constants import HTTP_CODE
+from tests.conftest import MockAiohttpResponse
+from tests.json_responses import (
+    auth_response,
+    devices_response,
+    events_response,
+)
+
+
+class TestAsyncKodakSmartHome:
+    def test_unsupported_region(self):
+
+        with pytest.raises(AttributeError):
+            AsyncKodakSmartHome("fake_user", "fake_pass", region="BR")
+
+    @mock.patch("kodaksmarthome.async_api.aiohttp", None)
+    def test_aiohttp_not_installed(self):
+
+        with pytest.raises(ImportError):
+            AsyncKodakSmartHome("fake_user", "fake_pass")
+
+
+def test__http_request_methods():
+
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh.http_session = mock.MagicMock(
+        closed=False,
+        request=mock.MagicMock(
+            return_value=MockAiohttpResponse(
+                {"key": "value"},
+                HTTP_CODE.OK,
+                {"Content-Type": "application/json"},
+            )
+        ),
+    )
+
+    assert asyncio.run(test_ksh._http_request("GET", "http://fake=url")) == {
+        "key": "value"
+    }
+    assert test_ksh.is_connected is True
+
+    with pytest.raises(AttributeError):
+        asyncio.run(test_ksh._http_request("INVALID", "http://fake=url"))
+
+
+def test__http_request_session_exception():
+
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh.http_session = mock.MagicMock(
+        closed=False,
+        request=mock.MagicMock(side_effect=aiohttp.ClientConnectionError),
+    )
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(test_ksh._http_request("GET", "http://fake=url"))
+
+
+def test__http_request_not_200_401_http_code():
+
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh.http_session = mock.MagicMock(
+        closed=False,
+        request=mock.MagicMock(
+            return_value=MockAiohttpResponse(
+                None, HTTP_CODE.INTERNAL_SERVER_ERROR, {}
+            )
+        ),
+    )
+    test_ksh.is_connected = True
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(test_ksh._http_request("GET", "http://fake=url"))
+
+    assert test_ksh.is_connected is False
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+def test__token(mock__http_request):
+
+    mock__http_request.return_value = {
+        "access_token": "access_token",
+        "token_type": "token_type",
+        "refresh_token": "refresh_token",
+        "expires_in": "expires_in",
+        "scope": "scope",
+        "account_info": "account_info",
+        "web_urls": "web_urls",
+    }
+
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+
+    assert asyncio.run(test_ksh._token())
+    assert test_ksh.token == "access_token"
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+def test__authentication(mock__http_request):
+
+    mock__http_request.return_value = auth_response
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh.http_session = mock.MagicMock(
+        cookie_jar=mock.MagicMock(
+            filter_cookies=mock.MagicMock(
+                return_value={"JSESSIONID": mock.MagicMock(value="cookie")}
+            )
+        )
+    )
+
+    assert asyncio.run(test_ksh._authentication())
+    assert test_ksh.cookie == "cookie"
+    assert test_ksh.user_id == auth_response["data"]["id"]
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+def test__get_devices(mock__http_request):
+
+    mock__http_request.return_value = devices_response
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh.is_connected = True
+
+    test_devices = asyncio.run(test_ksh._get_devices())
+
+    assert test_devices == devices_response["data"]
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+def test__get_events(mock__http_request):
+
+    mock__http_request.return_value = events_response
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh.devices = devices_response["data"]["devices"]
+    test_ksh.is_connected = True
+    test_events = asyncio.run(test_ksh._get_events())
+
+    expected_result = [
+        {
+            "device_id": devices_response["data"]["devices"][0]["device_id"],
+            "events": events_response["data"]["events"],
+        }
+    ]
+
+    assert test_events == expected_result
+    assert len(test_ksh.get_motion_events(device_id="FAKEDEVICEID")) == 2
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+def test_iter_events(mock__http_request):
+
+    page = {
+        "data": {
+            "total_events": 12,
+            "total_pages": 2,
+            "events": events_response["data"]["events"],
+        }
+    }
+    mock__http_request.side_effect = [page, page]
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh.devices = devices_response["data"]["devices"]
+    test_ksh.is_connected = True
+
+    async def iter_events():
+        return [e async for e in test_ksh.iter_events(event_type=1)]
+
+    test_events = asyncio.run(iter_events())
+
+    assert mock__http_request.await_count == 2
+    assert len(test_events) == 4
+    assert test_ksh.events == []
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+def test__get_events_max_workers(mock__http_request):
+    async def events_by_device(method, url, headers=None):
+        device_id = url.split("deviceId=")[1].split("&")[0]
+        return {
+            "data": {
+                "total_events": 1,
+                "total_pages": 1,
+                "events": [
+                    {
+                        "id": device_id,
+                        "event_type": 1,
+                        "created_date": "2019-12-19T15:56:05.000Z",
+                    }
+                ],
+            }
+        }
+
+    mock__http_request.side_effect = events_by_device
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass", max_workers=4)
+    test_ksh.devices = [{"device_id": f"DEVICE{i}"} for i in range(12)]
+    test_ksh.is_connected = True
+    test_events = asyncio.run(test_ksh._get_events())
+
+    assert [e["device_id"] for e in test_events] == [
+        f"DEVICE{i}" for i in range(12)
+    ]
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+def test__get_events_max_page_workers(mock__http_request):
+    async def events_by_page(method, url, headers=None):
+        page = int(url.split("page=")[1])
+        return {
+            "data": {
+                "total_events": 5,
+                "total_pages": 5,
+                "events": [
+                    {
+                        "id": f"EVENT{page}",
+                        "event_type": 1,
+                        "created_date": f"2019-12-{20 - page}T15:56:05.000Z",
+                    }
+                ],
+            }
+        }
+
+    mock__http_request.side_effect = events_by_page
+    test_ksh = AsyncKodakSmartHome(
+        "fake_user", "fake_pass", max_page_workers=3
+    )
+    test_ksh.devices = devices_response["data"]["devices"]
+    test_ksh.is_connected = True
+    test_events = asyncio.run(test_ksh._get_events())
+
+    assert [e["id"] for e in test_events[0]["events"]] == [
+        f"EVENT{page}" for page in range(1, 6)
+    ]
+
+
+def test__get_events_pages_session_lost():
+    async def http_request(method, url, headers=None):
+        page = int(url.split("page=")[1])
+        if page == 2:
+            test_ksh.is_connected = False
+            raise ConnectionError("auth error")
+
+        await asyncio.sleep(0.01)
+        test_ksh.is_connected = True
+        requested.append(page)
+        return {"data": {"events": list()}}
+
+    async def get_events_pages():
+        events_responses = await test_ksh._get_events_pages(
+            "DEVICE1", dict(), range(2, 4)
+        )
+        # the other pages are not requested in the background
+        assert requested == [3]
+
+        return events_responses
+
+    requested = list()
+    test_ksh = AsyncKodakSmartHome(
+        "fake_user", "fake_pass", max_page_workers=2
+    )
+    test_ksh._http_request = http_request
+
+    assert asyncio.run(get_events_pages()) == [
+        True,
+        {"data": {"events": list()}},
+    ]
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._options")
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._token")
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._authentication")
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._get_devices")
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._get_events")
+def test_connect(
+    mock__get_events,
+    mock__get_devices,
+    mock__authentication,
+    mock__token,
+    mock__options,
+):
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+
+    assert asyncio.run(test_ksh.connect()) is None
+    mock__options.assert_awaited_once()
+    mock__get_events.assert_awaited_once()
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._options")
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._token")
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._authentication")
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._get_devices")
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._get_events")
+def test_connect_load_devices(
+    mock__get_events,
+    mock__get_devices,
+    mock__authentication,
+    mock__token,
+    mock__options,
+):
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    asyncio.run(test_ksh.connect(load="devices", preflight=False))
+
+    mock__options.assert_not_awaited()
+    mock__token.assert_awaited_once()
+    mock__get_devices.assert_awaited_once()
+    mock__get_events.assert_not_awaited()
+
+
+def test_connect_load_lazy():
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+
+    with pytest.raises(AttributeError):
+        asyncio.run(test_ksh.connect(load="lazy"))
+
+
+def test__get_http_session_options():
+    connector = mock.MagicMock()
+
+    async def get_http_sessions():
+        test_ksh = AsyncKodakSmartHome(
+            "fake_user", "fake_pass", pool_maxsize=8, timeout=(3, 10)
+        )
+        http_session = test_ksh._get_http_session()
+        limit_per_host = http_session.connector.limit_per_host
+        timeout = http_session.timeout
+        await http_session.close()
+
+        shared_ksh = AsyncKodakSmartHome(
+            "fake_user", "fake_pass", connector=connector
+        )
+        with mock.patch(
+            "kodaksmarthome.async_api.aiohttp.ClientSession"
+        ) as mock_client_session:
+            shared_ksh._get_http_session()
+
+        return limit_per_host, timeout, mock_client_session.call_args
+
+    limit_per_host, timeout, call_args = asyncio.run(get_http_sessions())
+
+    assert limit_per_host == 8
+    assert (timeout.sock_connect, timeout.sock_read) == (3, 10)
+    assert call_args[1]["connector"] is connector
+    assert call_args[1]["connector_owner"] is False
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+def test_disconnect_shared_http_session(mock__http_request):
+
+    http_session = mock.AsyncMock()
+    test_ksh = AsyncKodakSmartHome(
+        "fake_user", "fake_pass", http_session=http_session
+    )
+    asyncio.run(test_ksh.disconnect())
+
+    assert test_ksh._get_http_session() is http_session
+    http_session.close.assert_not_awaited()
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+def test_disconnect(mock__http_request):
+
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh.http_session = mock.AsyncMock()
+    test_ksh.is_connected = True
+    asyncio.run(test_ksh.disconnect())
+
+    assert test_ksh.is_connected is False
+    test_ksh.http_session.close.assert_awaited_once()
+
+
+def test_update_callbacks():
+    async def get_devices():
+        test_ksh.devices = [{"device_id": "DEVICE1"}]
+
+    async def get_events(incremental=False):
+        test_ksh._new_events = {"DEVICE1": events_response["data"]["events"]}
+
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh._get_devices = get_devices
+    test_ksh._get_events = get_events
+    event_callback = mock.AsyncMock()
+    device_callback = mock.AsyncMock()
+    test_ksh.on_event(None, event_callback)
+    test_ksh.on_device_change(device_callback)
+    asyncio.run(test_ksh.update())
+
+    event_callback.assert_awaited_once_with(
+        "DEVICE1", events_response["data"]["events"]
+    )
+    device_callback.assert_awaited_once_with(
+        [{"device_id": "DEVICE1"}], list(), list()
+    )
+
+
+def test__get_events_session_lost_concurrent():
+    async def http_request(method, url, headers=None):
+        device_id, page = url.split("deviceId=")[1].split("&page=")
+        lost_page = device_id == "A" and page == "2"
+        if lost_page and test_ksh._login.call_count == 0:
+            # the portal session is lost (401)
+            test_ksh.is_connected = False
+            lost.set()
+            return True
+
+        if device_id == "B":
+            # B gets a response after A lost the session
+            await asyncio.wait_for(lost.wait(), timeout=5)
+
+        test_ksh.is_connected = True
+        return {
+            "data": {
+                "total_events": 1,
+                "total_pages": 2 if device_id == "A" else 1,
+                "events": [
+                    {
+                        "id": f"{device_id}-{page}",
+                        "event_type": 1,
+                        "created_date": f"2019-12-1{page}T15:56:05Z",
+                    }
+                ],
+            }
+        }
+
+    async def login(preflight=True):
+        test_ksh.is_connected = True
+
+    lost = asyncio.Event()
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass", max_workers=2)
+    test_ksh._http_request = http_request
+    test_ksh._login = mock.AsyncMock(side_effect=login)
+    test_ksh.devices = [{"device_id": "B"}, {"device_id": "A"}]
+    test_ksh.is_connected = True
+    asyncio.run(test_ksh._get_events())
+
+    test_ksh._login.assert_awaited_once_with()
+    assert [
+        [event["id"] for event in e["events"]] for e in test_ksh.events
+    ] == [["B-1"], ["A-1", "A-2"]]
+
+
+def test_update_callbacks_session_lost():
+    def events_response_by_device(device_id, numbers):
+        return {
+            "data": {
+                "total_events": len(numbers),
+                "total_pages": 1,
+                "events": [
+                    {
+                        "id": f"{device_id}-{number}",
+                        "event_type": 1,
+                        "created_date": f"2019-12-{10 + number}T15:56:05Z",
+                    }
+                    for number in numbers
+                ],
+            }
+        }
+
+    async def http_request(method, url, headers=None):
+        device_id = url.split("deviceId=")[1].split("&")[0]
+        numbers = responses[device_id].pop(0)
+        if numbers is None:
+            # the portal session is lost (401)
+            return True
+
+        return events_response_by_device(device_id, numbers)
+
+    async def login(preflight=True):
+        test_ksh.is_connected = True
+
+    for max_workers in (None, 3):
+        responses = {f"D{i}": [[2, 1, 0]] for i in range(3)}
+        test_ksh = AsyncKodakSmartHome(
+            "fake_user", "fake_pass", max_workers=max_workers
+        )
+        test_ksh._http_request = http_request
+        test_ksh._login = login
+        test_ksh._get_devices = mock.AsyncMock()
+        test_ksh.devices = [{"device_id": f"D{i}"} for i in range(3)]
+        test_ksh.is_connected = True
+        asyncio.run(test_ksh._get_events())
+        callback = mock.MagicMock()
+        test_ksh.on_event(1, callback)
+        # with max_workers, D0 and D2 can be fetched again after the login
+        responses = {
+            "D0": [[10, 2, 1, 0], [10, 2, 1, 0]],
+            "D1": [None, [10, 2, 1, 0]],
+            "D2": [[10, 2, 1, 0], [10, 2, 1, 0]],
+        }
+        asyncio.run(test_ksh.update())
+
+        assert sorted(
+            (c.args[0], [e["id"] for e in c.args[1]])
+            for c in callback.call_args_list
+        ) == [("D0", ["D0-10"]), ("D1", ["D1-10"]), ("D2", ["D2-10"])]
+        assert [len(e["events"]) for e in test_ksh.events] == [4, 4, 4]
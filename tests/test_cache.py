@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import asyncio
+import copy
+import threading
+
+from unittest import mock
+
+from kodaksmarthome.api import KodakSmartHome
+from kodaksmarthome.async_api import AsyncKodakSmartHome
+from kodaksmarthome.cache import EventCache
+from kodaksmarthome.models import MODEL_COMPACT, Event, load_events
+from tests.json_responses import devices_response, events_response
+
+
+def test_event_cache_devices(tmp_path):
+    cache = EventCache(str(tmp_path / "cache.db"))
+    devices = devices_response["data"]["devices"]
+    cache.save_devices("EU/fake_user", devices)
+
+    assert cache.load_devices("EU/fake_user") == devices
+    assert cache.load_devices("EU/other_user") == []
+
+    cache.save_devices("EU/fake_user", [])
+
+    assert cache.load_devices("EU/fake_user") == []
+
+
+def test_event_cache_events(tmp_path):
+    cache = EventCache(str(tmp_path / "cache.db"))
+    events = copy.deepcopy(events_response["data"]["events"])
+    cache.save_events("EU/fake_user", "FAKEDEVICEID", events[3:])
+    cache.save_events("EU/fake_user", "FAKEDEVICEID", events)
+
+    cached_events = cache.load_events("EU/fake_user", "FAKEDEVICEID")
+
+    assert cached_events == sorted(
+        events, key=lambda e: e["created_timestamp"], reverse=True
+    )
+    assert cache.load_events("EU/fake_user", "OTHERDEVICEID") == []
+
+    cache.close()
+    cache.close()
+
+    assert cache.load_events("EU/fake_user", "FAKEDEVICEID") == cached_events
+
+    cache = EventCache(str(tmp_path / "cache.db"))
+
+    assert cache.load_events("EU/fake_user", "FAKEDEVICEID") == cached_events
+
+
+def test_event_cache_compact_model(tmp_path):
+    cache = EventCache(str(tmp_path / "cache.db"))
+    events = load_events(
+        copy.deepcopy(events_response["data"]["events"]), MODEL_COMPACT
+    )
+    cache.save_events("EU/fake_user", "FAKEDEVICEID", events)
+
+    cached_events = load_events(
+        cache.load_events("EU/fake_user", "FAKEDEVICEID"), MODEL_COMPACT
+    )
+
+    assert all(isinstance(e, Event) for e in cached_events)
+    assert sorted(e.raw["id"] for e in cached_events) == sorted(
+        e["id"] for e in events
+    )
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._authentication")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._token")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._options")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test_connect_warm_start(
+    mock__http_request,
+    mock__options,
+    mock__token,
+    mock__authentication,
+    tmp_path,
+):
+    def connect(test_ksh):
+        mock__authentication.side_effect = lambda: setattr(
+            test_ksh, "is_connected", True
+        )
+        test_ksh.connect()
+
+    cache_path = str(tmp_path / "cache.db")
+    devices = {"data": devices_response["data"]["devices"]}
+    mock__http_request.side_effect = [devices, events_response]
+    connect(KodakSmartHome("fake_user", "fake_pass", cache_path=cache_path))
+
+    assert mock__http_request.call_count == 2
+
+    new_event = {
+        "id": "c9b5a3e0-2f3d-11ea-8790-3fdecad07f1c",
+        "event_type": 1,
+        "created_date": "2020-01-05T10:00:00.000Z",
+        "data": [],
+        "dv_data": None,
+    }
+    new_events_response = {
+        "data": {
+            "total_events": 13,
+            "total_pages": 3,
+            "events": [new_event] + events_response["data"]["events"][:5],
+        }
+    }
+    mock__http_request.reset_mock()
+    mock__http_request.side_effect = [devices, new_events_response]
+    test_ksh = KodakSmartHome("fake_user", "fake_pass", cache_path=cache_path)
+    connect(test_ksh)
+
+    assert mock__http_request.call_count == 2
+    assert test_ksh.get_events_device("FAKEDEVICEID", newest_first=True) == (
+        test_ksh.cache.load_events("EU/fake_user", "FAKEDEVICEID")
+    )
+    assert test_ksh.get_events_device("FAKEDEVICEID")[-1] == new_event
+    assert len(test_ksh.get_events_device("FAKEDEVICEID")) == 7
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test_disconnect_closes_cache(mock__http_request, tmp_path):
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", cache_path=str(tmp_path / "cache.db")
+    )
+    test_ksh.disconnect()
+
+    assert test_ksh.cache._connection is None
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._login")
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+def test_async_connect_cache(mock__http_request, mock__login, tmp_path):
+    async def connect_and_disconnect():
+        await test_ksh.connect()
+        await test_ksh.disconnect()
+
+    def save_events(*args):
+        threads.append(threading.get_ident())
+        save_cache_events(*args)
+
+    threads = list()
+    test_ksh = AsyncKodakSmartHome(
+        "fake_user", "fake_pass", cache_path=str(tmp_path / "cache.db")
+    )
+    test_ksh.http_session = mock.AsyncMock()
+    save_cache_events = test_ksh.cache.save_events
+    test_ksh.cache.save_events = save_events
+    mock__http_request.side_effect = [
+        {"data": devices_response["data"]["devices"]},
+        copy.deepcopy(events_response),
+        None,
+    ]
+    test_ksh.is_connected = True
+    asyncio.run(connect_and_disconnect())
+
+    # the SQLite queries do not run in the event loop thread
+    assert threads and threading.get_ident() not in threads
+    assert test_ksh.cache._connection is None
+    assert len(
+        test_ksh.cache.load_events("EU/fake_user", "FAKEDEVICEID")
+    ) == len(events_response["data"]["events"])
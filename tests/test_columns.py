@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import pytest
+from unittest import mock
+
+from kodaksmarthome.api import KodakSmartHome
+from kodaksmarthome.columns import EventColumns
+from kodaksmarthome.constants import (
+    DEVICE_EVENT_BATTERY,
+    DEVICE_EVENT_MOTION,
+    DEVICE_EVENT_SOUND,
+)
+from kodaksmarthome.events import DeviceEvents
+from tests.json_responses import events_response
+
+HOUR_15 = 1576767600000
+HOUR_16 = 1576771200000
+HOUR_22 = 1578175200000
+
+
+@pytest.fixture(params=["numpy", "array"])
+def event_columns(request):
+    devices_events = [
+        DeviceEvents("FAKEDEVICEID", events_response["data"]["events"]),
+        DeviceEvents("OTHERDEVICEID"),
+    ]
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        yield EventColumns.from_devices_events(devices_events)
+
+    else:
+        with mock.patch("kodaksmarthome.columns.numpy", None):
+            yield EventColumns.from_devices_events(devices_events)
+
+
+def test_count_by_type(event_columns):
+
+    assert len(event_columns) == 6
+    assert event_columns.count_by_type() == {
+        DEVICE_EVENT_MOTION: 2,
+        DEVICE_EVENT_SOUND: 1,
+        DEVICE_EVENT_BATTERY: 3,
+    }
+
+
+def test_count_by_hour(event_columns):
+
+    assert event_columns.count_by_hour() == {
+        HOUR_15: 3,
+        HOUR_16: 2,
+        HOUR_22: 1,
+    }
+    assert event_columns.count_by_hour(DEVICE_EVENT_MOTION) == {HOUR_15: 2}
+
+
+def test_count_by_device(event_columns):
+
+    assert event_columns.count_by_device() == {
+        "FAKEDEVICEID": 6,
+        "OTHERDEVICEID": 0,
+    }
+    assert event_columns.count_by_device(DEVICE_EVENT_SOUND) == {
+        "FAKEDEVICEID": 1,
+        "OTHERDEVICEID": 0,
+    }
+
+
+def test_file_size_by_device(event_columns):
+
+    assert event_columns.file_size_by_device() == {
+        "FAKEDEVICEID": 2574730 + 308288 + 1152934 + 71552,
+        "OTHERDEVICEID": 0,
+    }
+    assert event_columns.file_size_by_device(DEVICE_EVENT_BATTERY) == {
+        "FAKEDEVICEID": 0,
+        "OTHERDEVICEID": 0,
+    }
+
+
+def test_get_event_columns():
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.is_connected = True
+    test_ksh.events = [
+        {
+            "device_id": "FAKEDEVICEID",
+            "events": events_response["data"]["events"],
+        }
+    ]
+
+    event_columns = test_ksh.get_event_columns()
+
+    assert event_columns.count_by_device() == {"FAKEDEVICEID": 6}
+    assert test_ksh.get_event_columns() is event_columns
+
+
+def test_get_event_columns_disconnected():
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+
+    with pytest.raises(ConnectionError):
+        test_ksh.get_event_columns()
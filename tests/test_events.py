@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import copy
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from kodaksmarthome.constants import (
+    DEVICE_EVENT_BATTERY,
+    DEVICE_EVENT_MOTION,
+    DEVICE_EVENT_SOUND,
+)
+from kodaksmarthome.events import (
+    DeviceEvents,
+    SortedEvents,
+    add_timestamps,
+    created_timestamp,
+    event_key,
+    parse_date,
+)
+from tests.json_responses import events_response
+
+
+def test_event_key():
+    event = events_response["data"]["events"][0]
+
+    assert event_key(event) == event["id"]
+
+
+def test_event_key_without_id():
+    event = {"event_type": 7, "created_date": "2019-12-19T16:24:48.000Z"}
+
+    assert event_key(event) == event_key(dict(event))
+    assert event_key(event) != event_key({**event, "event_type": 1})
+
+
+def test_device_events_without_id():
+    event = {
+        "event_type": 1,
+        "created_date": "2019-12-19T16:24:48.000Z",
+        "data": [{"id": "MEDIA1", "created_date": "2019-12-19T16:24:50Z"}],
+    }
+    device_events = DeviceEvents("FAKEDEVICEID", [copy.deepcopy(event)])
+
+    assert device_events.merge([copy.deepcopy(event)]) == []
+    assert not device_events.is_new(copy.deepcopy(event))
+    assert len(device_events) == 1
+
+
+def test_device_events_add():
+    events = events_response["data"]["events"]
+    device_events = DeviceEvents("FAKEDEVICEID", events)
+
+    assert device_events.add(copy.deepcopy(events)) == []
+    assert device_events.events == events
+    assert len(device_events) == 6
+    assert events[0] in device_events
+    assert device_events.high_water["event_type"] == 2
+
+
+def test_device_events_merge():
+    events = events_response["data"]["events"]
+    device_events = DeviceEvents("FAKEDEVICEID", events[2:])
+    new_event = {
+        "id": "c9b5a3e0-2f3d-11ea-8790-3fdecad07f1c",
+        "event_type": 1,
+        "created_date": "2020-01-05T10:00:00.000Z",
+    }
+
+    assert device_events.merge([new_event] + events) == (
+        [new_event] + events[:2]
+    )
+    assert device_events.events == [new_event] + events[:2] + events[2:]
+    assert device_events.high_water == new_event
+
+
+def test_device_events_is_new():
+    events = events_response["data"]["events"]
+    device_events = DeviceEvents("FAKEDEVICEID")
+
+    assert device_events.is_new(events[0])
+
+    device_events.add(events)
+
+    assert device_events.is_new(events[0]) is False
+    assert device_events.is_new(
+        {"id": "other", "created_date": "2020-01-04T22:01:36.000Z"}
+    )
+    assert device_events.is_new(
+        {"id": "newer", "created_date": "2020-01-05T10:00:00.000Z"}
+    )
+
+
+def test_device_events_get():
+    events = events_response["data"]["events"]
+    device_events = DeviceEvents("FAKEDEVICEID", events[1:])
+    device_events.merge(events)
+
+    assert device_events.get() == sorted(events, key=created_timestamp)
+    assert device_events.get(newest_first=True) == sorted(
+        events, key=created_timestamp, reverse=True
+    )
+    assert device_events.get(DEVICE_EVENT_MOTION) == [events[4], events[2]]
+    assert device_events.get(DEVICE_EVENT_BATTERY) == [
+        events[3],
+        events[1],
+        events[0],
+    ]
+    assert device_events.get(DEVICE_EVENT_SOUND) == [events[5]]
+    assert device_events.get(99) == []
+
+
+def test_device_events_get_range():
+    events = events_response["data"]["events"]
+    device_events = DeviceEvents("FAKEDEVICEID", events)
+
+    assert device_events.get(
+        since="2019-12-19T15:54:00.000Z", until="2019-12-19T16:04:44.000Z"
+    ) == [events[3], events[2], events[1]]
+    assert device_events.get(
+        DEVICE_EVENT_BATTERY,
+        since=datetime(2019, 12, 19, 15, 54, tzinfo=timezone.utc),
+        limit=2,
+        newest_first=True,
+    ) == [events[0], events[1]]
+    assert device_events.get(until=datetime(2019, 12, 19, 15, 54)) == [
+        events[4]
+    ]
+    assert device_events.get(limit=1) == [events[5]]
+    assert device_events.get(since="2021-01-01T00:00:00.000Z") == []
+
+
+def test_parse_date():
+    timestamp = 1576770965001
+
+    assert parse_date("2019-12-19T15:56:05.001Z") == timestamp
+    assert parse_date(datetime(2019, 12, 19, 15, 56, 5, 1000)) == timestamp
+    cet = timezone(timedelta(hours=1))
+    assert (
+        parse_date(datetime(2019, 12, 19, 16, 56, 5, 1000, tzinfo=cet))
+        == timestamp
+    )
+    assert parse_date(timestamp) == timestamp
+    assert parse_date(timestamp + 0.5) == timestamp
+
+    with pytest.raises(TypeError):
+        parse_date(None)
+
+
+def test_add_timestamps():
+    event = copy.deepcopy(events_response["data"]["events"][2])
+
+    assert add_timestamps(event) == 1576770965000
+    assert event["created_timestamp"] == 1576770965000
+    assert event["data"][0]["created_timestamp"] == 1576771027000
+    assert event["data"][1]["created_timestamp"] == 1576770973000
+
+
+def test_sorted_events_insert():
+    sorted_events = SortedEvents()
+    events = [{"created_date": "2019-12-19T15:56:05.000Z"}]
+    older = [{"created_date": "2019-12-18T15:56:05.000Z"}]
+    newer = [{"created_date": "2019-12-20T15:56:05.000Z"}]
+    middle = [
+        {"created_date": "2019-12-18T16:56:05.000Z"},
+        {"created_date": "2019-12-19T16:56:05.000Z"},
+    ]
+
+    for event in events + older + newer + middle:
+        add_timestamps(event)
+
+    sorted_events.insert(events)
+    sorted_events.insert(newer)
+    sorted_events.insert(older)
+    sorted_events.insert(middle)
+
+    expected = [
+        "2019-12-18T15:56:05.000Z",
+        "2019-12-18T16:56:05.000Z",
+        "2019-12-19T15:56:05.000Z",
+        "2019-12-19T16:56:05.000Z",
+        "2019-12-20T15:56:05.000Z",
+    ]
+    assert [e["created_date"] for e in sorted_events.events] == expected
+    assert sorted_events.keys == [parse_date(d) for d in expected]
+    assert len(sorted_events) == 5
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import threading
+
+from unittest import mock
+
+from kodaksmarthome import KodakSmartHomeFleet
+from kodaksmarthome.constants import HTTP_HEADERS_BASIC
+from kodaksmarthome.retry import RetryPolicy
+
+ACCOUNTS = [
+    {"username": "user_1", "password": "fake_pass"},
+    {"username": "user_2", "password": "fake_pass"},
+    {"username": "user_3", "password": "fake_pass", "region": "US"},
+]
+
+
+def test_fleet_shared_transport():
+    retry_policy = RetryPolicy()
+    fleet = KodakSmartHomeFleet(
+        ACCOUNTS, rate=5, pool_maxsize=32, retry_policy=retry_policy
+    )
+    user_1 = fleet.sessions["EU/user_1"]
+    user_2 = fleet.sessions["EU/user_2"]
+    user_3 = fleet.sessions["US/user_3"]
+    http_adapter = user_1.http_session.get_adapter("https://fake_url")
+
+    assert len(fleet) == 3
+    assert http_adapter._pool_maxsize == 32
+    assert user_2.http_session.get_adapter("https://fake_url") is (
+        http_adapter
+    )
+    assert user_3.http_session.get_adapter("https://fake_url") is not (
+        http_adapter
+    )
+    assert user_1.http_session is not user_2.http_session
+    assert user_1.rate_limiter is user_2.rate_limiter
+    assert user_1.rate_limiter is user_3.rate_limiter
+    assert user_1.rate_limiter is fleet.rate_limiter
+    assert user_3.retry_policy is retry_policy
+    assert fleet.remove("EU/user_2") is user_2
+    assert list(fleet) == [user_1, user_3]
+
+
+def test_fleet_sessions_headers():
+    fleet = KodakSmartHomeFleet(ACCOUNTS)
+    user_1 = fleet.sessions["EU/user_1"]
+    user_3 = fleet.sessions["US/user_3"]
+    user_1.token = "token_1"
+    user_3.token = "token_3"
+
+    assert user_1._bearer_headers()["Authorization"] == "Bearer token_1"
+    assert user_3._bearer_headers()["Authorization"] == "Bearer token_3"
+    assert user_1.basic_headers["Origin"] != user_3.basic_headers["Origin"]
+    assert "Authorization" not in user_1.basic_headers
+    assert "Origin" not in HTTP_HEADERS_BASIC
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome.connect")
+def test_fleet_connect_all(mock_connect):
+
+    def connect(load="all"):
+        if load != "devices":
+            raise AttributeError(load)
+
+        return None
+
+    mock_connect.side_effect = connect
+    fleet = KodakSmartHomeFleet(ACCOUNTS)
+    results, errors = fleet.connect_all(load="devices")
+
+    assert results == {
+        "EU/user_1": None,
+        "EU/user_2": None,
+        "US/user_3": None,
+    }
+    assert errors == {}
+
+    results, errors = fleet.connect_all(accounts=["EU/user_1"])
+
+    assert results == {}
+    assert isinstance(errors["EU/user_1"], AttributeError)
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome.update")
+def test_fleet_update_all(mock_update):
+    mock_update.side_effect = [None, ConnectionError("lost"), None]
+    fleet = KodakSmartHomeFleet(ACCOUNTS, max_workers=1)
+    results, errors = fleet.update_all(full=True)
+
+    assert len(results) == 2
+    assert list(errors.values())[0].args == ("lost",)
+    mock_update.assert_called_with(full=True)
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome.update")
+def test_fleet_run(mock_update):
+    fleet = KodakSmartHomeFleet(ACCOUNTS)
+    stop_event = threading.Event()
+    updates = list()
+
+    def callback(results, errors):
+        updates.append((results, errors))
+        if len(updates) == 2:
+            stop_event.set()
+
+    fleet.run(0, stop_event, callback=callback)
+
+    assert len(updates) == 2
+    assert mock_update.call_count == 6
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from unittest import mock
+
+from kodaksmarthome.constants import HTTP_CODE
+from kodaksmarthome.media import (
+    MediaCache,
+    MediaDownloader,
+    event_media,
+    media_file_name,
+)
+from tests.json_responses import events_response
+
+MOTION_EVENT = events_response["data"]["events"][2]
+
+
+def media_response(status_code, content=b""):
+    response = mock.MagicMock(status_code=status_code)
+    response.__enter__.return_value = response
+    response.iter_content.side_effect = lambda chunk_size: [
+        content[i: i + chunk_size] for i in range(0, len(content), chunk_size)
+    ]
+
+    return response
+
+
+def test_event_media():
+    media = event_media(MOTION_EVENT)
+
+    assert [m["id"] for m in media] == [
+        MOTION_EVENT["id"],
+        "3525c8b1-2278-11ea-8790-3fdecad07f1c",
+        "154ab961-2278-11ea-8790-3fdecad07f1c",
+    ]
+    assert media[0]["file_size"] is None
+    assert media[2]["file_size"] == 308288
+    assert [
+        m["id"] for m in event_media(MOTION_EVENT, False, file_types=[1])
+    ] == ["154ab961-2278-11ea-8790-3fdecad07f1c"]
+    assert event_media(events_response["data"]["events"][0]) == list()
+
+
+def test_media_file_name():
+
+    assert media_file_name({"id": "ID", "url": "https://h/a/b.mp4?t=1"}) == (
+        "ID.mp4"
+    )
+
+
+def test_download(tmp_path):
+    http_session = mock.MagicMock()
+    http_session.get.return_value = media_response(HTTP_CODE.OK, b"x" * 10)
+    downloader = MediaDownloader(http_session, chunk_size=3)
+    path = str(tmp_path / "media")
+
+    assert downloader.download("http://media_url", path, 10) == path
+    assert open(path, "rb").read() == b"x" * 10
+    http_session.get.assert_called_once_with(
+        "http://media_url", headers=dict(), stream=True, timeout=None
+    )
+
+    downloader.download("http://media_url", path, 10)
+
+    http_session.get.assert_called_once()
+
+
+def test_download_resume(tmp_path):
+    http_session = mock.MagicMock()
+    http_session.get.return_value = media_response(
+        HTTP_CODE.PARTIAL_CONTENT, b"y" * 6
+    )
+    path = str(tmp_path / "media")
+    with open(f"{path}.part", "wb") as part_file:
+        part_file.write(b"x" * 4)
+
+    MediaDownloader(http_session).download("http://media_url", path, 10)
+
+    assert open(path, "rb").read() == b"x" * 4 + b"y" * 6
+    assert http_session.get.call_args[1]["headers"] == {"Range": "bytes=4-"}
+
+
+def test_download_part_complete(tmp_path):
+    http_session = mock.MagicMock()
+    http_session.get.return_value = media_response(
+        HTTP_CODE.RANGE_NOT_SATISFIABLE
+    )
+    path = str(tmp_path / "media")
+    with open(f"{path}.part", "wb") as part_file:
+        part_file.write(b"x" * 10)
+
+    MediaDownloader(http_session).download("http://media_url", path)
+
+    assert open(path, "rb").read() == b"x" * 10
+
+
+def test_download_incomplete(tmp_path):
+    http_session = mock.MagicMock()
+    http_session.get.return_value = media_response(HTTP_CODE.OK, b"x" * 4)
+    path = tmp_path / "media"
+
+    with pytest.raises(ConnectionError):
+        MediaDownloader(http_session).download("http://media_url", path, 10)
+
+    assert not path.exists()
+    assert (tmp_path / "media.part").read_bytes() == b"x" * 4
+
+
+def test_download_failed(tmp_path):
+    http_session = mock.MagicMock()
+    http_session.get.return_value = media_response(HTTP_CODE.FORBIDDEN)
+
+    with pytest.raises(ConnectionError):
+        MediaDownloader(http_session).download(
+            "http://media_url", str(tmp_path / "media")
+        )
+
+
+def test_download_events(tmp_path):
+    def get(url, **kwargs):
+        if url == "http://file_type2_url":
+            return media_response(HTTP_CODE.NOT_FOUND)
+
+        return media_response(HTTP_CODE.OK, b"x" * 71552)
+
+    http_session = mock.MagicMock(get=mock.MagicMock(side_effect=get))
+    downloader = MediaDownloader(http_session, max_workers=2)
+    results, errors = downloader.download_events(
+        events_response["data"]["events"][4:5], str(tmp_path / "media")
+    )
+
+    assert sorted(results) == [
+        "ab7c3cc0-2277-11ea-8790-3fdecad07f1c",
+        "ae4b8961-2277-11ea-8790-3fdecad07f1c",
+    ]
+    assert list(errors) == ["c6b08051-2277-11ea-8790-3fdecad07f1c"]
+    assert isinstance(
+        errors["c6b08051-2277-11ea-8790-3fdecad07f1c"], ConnectionError
+    )
+
+    downloader.close()
+
+    http_session.close.assert_not_called()
+
+
+@mock.patch("kodaksmarthome.media.requests")
+def test_downloader_close(mock_requests):
+    downloader = MediaDownloader(max_workers=16)
+    downloader.close()
+
+    assert downloader.http_session.mount.call_count == 2
+    mock_requests.Session.return_value.close.assert_called_once_with()
+
+
+def fake_downloader(size=10):
+    def download(url, path, file_size=None):
+        with open(path, "wb") as media_file:
+            media_file.write(b"x" * size)
+
+        return path
+
+    return mock.MagicMock(download=mock.MagicMock(side_effect=download))
+
+
+def media(media_id):
+    return {
+        "id": media_id,
+        "url": f"http://{media_id}_url/file.jpg",
+        "file_type": None,
+        "file_size": None,
+    }
+
+
+def test_media_cache_fetch(tmp_path):
+    downloader = fake_downloader()
+    media_cache = MediaCache(str(tmp_path), downloader=downloader)
+
+    assert media_cache.get(media("MEDIA1")) is None
+    assert media_cache.fetch(media("MEDIA1")) == str(tmp_path / "MEDIA1.jpg")
+    assert media_cache.get(media("MEDIA1")) == str(tmp_path / "MEDIA1.jpg")
+    assert media_cache.fetch(media("MEDIA1")) == str(tmp_path / "MEDIA1.jpg")
+    assert downloader.download.call_count == 1
+    assert "MEDIA1" in media_cache
+    assert media_cache.size == 10
+
+    with media_cache.open(media("MEDIA1")) as media_file:
+        assert media_file.read() == b"x" * 10
+
+
+def test_media_cache_evict(tmp_path):
+    media_cache = MediaCache(
+        str(tmp_path), max_bytes=25, downloader=fake_downloader()
+    )
+    media_cache.fetch(media("MEDIA1"))
+    media_cache.fetch(media("MEDIA2"))
+    media_cache.get(media("MEDIA1"))
+    media_cache.fetch(media("MEDIA3"))
+
+    assert len(media_cache) == 2
+    assert media_cache.size == 20
+    assert "MEDIA2" not in media_cache
+    assert sorted(os.listdir(tmp_path)) == ["MEDIA1.jpg", "MEDIA3.jpg"]
+
+
+def test_media_cache_load(tmp_path):
+    for mtime, media_id in enumerate(["MEDIA2", "MEDIA1", "MEDIA3"]):
+        path = tmp_path / f"{media_id}.jpg"
+        path.write_bytes(b"x" * 10)
+        os.utime(path, (mtime, mtime))
+    (tmp_path / "MEDIA4.jpg.part").write_bytes(b"x" * 10)
+
+    media_cache = MediaCache(
+        str(tmp_path), max_bytes=20, downloader=fake_downloader()
+    )
+
+    assert list(media_cache._files) == ["MEDIA1", "MEDIA3"]
+    assert media_cache.size == 20
+
+
+def test_media_cache_concurrent_fetch(tmp_path):
+    downloader = fake_downloader()
+    media_cache = MediaCache(str(tmp_path), downloader=downloader)
+    barrier = threading.Barrier(8)
+
+    def fetch(_):
+        barrier.wait()
+        return media_cache.fetch(media("MEDIA1"))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        paths = set(executor.map(fetch, range(8)))
+
+    assert paths == {str(tmp_path / "MEDIA1.jpg")}
+    assert downloader.download.call_count == 1
+    assert media_cache.size == 10
+
+
+def test_media_cache_fetch_failed(tmp_path):
+    downloader = mock.MagicMock(
+        download=mock.MagicMock(side_effect=ConnectionError)
+    )
+    media_cache = MediaCache(str(tmp_path), downloader=downloader)
+
+    with pytest.raises(ConnectionError):
+        media_cache.fetch(media("MEDIA1"))
+
+    assert "MEDIA1" not in media_cache
+    assert media_cache._downloads == dict()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import copy
+
+import pytest
+from unittest import mock
+
+from kodaksmarthome.api import KodakSmartHome
+from kodaksmarthome.constants import DEVICE_EVENT_MOTION
+from kodaksmarthome.events import DeviceEvents, add_timestamps, event_key
+from kodaksmarthome.models import (
+    MODEL_COMPACT,
+    Device,
+    Event,
+    EventType,
+    MediaFile,
+    load_devices,
+    load_events,
+)
+from tests.json_responses import devices_response, events_response
+
+
+def test_event():
+    payload = copy.deepcopy(events_response["data"]["events"][2])
+    event = Event.from_dict(payload)
+
+    assert event.event_type is EventType.MOTION
+    assert event["event_type"] == DEVICE_EVENT_MOTION
+    assert event["snapshot"] == "http://snapshot_url"
+    assert event["created_timestamp"] == 1576770965000
+    assert isinstance(event["data"][0], MediaFile)
+    assert event["data"][0]["file"] == "http://file_type2_url"
+    assert event.data[1].created_timestamp == 1576770973000
+    assert event["dv_data"] is None
+    assert event.get("not_mapped") is None
+    timestamped_payload = copy.deepcopy(payload)
+    add_timestamps(timestamped_payload)
+    assert event == timestamped_payload
+    assert event.raw == {
+        **payload,
+        "created_timestamp": 1576770965000,
+        "data": [
+            {**payload["data"][0], "created_timestamp": 1576771027000},
+            {**payload["data"][1], "created_timestamp": 1576770973000},
+        ],
+    }
+    assert not hasattr(event, "__dict__")
+
+
+def test_event_optional_and_extra_fields():
+    payload = {
+        "id": "13889a30-227c-11ea-8790-3fdecad07f1c",
+        "event_type": 99,
+        "created_date": "2019-12-19T16:24:48.000Z",
+        "data": [],
+        "dv_data": None,
+        "new_field": "value",
+    }
+    event = Event.from_dict(payload)
+
+    assert event.event_type == 99
+    assert "snapshot" not in event
+    assert event["new_field"] == "value"
+    assert set(event) == set(payload) | {"created_timestamp"}
+
+    with pytest.raises(KeyError):
+        event["snapshot"]
+
+
+def test_event_without_id():
+    payload = {
+        "event_type": 1,
+        "created_date": "2019-12-19T16:24:48.000Z",
+        "data": [],
+    }
+    events = load_events(
+        [payload, {**payload, "event_type": 2}], MODEL_COMPACT
+    )
+
+    assert "id" not in events[0]
+    assert event_key(events[0]) != event_key(events[1])
+    assert len(DeviceEvents("FAKEDEVICEID", events)) == 2
+
+
+def test_load_events():
+    events = events_response["data"]["events"]
+
+    assert load_events(events) is events
+    assert all(
+        isinstance(e, Event) for e in load_events(events, MODEL_COMPACT)
+    )
+
+
+def test_load_devices():
+    devices = [
+        {
+            "device_id": "FAKEDEVICEID",
+            "name": "Bedroom",
+            "model_name": "Cherish 525",
+            "is_online": True,
+            "plan_id": "plan_01",
+        }
+    ]
+    compact_devices = load_devices(devices, MODEL_COMPACT)
+
+    assert isinstance(compact_devices[0], Device)
+    assert compact_devices[0]["name"] == "Bedroom"
+    assert compact_devices[0]["plan_id"] == "plan_01"
+    assert compact_devices == devices
+    assert load_devices(devices) is devices
+
+
+def test_unsupported_model():
+
+    with pytest.raises(AttributeError):
+        KodakSmartHome("fake_user", "fake_pass", model="BR")
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+def test_compact_model(mock__http_request):
+
+    mock__http_request.return_value = copy.deepcopy(events_response)
+    test_ksh = KodakSmartHome("fake_user", "fake_pass", model=MODEL_COMPACT)
+    test_ksh.devices = devices_response["data"]["devices"]
+    test_ksh.is_connected = True
+    test_ksh._get_events()
+
+    motion_events = test_ksh.get_motion_events(device_id="FAKEDEVICEID")
+
+    assert len(motion_events) == 2
+    assert all(isinstance(e, Event) for e in motion_events)
+    assert motion_events[0]["data"][0]["file"] == "http://file_type2_url"
+    assert len(test_ksh.get_battery_events()) == 3
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import threading
+
+import pytest
+from unittest import mock
+
+from kodaksmarthome.poller import DevicePoller
+
+DEVICES = [
+    {"device_id": "ACTIVE", "is_online": True},
+    {"device_id": "IDLE", "is_online": True},
+    {"device_id": "OFFLINE", "is_online": False},
+]
+
+
+def fake_session(devices=DEVICES):
+    session = mock.MagicMock(devices=list(devices))
+    session.get_motion_events.side_effect = lambda device_id, **kwargs: (
+        [{"id": "EVENT"}] if device_id == "ACTIVE" else list()
+    )
+
+    return session
+
+
+def test_poller_interval():
+    poller = DevicePoller(fake_session())
+
+    assert [poller.interval(device) for device in DEVICES] == [30, 300, 900]
+
+
+@mock.patch("kodaksmarthome.poller.time.monotonic")
+def test_poller_poll(mock_monotonic):
+    mock_monotonic.return_value = 1000.0
+    session = fake_session()
+    poller = DevicePoller(session)
+
+    assert poller.poll() == ["ACTIVE", "IDLE", "OFFLINE"]
+    session.update_devices.assert_called_once_with()
+    assert poller.next_due() == 1030.0
+
+    mock_monotonic.return_value = 1030.0
+
+    assert poller.poll() == ["ACTIVE"]
+
+    mock_monotonic.return_value = 1300.0
+
+    assert poller.poll() == ["ACTIVE", "IDLE"]
+    assert session.update_devices.call_count == 2
+    assert session.update.call_args_list == [
+        mock.call(device_ids=["ACTIVE", "IDLE", "OFFLINE"]),
+        mock.call(device_ids=["ACTIVE"]),
+        mock.call(device_ids=["ACTIVE", "IDLE"]),
+    ]
+
+
+@mock.patch("kodaksmarthome.poller.time.monotonic")
+def test_poller_poll_devices_changed(mock_monotonic):
+    mock_monotonic.return_value = 1000.0
+    session = fake_session()
+    poller = DevicePoller(session)
+    poller.poll()
+    session.devices = [DEVICES[1], {"device_id": "NEW", "is_online": True}]
+    mock_monotonic.return_value = 1300.0
+
+    assert poller.poll() == ["IDLE", "NEW"]
+    assert poller.next_due() == 1600.0
+
+
+@mock.patch("kodaksmarthome.poller.time.monotonic")
+def test_poller_run(mock_monotonic):
+    mock_monotonic.return_value = 1000.0
+    stop_event = mock.MagicMock(spec=threading.Event)
+    stop_event.is_set.side_effect = [False, False, True]
+    session = fake_session()
+    poller = DevicePoller(session)
+    poller.run(stop_event)
+
+    assert session.update.call_count == 1
+    assert stop_event.wait.call_args_list == [mock.call(30.0)] * 2
+
+
+@mock.patch("kodaksmarthome.poller.time.monotonic")
+def test_poller_poll_failed(mock_monotonic):
+    mock_monotonic.return_value = 1000.0
+    session = fake_session()
+    session.update.side_effect = [ConnectionError, None]
+    poller = DevicePoller(session)
+
+    with pytest.raises(ConnectionError) as error:
+        poller.poll()
+
+    assert error.value.device_ids == ["ACTIVE", "IDLE", "OFFLINE"]
+    assert poller.next_due() == 1030.0
+
+    session.get_motion_events.side_effect = ConnectionError
+    mock_monotonic.return_value = 1030.0
+
+    with pytest.raises(ConnectionError):
+        poller.poll()
+
+    assert poller.next_due() == 1060.0
+    assert sorted(device_id for _, device_id in poller._queue) == [
+        "ACTIVE",
+        "IDLE",
+        "OFFLINE",
+    ]
+
+
+@mock.patch("kodaksmarthome.poller.time.monotonic")
+def test_poller_run_failed(mock_monotonic):
+    mock_monotonic.return_value = 1000.0
+    stop_event = mock.MagicMock(spec=threading.Event)
+    stop_event.is_set.side_effect = [False, False, True]
+    session = fake_session()
+    error = ConnectionError("Kodak Smarthome API is False")
+    session.update_devices.side_effect = [error, None]
+    update_error = ConnectionError("Kodak Smarthome session lost")
+    session.update.side_effect = [update_error, None]
+    callback = mock.MagicMock()
+    poller = DevicePoller(session)
+    poller.run(stop_event, callback)
+
+    assert callback.call_args_list == [
+        mock.call(list(), error),
+        mock.call(["ACTIVE", "IDLE", "OFFLINE"], update_error),
+    ]
+    assert stop_event.wait.call_args_list == [mock.call(30.0)] * 2
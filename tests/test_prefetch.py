@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import asyncio
+import threading
+
+from unittest import mock
+
+from kodaksmarthome.api import KodakSmartHome
+from kodaksmarthome.async_api import AsyncKodakSmartHome
+from kodaksmarthome.constants import DEVICE_EVENT_MOTION
+from kodaksmarthome.prefetch import SnapshotPrefetcher
+from tests.json_responses import events_response
+
+MOTION_EVENTS = [
+    event
+    for event in events_response["data"]["events"]
+    if event["event_type"] == DEVICE_EVENT_MOTION
+]
+
+
+def test_prefetcher_event_media():
+    prefetcher = SnapshotPrefetcher(mock.MagicMock(), mock.MagicMock())
+
+    assert [m["id"] for m in prefetcher.event_media(MOTION_EVENTS[0])] == [
+        MOTION_EVENTS[0]["id"]
+    ]
+
+    prefetcher.clips = True
+
+    assert [m["id"] for m in prefetcher.event_media(MOTION_EVENTS[0])] == [
+        MOTION_EVENTS[0]["id"],
+        "154ab961-2278-11ea-8790-3fdecad07f1c",
+    ]
+
+
+def test_prefetcher_put_drops_oldest():
+    prefetcher = SnapshotPrefetcher(
+        mock.MagicMock(), mock.MagicMock(), max_queue=2
+    )
+    prefetcher.put([{"id": "MEDIA1"}, {"id": "MEDIA2"}, {"id": "MEDIA3"}])
+
+    assert len(prefetcher) == 2
+    assert prefetcher.dropped == 1
+    assert [m["id"] for m in prefetcher._queue] == ["MEDIA2", "MEDIA3"]
+
+
+def test_prefetcher_update():
+    def get_events(incremental=False):
+        test_ksh._new_events = {"DEVICE1": events_response["data"]["events"]}
+
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh._get_devices = mock.MagicMock()
+    test_ksh._get_events = get_events
+    fetched = threading.Semaphore(0)
+    media_cache = mock.MagicMock()
+    media_cache.fetch.side_effect = lambda media: f"media/{media['id']}"
+    callback = mock.MagicMock(
+        side_effect=lambda media, path: fetched.release()
+    )
+    prefetcher = SnapshotPrefetcher(test_ksh, media_cache, callback=callback)
+    test_ksh.update()
+
+    assert len(prefetcher) == 0
+
+    prefetcher.start()
+    test_ksh.update()
+
+    for _ in MOTION_EVENTS:
+        assert fetched.acquire(timeout=5)
+
+    prefetcher.stop()
+
+    assert sorted(c.args[1] for c in callback.call_args_list) == sorted(
+        f"media/{event['id']}" for event in MOTION_EVENTS
+    )
+    assert prefetcher._threads == list()
+
+
+def test_prefetcher_fetch_failed():
+    fetched = threading.Event()
+
+    def fetch(media):
+        fetched.set()
+        raise ConnectionError
+
+    media_cache = mock.MagicMock(fetch=mock.MagicMock(side_effect=fetch))
+    prefetcher = SnapshotPrefetcher(mock.MagicMock(), media_cache, workers=1)
+    prefetcher.start()
+    prefetcher.put([{"id": "MEDIA1"}])
+
+    assert fetched.wait(timeout=5)
+
+    prefetcher.stop()
+
+    assert prefetcher.failed == 1
+
+
+def test_prefetcher_callback_failed():
+    fetched = threading.Semaphore(0)
+
+    def callback(media, path):
+        fetched.release()
+        raise ValueError
+
+    media_cache = mock.MagicMock()
+    prefetcher = SnapshotPrefetcher(
+        mock.MagicMock(), media_cache, workers=1, callback=callback
+    )
+    prefetcher.start()
+    prefetcher.put([{"id": "MEDIA1"}])
+    prefetcher.put([{"id": "MEDIA2"}])
+
+    assert fetched.acquire(timeout=5)
+    assert fetched.acquire(timeout=5)
+
+    prefetcher.stop()
+
+    assert media_cache.fetch.call_count == 2
+    assert prefetcher.callback_errors == 2
+    assert len(prefetcher) == 0
+
+
+def test_prefetcher_async_update():
+    async def get_events(incremental=False):
+        test_ksh._new_events = {"DEVICE1": events_response["data"]["events"]}
+
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh._get_devices = mock.AsyncMock()
+    test_ksh._get_events = get_events
+    prefetcher = SnapshotPrefetcher(test_ksh, mock.MagicMock(), workers=0)
+    prefetcher.start()
+    asyncio.run(test_ksh.update())
+
+    assert len(prefetcher) == len(MOTION_EVENTS)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from unittest import mock
+
+from kodaksmarthome.api import KodakSmartHome
+from kodaksmarthome.async_api import AsyncKodakSmartHome
+from kodaksmarthome.constants import HTTP_CODE
+from kodaksmarthome.ratelimit import RateLimiter, request_host
+from tests.conftest import MockAiohttpResponse, MockRequestsResponse
+
+HOST = "app-eu.kodaksmarthome.com"
+
+
+def test_request_host():
+
+    assert request_host(f"https://{HOST}/web/user/device?page=1") == HOST
+
+
+def test_rate_limiter_unsupported_rate():
+
+    with pytest.raises(AttributeError):
+        RateLimiter(0)
+
+
+@mock.patch("kodaksmarthome.ratelimit.time.monotonic")
+def test_rate_limiter_reserve(mock_monotonic):
+    mock_monotonic.return_value = 100.0
+    rate_limiter = RateLimiter(rate=2, burst=2)
+
+    assert rate_limiter.reserve(HOST) == 0
+    assert rate_limiter.reserve(HOST) == 0
+    assert rate_limiter.reserve(HOST) == 0.5
+    assert rate_limiter.reserve(HOST) == 1.0
+    assert rate_limiter.reserve("other.host") == 0
+
+    mock_monotonic.return_value = 102.0
+
+    assert rate_limiter.reserve(HOST) == 0
+    assert rate_limiter.reserve(HOST) == 0
+    assert rate_limiter.reserve(HOST) == 0.5
+
+
+@mock.patch("kodaksmarthome.ratelimit.time.sleep")
+@mock.patch("kodaksmarthome.ratelimit.time.monotonic")
+def test_rate_limiter_threads(mock_monotonic, mock_sleep):
+    mock_monotonic.return_value = 100.0
+    rate_limiter = RateLimiter(rate=10, burst=1)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: rate_limiter.acquire(HOST), range(10)))
+
+    delays = sorted(round(c.args[0], 6) for c in mock_sleep.call_args_list)
+
+    assert delays == [round(0.1 * n, 6) for n in range(1, 10)]
+
+
+@mock.patch("kodaksmarthome.ratelimit.time.sleep")
+@mock.patch("kodaksmarthome.api.requests")
+def test__http_request_rate_limiter(mock_requests, mock_sleep):
+
+    mock_requests.Session.return_value = mock.MagicMock(
+        get=mock.MagicMock(
+            return_value=MockRequestsResponse(
+                {"key": "value"},
+                HTTP_CODE.OK,
+                {"Content-Type": "application/json"},
+            )
+        )
+    )
+    rate_limiter = RateLimiter(rate=1, burst=1)
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", rate_limiter=rate_limiter
+    )
+    other_ksh = KodakSmartHome(
+        "other_user", "fake_pass", rate_limiter=rate_limiter
+    )
+    test_ksh._http_request("GET", f"https://{HOST}/web/user/device")
+    other_ksh._http_request("GET", f"https://{HOST}/web/user/device")
+
+    mock_sleep.assert_called_once()
+
+
+def test_async__http_request_rate_limiter():
+
+    rate_limiter = mock.MagicMock(acquire_async=mock.AsyncMock())
+    test_ksh = AsyncKodakSmartHome(
+        "fake_user", "fake_pass", rate_limiter=rate_limiter
+    )
+    test_ksh.http_session = mock.MagicMock(
+        closed=False,
+        request=mock.MagicMock(
+            return_value=MockAiohttpResponse(
+                {"key": "value"},
+                HTTP_CODE.OK,
+                {"Content-Type": "application/json"},
+            )
+        ),
+    )
+    asyncio.run(
+        test_ksh._http_request("GET", f"https://{HOST}/web/user/device")
+    )
+
+    rate_limiter.acquire_async.assert_awaited_once_with(HOST)
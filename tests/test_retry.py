@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import asyncio
+
+import aiohttp
+import pytest
+import requests
+from unittest import mock
+
+from kodaksmarthome.api import KodakSmartHome
+from kodaksmarthome.async_api import AsyncKodakSmartHome
+from kodaksmarthome.constants import HTTP_CODE
+from kodaksmarthome.retry import (
+    CircuitBreaker,
+    RetryPolicy,
+    parse_retry_after,
+    request_endpoint,
+)
+from tests.conftest import MockAiohttpResponse, MockRequestsResponse
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def test_request_endpoint():
+
+    assert request_endpoint(
+        "https://app-eu.kodaksmarthome.com/web/user/device/event?"
+        + "deviceId=FAKEDEVICEID&page=2"
+    ) == "https://app-eu.kodaksmarthome.com/web/user/device/event"
+
+
+def test_parse_retry_after():
+
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("invalid") is None
+
+
+def test_retry_policy_next_delay():
+    retry_policy = RetryPolicy(
+        retries=3, backoff=1, max_backoff=3, jitter=False
+    )
+
+    assert retry_policy.next_delay(0) == 1
+    assert retry_policy.next_delay(1) == 2
+    assert retry_policy.next_delay(2) == 3
+    assert retry_policy.next_delay(3) is None
+    assert retry_policy.next_delay(0, retry_after="2") == 2
+    assert retry_policy.next_delay(0, retry_after="120") == 3
+
+
+def test_retry_policy_jitter():
+    retry_policy = RetryPolicy(backoff=1)
+
+    assert all(0 <= retry_policy.next_delay(2) <= 4 for _ in range(100))
+
+
+@mock.patch("kodaksmarthome.retry.time.monotonic")
+def test_circuit_breaker(mock_monotonic):
+    mock_monotonic.return_value = 100.0
+    circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    endpoint = "https://app-eu.kodaksmarthome.com/web/user/device"
+
+    circuit_breaker.record_failure(endpoint)
+    circuit_breaker.before_request(endpoint)
+
+    assert circuit_breaker.state(endpoint) == CircuitBreaker.CLOSED
+
+    circuit_breaker.record_failure(endpoint)
+
+    assert circuit_breaker.state(endpoint) == CircuitBreaker.OPEN
+    with pytest.raises(ConnectionError):
+        circuit_breaker.before_request(endpoint)
+
+    mock_monotonic.return_value = 130.0
+    circuit_breaker.before_request(endpoint)
+
+    assert circuit_breaker.state(endpoint) == CircuitBreaker.HALF_OPEN
+    with pytest.raises(ConnectionError):
+        circuit_breaker.before_request(endpoint)
+
+    circuit_breaker.record_failure(endpoint)
+
+    assert circuit_breaker.state(endpoint) == CircuitBreaker.OPEN
+
+    mock_monotonic.return_value = 160.0
+    circuit_breaker.before_request(endpoint)
+    circuit_breaker.record_success(endpoint)
+
+    assert circuit_breaker.state(endpoint) == CircuitBreaker.CLOSED
+
+
+@mock.patch("kodaksmarthome.api.time.sleep")
+@mock.patch("kodaksmarthome.api.requests")
+def test__http_request_retry(mock_requests, mock_sleep):
+
+    mock_requests.exceptions = requests.exceptions
+    mock_requests.Session.return_value = mock.MagicMock(
+        get=mock.MagicMock(
+            side_effect=[
+                requests.exceptions.ConnectionError("reset"),
+                MockRequestsResponse(
+                    None, HTTP_CODE.TOO_MANY_REQUESTS, {"Retry-After": "2"}
+                ),
+                MockRequestsResponse(
+                    {"key": "value"}, HTTP_CODE.OK, JSON_HEADERS
+                ),
+            ]
+        )
+    )
+    test_ksh = KodakSmartHome(
+        "fake_user",
+        "fake_pass",
+        retry_policy=RetryPolicy(backoff=1, jitter=False),
+    )
+
+    assert test_ksh._http_request("GET", "http://fake=url") == {
+        "key": "value"
+    }
+    assert mock_sleep.call_args_list == [mock.call(1), mock.call(2.0)]
+
+
+@mock.patch("kodaksmarthome.api.time.sleep")
+@mock.patch("kodaksmarthome.api.requests")
+def test__http_request_retry_exhausted(mock_requests, mock_sleep):
+
+    mock_requests.Session.return_value = mock.MagicMock(
+        get=mock.MagicMock(
+            return_value=MockRequestsResponse(
+                None, HTTP_CODE.SERVICE_UNAVAILABLE, {}
+            )
+        )
+    )
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", retry_policy=RetryPolicy(retries=2)
+    )
+
+    with pytest.raises(ConnectionError):
+        test_ksh._http_request("GET", "http://fake=url")
+
+    assert mock_requests.Session.return_value.get.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+@mock.patch("kodaksmarthome.api.requests")
+def test__http_request_circuit_breaker(mock_requests):
+
+    mock_requests.Session.return_value = mock.MagicMock(
+        get=mock.MagicMock(
+            return_value=MockRequestsResponse(
+                None, HTTP_CODE.BAD_GATEWAY, {}
+            )
+        )
+    )
+    test_ksh = KodakSmartHome(
+        "fake_user",
+        "fake_pass",
+        circuit_breaker=CircuitBreaker(failure_threshold=2),
+    )
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            test_ksh._http_request("GET", "http://fake=url")
+
+    assert mock_requests.Session.return_value.get.call_count == 2
+
+
+@mock.patch("kodaksmarthome.api.requests")
+def test__http_request_circuit_breaker_trial_error(mock_requests):
+
+    mock_requests.exceptions = requests.exceptions
+    mock_requests.Session.return_value = mock.MagicMock(
+        get=mock.MagicMock(
+            side_effect=[
+                MockRequestsResponse(None, HTTP_CODE.BAD_GATEWAY, {}),
+                requests.exceptions.ChunkedEncodingError("broken"),
+                MockRequestsResponse(
+                    {"key": "value"}, HTTP_CODE.OK, JSON_HEADERS
+                ),
+            ]
+        )
+    )
+    circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", circuit_breaker=circuit_breaker
+    )
+
+    with pytest.raises(ConnectionError):
+        test_ksh._http_request("GET", "http://fake=url")
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        test_ksh._http_request("GET", "http://fake=url")
+
+    assert test_ksh._http_request("GET", "http://fake=url") == {
+        "key": "value"
+    }
+    assert circuit_breaker.state("http://fake=url") == CircuitBreaker.CLOSED
+
+
+def test_async__http_request_circuit_breaker_trial_error():
+
+    circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    circuit_breaker.record_failure("http://fake=url")
+    test_ksh = AsyncKodakSmartHome(
+        "fake_user", "fake_pass", circuit_breaker=circuit_breaker
+    )
+    test_ksh.http_session = mock.MagicMock(
+        closed=False,
+        request=mock.MagicMock(side_effect=[ValueError, RuntimeError]),
+    )
+
+    with pytest.raises(ValueError):
+        asyncio.run(test_ksh._http_request("GET", "http://fake=url"))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(test_ksh._http_request("GET", "http://fake=url"))
+
+
+@mock.patch("kodaksmarthome.async_api.asyncio.sleep")
+def test_async__http_request_retry(mock_sleep):
+
+    test_ksh = AsyncKodakSmartHome(
+        "fake_user",
+        "fake_pass",
+        retry_policy=RetryPolicy(backoff=1, jitter=False),
+    )
+    test_ksh.http_session = mock.MagicMock(
+        closed=False,
+        request=mock.MagicMock(
+            side_effect=[
+                aiohttp.ClientConnectionError("reset"),
+                MockAiohttpResponse(
+                    None, HTTP_CODE.SERVICE_UNAVAILABLE, {}
+                ),
+                MockAiohttpResponse(
+                    {"key": "value"}, HTTP_CODE.OK, JSON_HEADERS
+                ),
+            ]
+        ),
+    )
+
+    assert asyncio.run(test_ksh._http_request("GET", "http://fake=url")) == {
+        "key": "value"
+    }
+    assert mock_sleep.await_args_list == [mock.call(1), mock.call(2)]
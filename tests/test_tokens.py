@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019, 2020 Kairo de Araujo
+#
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from unittest import mock
+from yarl import URL
+
+from kodaksmarthome.api import KodakSmartHome
+from kodaksmarthome.async_api import AsyncKodakSmartHome
+from kodaksmarthome.tokens import FileTokenStore, MemoryTokenStore
+
+token_response = {
+    "access_token": "access_token",
+    "token_type": "bearer",
+    "refresh_token": "refresh_token",
+    "expires_in": 3600,
+    "scope": "scope",
+    "account_info": {"id": 7777},
+    "web_urls": {"web": "https://app-eu.kodaksmarthome.com/web"},
+}
+
+
+def stored_token(expires_at):
+    return {
+        "token_info": {
+            "access_token": "stored_access_token",
+            "token_type": "bearer",
+            "refresh_token": "stored_refresh_token",
+            "expires_in": 3600,
+            "expires_at": expires_at,
+            "scope": "scope",
+        },
+        "account_info": {"id": 7777},
+        "web_urls": {"web": "https://app-eu.kodaksmarthome.com/web"},
+        "cookie": "FAKEJSESSIONID",
+        "user_id": 7777,
+    }
+
+
+def test_file_token_store(tmp_path):
+    token_store = FileTokenStore(str(tmp_path / "token.json"))
+
+    assert token_store.load("EU/fake_user") is None
+
+    token_store.save("EU/fake_user", stored_token(1000))
+    token_store.save("EU/other_user", stored_token(2000))
+
+    assert FileTokenStore(token_store.path).load("EU/fake_user") == (
+        stored_token(1000)
+    )
+    assert (tmp_path / "token.json").stat().st_mode & 0o777 == 0o600
+
+    token_store.clear("EU/fake_user")
+    token_store.clear("EU/fake_user")
+
+    assert token_store.load("EU/fake_user") is None
+    assert token_store.load("EU/other_user") == stored_token(2000)
+
+    token_store.clear("EU/other_user")
+
+    assert not (tmp_path / "token.json").exists()
+
+
+def test_memory_token_store():
+    token_store = MemoryTokenStore()
+    token_store.save("EU/fake_user", stored_token(1000))
+    token_store.save("EU/other_user", stored_token(2000))
+
+    assert token_store.load("EU/fake_user") == stored_token(1000)
+
+    token_store.clear("EU/fake_user")
+
+    assert token_store.load("EU/fake_user") is None
+    assert token_store.load("EU/other_user") == stored_token(2000)
+
+
+def test__set_token_expires_at():
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+
+    assert test_ksh._token_expired()
+
+    test_ksh._set_token(token_response)
+
+    assert not test_ksh._token_expired()
+    assert test_ksh._token_expired(margin=3600)
+    assert test_ksh.token_info["expires_at"] > time.time()
+
+    test_ksh._set_token({"access_token": "new_token", "token_type": "bearer"})
+
+    assert test_ksh.token == "new_token"
+    assert test_ksh.token_info["refresh_token"] == "refresh_token"
+    assert test_ksh.account_info == {"id": 7777}
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._authentication")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._token")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._options")
+def test__login_saves_token(mock__options, mock__token, mock__authentication):
+    token_store = MemoryTokenStore()
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", token_store=token_store
+    )
+    test_ksh._login()
+
+    mock__token.assert_called_once()
+    assert token_store.load("EU/fake_user") is not None
+    assert token_store.load("EU/other_user") is None
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._token")
+def test__login_reuses_token(mock__token, mock__http_request):
+    token_store = MemoryTokenStore()
+    token_store.save("EU/fake_user", stored_token(time.time() + 3600))
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", token_store=token_store
+    )
+
+    assert test_ksh._login()
+    assert test_ksh.token == "stored_access_token"
+    assert test_ksh.is_connected
+    assert test_ksh.http_session.cookies["JSESSIONID"] == "FAKEJSESSIONID"
+    mock__token.assert_not_called()
+    mock__http_request.assert_not_called()
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._token")
+def test__login_refreshes_token(mock__token, mock__http_request):
+    mock__http_request.return_value = {
+        **token_response,
+        "access_token": "refreshed_access_token",
+    }
+    token_store = MemoryTokenStore()
+    token_store.save("EU/fake_user", stored_token(time.time() - 1))
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", token_store=token_store
+    )
+
+    assert test_ksh._login()
+    assert test_ksh.token == "refreshed_access_token"
+    assert "grant_type=refresh_token&refresh_token=stored_refresh_token" in (
+        mock__http_request.call_args[1]["data"]
+    )
+    assert token_store.load("EU/fake_user")["token_info"]["access_token"] == (
+        "refreshed_access_token"
+    )
+    mock__token.assert_not_called()
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._authentication")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._token")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._options")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._refresh_token")
+def test__login_refresh_fails(
+    mock__refresh_token, mock__options, mock__token, mock__authentication
+):
+    mock__refresh_token.side_effect = ConnectionError("invalid_grant")
+    token_store = MemoryTokenStore()
+    token_store.save("EU/fake_user", stored_token(time.time() - 1))
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", token_store=token_store
+    )
+
+    assert test_ksh._login()
+    mock__options.assert_called_once()
+    mock__token.assert_called_once()
+    mock__authentication.assert_called_once()
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._authentication")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._token")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._options")
+def test__relogin_discards_token(
+    mock__options, mock__token, mock__authentication
+):
+    token_store = MemoryTokenStore()
+    token_store.save("EU/fake_user", stored_token(time.time() + 3600))
+    token_store.save("EU/other_user", stored_token(1000))
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", token_store=token_store
+    )
+
+    assert test_ksh._relogin()
+    mock__token.assert_called_once()
+    mock__authentication.assert_called_once()
+    # the other accounts keep their credentials
+    assert token_store.load("EU/other_user") == stored_token(1000)
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._http_request")
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._token")
+def test_async__login_refreshes_token(mock__token, mock__http_request):
+    mock__http_request.return_value = {
+        **token_response,
+        "access_token": "refreshed_access_token",
+    }
+    token_store = MemoryTokenStore()
+    token_store.save("EU/fake_user", stored_token(time.time() - 1))
+    test_ksh = AsyncKodakSmartHome(
+        "fake_user", "fake_pass", token_store=token_store
+    )
+
+    async def login():
+        result = await test_ksh._login()
+        cookies = test_ksh.http_session.cookie_jar.filter_cookies(
+            URL(test_ksh.region_url.URL_AUTH)
+        )
+        await test_ksh.http_session.close()
+
+        return result, cookies
+
+    result, cookies = asyncio.run(login())
+
+    assert result
+    assert test_ksh.token == "refreshed_access_token"
+    assert cookies["JSESSIONID"].value == "FAKEJSESSIONID"
+    mock__token.assert_not_awaited()
+
+
+def renewed_token(test_ksh):
+    def refresh_token():
+        time.sleep(0.05)
+        test_ksh._set_token(token_response)
+
+        return True
+
+    return refresh_token
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._refresh_token")
+def test__ensure_token_not_due(mock__refresh_token):
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+
+    assert test_ksh._ensure_token() is False
+
+    test_ksh._set_token(token_response)
+
+    assert test_ksh._ensure_token() is False
+    mock__refresh_token.assert_not_called()
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._refresh_token")
+def test__ensure_token_single_flight(mock__refresh_token):
+    token_store = MemoryTokenStore()
+    test_ksh = KodakSmartHome(
+        "fake_user", "fake_pass", token_store=token_store
+    )
+    test_ksh.token_info = stored_token(time.time() + 60)["token_info"]
+    mock__refresh_token.side_effect = renewed_token(test_ksh)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        renewals = list(
+            executor.map(lambda _: test_ksh._ensure_token(), range(8))
+        )
+
+    assert renewals.count(True) == 1
+    mock__refresh_token.assert_called_once()
+    assert test_ksh.token == "access_token"
+    assert token_store.load("EU/fake_user")["token_info"]["access_token"] == (
+        "access_token"
+    )
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._authentication")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._token")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._refresh_token")
+def test__ensure_token_refresh_fails(
+    mock__refresh_token, mock__token, mock__authentication
+):
+    mock__refresh_token.side_effect = ConnectionError("invalid_grant")
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.token_info = stored_token(time.time() + 60)["token_info"]
+
+    assert test_ksh._ensure_token()
+    mock__token.assert_called_once()
+    mock__authentication.assert_called_once()
+
+
+@mock.patch("kodaksmarthome.api.KodakSmartHome._get_events")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._http_request")
+@mock.patch("kodaksmarthome.api.KodakSmartHome._refresh_token")
+def test_update_renews_token(
+    mock__refresh_token, mock__http_request, mock__get_events
+):
+    mock__http_request.return_value = {"data": []}
+    test_ksh = KodakSmartHome("fake_user", "fake_pass")
+    test_ksh.is_connected = True
+    test_ksh.token_info = stored_token(time.time() + 60)["token_info"]
+    mock__refresh_token.side_effect = renewed_token(test_ksh)
+    test_ksh.update()
+
+    mock__refresh_token.assert_called_once()
+    assert mock__http_request.call_args[1]["headers"]["Authorization"] == (
+        "Bearer access_token"
+    )
+
+
+@mock.patch("kodaksmarthome.async_api.AsyncKodakSmartHome._refresh_token")
+def test_async__ensure_token_single_flight(mock__refresh_token):
+    test_ksh = AsyncKodakSmartHome("fake_user", "fake_pass")
+    test_ksh.token_info = stored_token(time.time() + 60)["token_info"]
+
+    async def refresh_token():
+        await asyncio.sleep(0.05)
+        test_ksh._set_token(token_response)
+
+        return True
+
+    async def ensure_token():
+        return await asyncio.gather(
+            *[test_ksh._ensure_token() for _ in range(8)]
+        )
+
+    mock__refresh_token.side_effect = refresh_token
+    renewals = asyncio.run(ensure_token())
+
+    assert renewals.count(True) == 1
+    mock__refresh_token.assert_awaited_once()